@@ -0,0 +1,261 @@
+"""
+ASGI entry point, for serving the API from an async server:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+Needs the packages in requirements-async.txt. The hottest read routes (see ASYNC_ROUTES)
+run natively on an aiomysql pool, so a request waiting on MySQL, or long-polling
+/issues/<id>/watch, holds no thread. Every other request is passed to the regular Flask
+app through asgiref's WSGI adapter, which runs it on a thread as before.
+
+Async routes reuse the Flask app's session store, rate limits, CORS and visibility rules:
+each request is authenticated by a short call into the Flask request context (on a
+thread) before the async handler queries the database.
+"""
+import asyncio
+import re
+import time
+import io
+from asgiref.wsgi import WsgiToAsgi
+from flask import session
+from app import create_app
+from async_db import AsyncDatabase
+from auth_utils import (get_current_user_id, too_many_requests, issue_etag, PROJECT_VISIBILITY_SQL,
+                        ISSUE_VISIBILITY_ERRORS, project_visibility_from_row, visibility_status)
+from label_loader import group_labels_by_issue
+from rate_limit import check_rate_limit
+
+flask_app = create_app()
+wsgi_app = WsgiToAsgi(flask_app)
+database = AsyncDatabase(flask_app.config)
+
+
+##################################
+#        HELPER FUNCTIONS        #
+##################################
+def _build_environ(scope):
+    """Minimal WSGI environ for a body-less ASGI request, enough for Flask's request context"""
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("ascii"),
+        "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+        "SERVER_NAME": scope["server"][0] if scope.get("server") else "localhost",
+        "SERVER_PORT": str(scope["server"][1]) if scope.get("server") else "80",
+        "REMOTE_ADDR": scope["client"][0] if scope.get("client") else "",
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(b""),
+        "wsgi.errors": io.StringIO(),
+    }
+    for name, value in scope.get("headers", []):
+        key = "HTTP_" + name.decode("latin1").upper().replace("-", "_")
+        environ[key] = f"{environ[key]},{value.decode('latin1')}" if key in environ else value.decode("latin1")
+    return environ
+
+def _authenticate(environ):
+    """
+    Runs the Flask side of an async request on a worker thread: opens the session,
+    applies the per-user quota, and lets the app's after_request hooks (CORS, session
+    refresh) produce the headers the response needs.
+
+    Returns tuple (user_id, use_primary, headers, error) where error is (status, body) or None
+    """
+    with flask_app.request_context(environ):
+        user_id = get_current_user_id()
+        use_primary = session.get("primary_until", 0) > time.time()
+
+        error = None
+        if not user_id:
+            error = (401, {"error": "Authentication required, please log in"})
+            response = flask_app.response_class()
+        else:
+            allowed, retry_after = check_rate_limit("user", str(user_id))
+            if allowed:
+                response = flask_app.response_class()
+            else:
+                response, status = too_many_requests("Request quota exceeded, please slow down", retry_after)
+                error = (status, response.get_json())
+
+        response = flask_app.process_response(response)
+        headers = [(k, v) for k, v in response.headers.items() if k.lower() not in ("content-type", "content-length")]
+
+    return user_id, use_primary, headers, error
+
+async def _send_json(send, status: int, body, headers):
+    payload = b"" if body is None else flask_app.json.dumps(body).encode("utf-8")
+    raw_headers = [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())]
+    raw_headers += [(k.lower().encode("latin1"), str(v).encode("latin1")) for k, v in headers]
+
+    await send({"type": "http.response.start", "status": status, "headers": raw_headers})
+    await send({"type": "http.response.body", "body": payload})
+
+async def _fetch_visible_issue(pool, issue_id: int, user_id: int, add_labels: bool = False):
+    """
+    Async counterpart of fetch_issue() + ensure_issue_visible().
+
+    Returns tuple (issue, error) where error is (status, body) or None
+    """
+    issue = await database.fetchone(pool, "SELECT * FROM issues WHERE issue_id = %s", (issue_id,))
+    if not issue:
+        return None, (404, {"error": "Issue not found"})
+
+    row = await database.fetchone(pool, PROJECT_VISIBILITY_SQL, (user_id, issue["project_id"]))
+    visible, err = visibility_status(project_visibility_from_row(row))
+    if not visible:
+        return None, (err, {"error": ISSUE_VISIBILITY_ERRORS[err]})
+
+    if add_labels:
+        label_rows = await database.fetchall(
+            pool,
+            """
+            SELECT il.issue_id, l.label_id, l.name
+            FROM issue_labels il JOIN labels l on l.label_id = il.label_id
+            WHERE il.issue_id = %s
+            ORDER BY l.name ASC
+            """,
+            (issue_id,)
+        )
+        group_labels_by_issue([issue], label_rows)
+
+    return issue, None
+
+
+##################################
+#          ASYNC ROUTES          #
+##################################
+# Each handler gets (pool, user_id, query params, path args) and returns
+# (status, body, headers); they mirror the Flask routes of the same number.
+
+# I3
+async def get_issue_details(pool, user_id, query, issue_id):
+    issue, error = await _fetch_visible_issue(pool, issue_id, user_id, add_labels=True)
+    if error:
+        return (*error, [])
+
+    return 200, {"issue": issue}, [("ETag", issue_etag(issue))]
+
+# C1
+async def list_issue_comments(pool, user_id, query, issue_id):
+    issue, error = await _fetch_visible_issue(pool, issue_id, user_id)
+    if error:
+        return (*error, [])
+
+    comments = await database.fetchall(
+        pool,
+        """
+        SELECT * FROM comments WHERE issue_id = %s
+        ORDER BY created_at ASC
+        """,
+        (issue_id,)
+    )
+    return 200, {"issue_id": issue_id, "comments": comments}, []
+
+# I7
+async def watch_issue(pool, user_id, query, issue_id):
+    """
+    Long-poll for changes to an issue (async mode only).
+
+    Query params:
+    - etag=<ETag>: the ETag of the issue the client has, or
+    - version=<n>: the version the client has (one of the two is required)
+    - timeout=<seconds>: how long to wait, capped at ASYNC_WATCH_TIMEOUT
+
+    Returns the issue as soon as its ETag differs from the client's (edits and new
+    comments both change it; with version=<n>, as soon as the version differs or the
+    issue changes after the request), or 304 (with the unchanged ETag) once the timeout
+    passes, so the client can simply ask again.
+    """
+    known_etag = query.get("etag", "").removeprefix("W/").strip('"')
+    known_version = None
+    if not known_etag:
+        try:
+            known_version = int(query.get("version", ""))
+        except ValueError:
+            return 400, {"error": "etag or an integer version query parameter is required"}, []
+
+    max_timeout = flask_app.config["ASYNC_WATCH_TIMEOUT"]
+    try:
+        timeout = min(float(query.get("timeout", max_timeout)), max_timeout)
+    except ValueError:
+        return 400, {"error": "timeout must be a number"}, []
+
+    issue, error = await _fetch_visible_issue(pool, issue_id, user_id)
+    if error:
+        return (*error, [])
+
+    if known_version is not None:
+        if issue["version"] != known_version:
+            return await get_issue_details(pool, user_id, query, issue_id)
+        known_etag = issue_etag(issue).strip('"')
+
+    deadline = time.monotonic() + timeout
+    while issue_etag(issue).strip('"') == known_etag:
+        if time.monotonic() >= deadline:
+            return 304, None, [("ETag", f'"{known_etag}"')]
+
+        await asyncio.sleep(flask_app.config["ASYNC_WATCH_POLL_INTERVAL"])
+        issue = await database.fetchone(
+            pool,
+            "SELECT version, comment_count, last_activity_at FROM issues WHERE issue_id = %s",
+            (issue_id,)
+        )
+        if issue is None:
+            return 404, {"error": "Issue not found"}, []
+
+    # Changed: return the full issue, re-checking visibility as it may have changed too
+    return await get_issue_details(pool, user_id, query, issue_id)
+
+
+ASYNC_ROUTES = [
+    (re.compile(r"^/issues/(\d+)$"), get_issue_details),
+    (re.compile(r"^/issues/(\d+)/comments$"), list_issue_comments),
+    (re.compile(r"^/issues/(\d+)/watch$"), watch_issue),
+]
+
+
+##################################
+#        ASGI APPLICATION        #
+##################################
+def _match_async_route(scope):
+    if scope["method"] != "GET":
+        return None, None
+    for pattern, handler in ASYNC_ROUTES:
+        match = pattern.match(scope["path"])
+        if match:
+            return handler, [int(arg) for arg in match.groups()]
+    return None, None
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            try:
+                await database.open()
+            except Exception as e:
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await database.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+
+    handler, args = _match_async_route(scope) if scope["type"] == "http" else (None, None)
+    if handler is None:
+        return await wsgi_app(scope, receive, send)
+
+    environ = _build_environ(scope)
+    user_id, use_primary, headers, error = await asyncio.to_thread(_authenticate, environ)
+    if error:
+        return await _send_json(send, *error, headers)
+
+    await database.open()
+
+    query = dict(flask_app.request_class(environ).args.items())
+    status, body, extra_headers = await handler(database.read_pool(use_primary), user_id, query, *args)
+    await _send_json(send, status, body, headers + extra_headers)
@@ -0,0 +1,77 @@
+import asyncio
+import itertools
+import aiomysql
+from db import parse_replica_hosts
+
+##################################
+#       ASYNC DATABASE POOLS     #
+##################################
+# Used by the async routes in asgi.py. aiomysql speaks the same protocol as PyMySQL
+# (and returns the same types), so rows look exactly like those the Flask routes get.
+
+
+class AsyncDatabase:
+    """
+    aiomysql pools for the primary and any read replicas (DB_REPLICA_HOSTS), sized by
+    ASYNC_DB_POOL_SIZE. A waiting coroutine holds no thread, so one process can keep
+    thousands of mostly-idle requests open on a pool of a few dozen connections.
+    """
+    def __init__(self, cfg):
+        self._cfg = cfg
+        self.primary = None
+        self.replicas = []
+        self._next_replica = None
+        self._open_lock = asyncio.Lock()
+
+    async def _create_pool(self, host, port):
+        cfg = self._cfg
+        return await aiomysql.create_pool(
+            host=host,
+            port=port,
+            user=cfg["DB_USER"],
+            password=cfg["DB_PASSWORD"],
+            db=cfg["DB_NAME"],
+            cursorclass=aiomysql.DictCursor,
+            autocommit=True,
+            minsize=0,
+            maxsize=cfg.get("ASYNC_DB_POOL_SIZE", 20),
+            pool_recycle=3600,
+        )
+
+    async def open(self):
+        """Creates the pools (once; servers without ASGI lifespan support open them on first use)"""
+        async with self._open_lock:
+            if self.primary is None:
+                await self._open()
+
+    async def _open(self):
+        cfg = self._cfg
+        self.primary = await self._create_pool(cfg["DB_HOST"], int(cfg["DB_PORT"]))
+        for host, port in parse_replica_hosts(cfg.get("DB_REPLICA_HOSTS"), int(cfg["DB_PORT"])):
+            self.replicas.append(await self._create_pool(host, port))
+        self._next_replica = itertools.cycle(self.replicas)
+
+    async def close(self):
+        for pool in [self.primary, *self.replicas]:
+            if pool is not None:
+                pool.close()
+                await pool.wait_closed()
+        self.primary, self.replicas = None, []
+
+    def read_pool(self, use_primary: bool = False):
+        """A replica (round robin) unless there are none or the session must see its own writes"""
+        if use_primary or not self.replicas:
+            return self.primary
+        return next(self._next_replica)
+
+    async def fetchone(self, pool, sql, params=()):
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchone()
+
+    async def fetchall(self, pool, sql, params=()):
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
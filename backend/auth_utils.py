@@ -1,6 +1,13 @@
 from functools import wraps
-from flask import session, jsonify
-from db import get_db
+import hmac
+import json
+import math
+from flask import session, jsonify, request, current_app
+from db import get_db, get_read_db, db_now, READ_ONLY_METHODS
+from issue_cache import get_issue_cache
+from label_loader import get_label_loader
+from rate_limit import check_rate_limit
+from load_shedding import Overloaded, get_load_shedder, overloaded_response, resolve_route_class
 from pymysql.connections import Connection
 from pymysql.cursors import DictCursor
 
@@ -11,19 +18,52 @@ def get_current_user_id():
     """Return the user_id of the currently logged in user, or None"""
     return session.get("user_id")
 
+def get_current_user():
+    """
+    Return the summary of the currently logged in user, or None.
+    
+    The summary is cached in the session at login (and refreshed on profile updates),
+    so this only reads the users table if the cache is missing.
+    """
+    user_id = get_current_user_id()
+    if not user_id:
+        return None
+    
+    cached = session.get("user")
+    if cached and cached.get("user_id") == user_id:
+        return cached
+    
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT user_id, email, username, first_name, last_name, created_at
+            FROM users
+            WHERE user_id = %s
+            """,
+            (user_id,)
+        )
+        user = cursor.fetchone()
+        
+    if user:
+        session["user"] = user
+    return user
+
 def get_project_role(project_id: int, user_id: int):
     """
     Retrieves user role in project.
     
     Returns "LEAD", "DEVELOPER", "VIEWER", or None in the case that the user is not a member
+    (or the project is being deleted)
     """
-    conn = get_db()
+    conn = get_read_db()
     
     with conn.cursor() as cursor:
         cursor.execute(
             """
-            SELECT role FROM project_memberships
-            WHERE project_id = %s AND user_id = %s
+            SELECT pm.role FROM project_memberships pm
+            JOIN projects p ON p.project_id = pm.project_id
+            WHERE pm.project_id = %s AND pm.user_id = %s AND p.deleting_at IS NULL
             """,
             (project_id, user_id)
         )
@@ -44,8 +84,53 @@ def can_modify_issue(issue, user_id, role) -> bool:
     
     return False
 
+# Shared with the async routes (asgi.py), which run the same queries on their own driver
+PROJECT_VISIBILITY_SQL = """
+    SELECT p.is_public, pm.role AS user_role
+    FROM projects p LEFT JOIN project_memberships pm ON p.project_id = pm.project_id
+        AND pm.user_id = %s
+    WHERE p.project_id = %s AND p.deleting_at IS NULL
+"""
+
+ISSUE_VISIBILITY_ERRORS = {
+    404: "Issue not found",
+    403: "Not authorized to view this issue",
+}
+
+def project_visibility_from_row(row):
+    """Builds the get_project_visibility() dict from a PROJECT_VISIBILITY_SQL row (or None)"""
+    if not row:
+        return {
+            "exists": False,
+            "is_public": False,
+            "user_role": None,
+            "visible": False
+        }
+        
+    is_public = bool(row["is_public"])
+    user_role = row["user_role"]
+    visible = is_public or (user_role is not None)
+    
+    return {
+        "exists": True,
+        "is_public": is_public,
+        "user_role": user_role,
+        "visible": visible
+    }
+
+def visibility_status(vis):
+    """Turns a visibility dict into the (visible, error_code) tuple of is_visible_to_user()"""
+    if not vis["exists"]:
+        return (False, 404)
+    elif not vis["visible"]:
+        return (False, 403)
+    else:
+        return (True, 0)
+
 def get_project_visibility(project_id, user_id):
     """
+    Projects that are being deleted are reported as not existing.
+    
     Returns a dict with:
     
     {
@@ -55,38 +140,11 @@ def get_project_visibility(project_id, user_id):
         "visible": bool
     }
     """
-    conn = get_db()
+    conn = get_read_db()
     
     with conn.cursor() as cursor:
-        cursor.execute(
-            """
-            SELECT p.is_public, pm.role AS user_role
-            FROM projects p LEFT JOIN project_memberships pm ON p.project_id = pm.project_id
-                AND pm.user_id = %s
-            WHERE p.project_id = %s
-            """,
-            (user_id, project_id)
-        )
-        row = cursor.fetchone()
-        
-        if not row:
-            return {
-                "exists": False,
-                "is_public": False,
-                "user_role": None,
-                "visible": False
-            }
-            
-        is_public = bool(row["is_public"])
-        user_role = row["user_role"]
-        visible = is_public or (user_role is not None)
-        
-        return {
-            "exists": True,
-            "is_public": is_public,
-            "user_role": user_role,
-            "visible": visible
-        }
+        cursor.execute(PROJECT_VISIBILITY_SQL, (user_id, project_id))
+        return project_visibility_from_row(cursor.fetchone())
     
     
 def is_visible_to_user(project_id: int, user_id: int):
@@ -98,65 +156,79 @@ def is_visible_to_user(project_id: int, user_id: int):
     int is the specific error associated with lack of visibility. integer is 0
     if bool is True.
     """
-    vis = get_project_visibility(project_id, user_id)
-    
-    if not vis["exists"]:
-        return (False, 404)
-    elif not vis["visible"]:
-        return (False, 403)
-    else:
-        return (True, 0)
+    return visibility_status(get_project_visibility(project_id, user_id))
     
 
 def attach_labels_to_issues(conn, issues):
     """
-    Returns a copy of a list of issue objects with attached label_id and label_name 
-    using a DictCursor connection object.
-    
-    If no issues are present, returns original issue with 'labels: []'
+    Attaches 'labels' (label_id and name, ordered by name) to each issue dict in a list,
+    in place, and returns the list. Goes through the request's LabelLoader, so labels
+    already loaded in this request aren't queried again, and the ones still needed are
+    fetched in one query together with every other issue id registered so far.
     """
-    
     if not issues:
         return issues
     
-    issue_ids = [i["issue_id"] for i in issues]
-    placeholders = ", ".join(["%s"] * len(issue_ids))
-    
-    with conn.cursor() as cursor:
-        cursor.execute(
-            f"""
-            SELECT il.issue_id, l.label_id, l.name
-            FROM issue_labels il JOIN labels l on l.label_id = il.label_id
-            WHERE il.issue_id IN ({placeholders})
-            ORDER BY l.name ASC
-            """,
-            issue_ids
-        )
-        label_rows = cursor.fetchall()
-        
-    labels_by_issue_id = {}
-    for row in label_rows:
-        iid = row["issue_id"]
-        labels_by_issue_id.setdefault(iid, []).append({
-            "label_id": row["label_id"],
-            "name": row["name"]
-        })
-        
+    return get_label_loader().attach(conn, issues)
+
+# Single-query alternative to attach_labels_to_issues() for issue lists: select
+# ISSUE_LABELS_COLUMN from `issues i` joined with ISSUE_LABELS_JOIN, then decode_issue_labels().
+# The lateral subquery reads each issue's labels off the issue_labels primary key and
+# builds them into a JSON array ordered by name (GROUP_CONCAT, as JSON_ARRAYAGG doesn't
+# guarantee an order), so it works unchanged under any filter or LIMIT on the issues.
+ISSUE_LABELS_HINT = "/*+ SET_VAR(group_concat_max_len = 1048576) */"
+ISSUE_LABELS_COLUMN = "issue_label_set.labels"
+ISSUE_LABELS_JOIN = """
+    JOIN LATERAL (
+        SELECT COALESCE(CONCAT('[', GROUP_CONCAT(
+            JSON_OBJECT('label_id', l.label_id, 'name', l.name) ORDER BY l.name ASC SEPARATOR ','
+        ), ']'), '[]') AS labels
+        FROM issue_labels il JOIN labels l ON l.label_id = il.label_id
+        WHERE il.issue_id = i.issue_id
+    ) issue_label_set
+"""
+
+def decode_issue_labels(issues):
+    """
+    Parses the JSON 'labels' column selected through ISSUE_LABELS_JOIN, in place, and
+    hands the labels to the request's LabelLoader for any later lookups
+    """
+    loader = get_label_loader()
     for issue in issues:
-        iid = issue["issue_id"]
-        issue["labels"] = labels_by_issue_id.get(iid, [])
-        
+        issue["labels"] = json.loads(issue["labels"])
+        loader.store(issue["issue_id"], issue["labels"])
     return issues
 
 def fetch_issue(issue_id: int, add_labels: bool = False):
     """
     Fetch a single issue by id.
     
+    Read-only requests go through the issue cache when one is configured. The cache
+    always holds the issue with its labels, and misses are filled from the primary so a
+    lagging replica can't put back a row that a write just invalidated.
+    
     Returns:   
         dict: issue row (with 'labels' optionally attached) if found
         None: if no such issue exists
     """
-    conn = get_db()
+    cache = get_issue_cache() if request.method in READ_ONLY_METHODS else None
+    if cache is None:
+        return _select_issue(get_read_db(), issue_id, add_labels)
+    
+    issue = cache.get(issue_id)
+    if issue is None:
+        issue = _select_issue(get_db(), issue_id, add_labels=True)
+        if issue is None:
+            return None
+        cache.set(issue_id, issue)
+    else:
+        get_label_loader().store(issue_id, issue["labels"])
+    
+    if not add_labels:
+        issue.pop("labels", None)
+    return issue
+
+def _select_issue(conn, issue_id: int, add_labels: bool):
     with conn.cursor() as cursor:
         cursor.execute(
             """
@@ -166,9 +238,14 @@ def fetch_issue(issue_id: int, add_labels: bool = False):
         )
         issue = cursor.fetchone()
         
-    if add_labels and issue is not None:
-        labeled_issue = attach_labels_to_issues(conn, [issue])
-        issue = labeled_issue[0] if labeled_issue else None
+    if issue is None:
+        return None
+    
+    # Registered either way, so a later label lookup in the request shares one query
+    loader = get_label_loader()
+    loader.prime([issue_id])
+    if add_labels:
+        loader.attach(conn, [issue])
         
     return issue
 
@@ -176,12 +253,7 @@ def ensure_issue_visible(issue, user_id: int):
     project_id = issue["project_id"]
     visible, err = is_visible_to_user(project_id, user_id)
     if not visible:
-        if err == 404:
-            return jsonify({"error": "Issue not found"}), 404
-        elif err == 403:
-            return jsonify({"error": "Not authorized to view this issue"}), 403
-        else:
-            return jsonify({"error": "Unable to verify project membership"}), 400
+        return jsonify({"error": ISSUE_VISIBILITY_ERRORS[err]}), err
         
     return None
 
@@ -189,7 +261,7 @@ def fetch_comment(comment_id: int):
     """
     Fetches a comment by id, or None if comment isn't found
     """
-    conn = get_db()
+    conn = get_read_db()
     with conn.cursor() as cursor:
         cursor.execute(
             """
@@ -199,6 +271,193 @@ def fetch_comment(comment_id: int):
         )
         return cursor.fetchone()
 
+def lock_project_row(cursor, project_id: int):
+    """
+    Reads and locks a project row (the fields the API exposes) ahead of an UPDATE in the
+    same transaction, so the response can be built from it plus the new values instead
+    of re-reading it after
+    """
+    cursor.execute(
+        """
+        SELECT project_id, project_key, name, description, is_public, created_by, created_at
+        FROM projects WHERE project_id = %s FOR UPDATE
+        """,
+        (project_id,)
+    )
+    return cursor.fetchone()
+
+def update_issue_fields(conn, issue, changes: dict, acting_user_id: int, expected=None):
+    """
+    Applies `changes` (column -> validated value) to an issue read earlier in the request.
+    Does not commit.
+    
+    The UPDATE compare-and-sets against the version that was read, so on success the new
+    row is `issue` plus `changes`, with comment_count and last_activity_at read back in the
+    same transaction (comments don't bump the version, and edits may move last_activity_at).
+    If the client sent no expected version and another edit got in first, the change is
+    applied anyway (last write wins, as before) and only that rare path reads the whole
+    row back.
+    
+    Returns tuple (updated_issue, None), or (None, current_version) when `expected` no
+    longer matches (current_version is None if the issue is gone)
+    """
+    now = db_now(conn)
+    assignments = ", ".join(f"{column} = %s" for column in changes) + ", updated_at = %s"
+    values = [*changes.values(), now, issue["issue_id"]]
+    
+    with conn.cursor() as cursor:
+        cursor.execute("SET @current_user_id := %s", (acting_user_id,))
+        cursor.execute(
+            f"UPDATE issues SET {assignments} WHERE issue_id = %s AND version = %s",
+            [*values, issue["version"]]
+        )
+        # trg_issues_version always changes the row, so 0 rows means the version moved on
+        if cursor.rowcount == 1:
+            # The row is locked by the UPDATE, so this sees any comment committed before it
+            cursor.execute(
+                "SELECT comment_count, last_activity_at FROM issues WHERE issue_id = %s",
+                (issue["issue_id"],)
+            )
+            activity = cursor.fetchone()
+            return {**issue, **changes, **activity, "updated_at": now, "version": issue["version"] + 1}, None
+        
+        cursor.execute("SELECT version FROM issues WHERE issue_id = %s FOR UPDATE", (issue["issue_id"],))
+        current = cursor.fetchone()
+        if current is None or expected is not None:
+            return None, current["version"] if current else None
+        
+        cursor.execute(f"UPDATE issues SET {assignments} WHERE issue_id = %s", values)
+        cursor.execute("SELECT * FROM issues WHERE issue_id = %s", (issue["issue_id"],))
+        return cursor.fetchone(), None
+
+def parse_id_list(value, name: str, max_items: int = None):
+    """
+    Validates a JSON array of integer ids, dropping duplicates (order kept).
+    
+    Returns tuple (ids, error_response)
+    """
+    if not isinstance(value, list):
+        return None, (jsonify({"error": f"{name} must be an array of integers"}), 400)
+    
+    try:
+        ids = list(dict.fromkeys(int(v) for v in value))
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": f"{name} must be an array of integers"}), 400)
+    
+    if max_items is not None and len(ids) > max_items:
+        return None, (jsonify({"error": f"{name} may contain at most {max_items} ids"}), 400)
+    
+    return ids, None
+
+def select_labeled_issue_ids(cursor, label_id: int):
+    """Returns the ids of every issue carrying a label (e.g. to invalidate them when it changes)"""
+    cursor.execute("SELECT issue_id FROM issue_labels WHERE label_id = %s", (label_id,))
+    return [row["issue_id"] for row in cursor.fetchall()]
+
+def version_etag(version: int) -> str:
+    """ETag header value for a row version"""
+    return f'"{version}"'
+
+def issue_etag(issue) -> str:
+    """
+    ETag header value for an issue: its version plus the comment bookkeeping, which
+    changes without a version bump (see trg_issues_version). If-Match still only
+    compares the version, the part before the first "-".
+    """
+    return f'"{issue["version"]}-{issue["comment_count"]}-{issue["last_activity_at"]:%Y%m%d%H%M%S}"'
+
+def expected_version(data=None):
+    """
+    Reads the version a client expects to be editing, from an If-Match header (an ETag
+    as returned by version_etag or issue_etag) or a "version" field in the request body.
+    
+    Returns tuple (version, error_response): version is None for an unconditional edit
+    (no header/field, or If-Match: *)
+    """
+    raw = request.headers.get("If-Match")
+    if raw is not None:
+        raw = raw.strip()
+        if raw == "*":
+            return None, None
+        raw = raw.removeprefix("W/").strip('"').partition("-")[0]
+    elif data:
+        raw = data.get("version")
+    
+    if raw is None:
+        return None, None
+    
+    try:
+        return int(raw), None
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "Version must be an integer"}), 400)
+
+def version_conflict(kind: str, current_version):
+    """Builds a 412 response for a compare-and-set edit that lost the race"""
+    response = jsonify({
+        "error": f"{kind} was modified by someone else",
+        "current_version": current_version
+    })
+    if current_version is not None:
+        response.headers["ETag"] = version_etag(current_version)
+    return response, 412
+
+def prefers_minimal() -> bool:
+    """True if the client sent Prefer: return=minimal (RFC 7240)"""
+    prefer = request.headers.get("Prefer", "")
+    return any(
+        token.split(";")[0].strip().lower() == "return=minimal"
+        for token in prefer.split(",")
+    )
+
+def write_response(body: dict, minimal_body: dict, status: int = 200, headers=None):
+    """
+    Response for a write route: the full representation by default, or just the
+    identifying fields in `minimal_body` when the client prefers return=minimal
+    """
+    headers = dict(headers or {})
+    if prefers_minimal():
+        headers["Preference-Applied"] = "return=minimal"
+        return jsonify(minimal_body), status, headers
+    return jsonify(body), status, headers
+
+def admin_token_valid() -> bool:
+    """Whether the request carries the configured ADMIN_TOKEN in X-Admin-Token"""
+    token = current_app.config.get("ADMIN_TOKEN")
+    return bool(token) and hmac.compare_digest(request.headers.get("X-Admin-Token", ""), token)
+
+def too_many_requests(error: str, retry_after: float):
+    """Builds a 429 response with a Retry-After header (whole seconds, at least 1)"""
+    response = jsonify({"error": error})
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+def run_with_api_limits(f, acting_user_id, args, kwargs):
+    """
+    Runs an authenticated view under the general API limits:
+        - per-user quota (RATE_LIMIT_USER)
+        - per-route, per-user quota (RATE_LIMIT_ROUTES, keyed by endpoint name)
+        - concurrency slot for the view's route class, with load shedding
+    
+    Returns a 429/503 response instead of calling the view when a limit is hit.
+    """
+    allowed, retry_after = check_rate_limit("user", str(acting_user_id))
+    if not allowed:
+        return too_many_requests("Request quota exceeded, please slow down", retry_after)
+    
+    # Quotas are keyed by view name, without the blueprint prefix ("show_project_issues")
+    view_name = (request.endpoint or "").rpartition(".")[2]
+    route_rate = current_app.config.get("ROUTE_RATE_LIMITS", {}).get(view_name)
+    if route_rate:
+        allowed, retry_after = check_rate_limit("route", f"{view_name}:{acting_user_id}", rate=route_rate)
+        if not allowed:
+            return too_many_requests("Request quota for this endpoint exceeded, please slow down", retry_after)
+    
+    try:
+        with get_load_shedder().slot(resolve_route_class(f)):
+            return f(*args, **kwargs)
+    except Overloaded as e:
+        return overloaded_response(e)
+
 ##################################
 #            WRAPPERS            #
 ##################################
@@ -210,11 +469,58 @@ def login_required(f):
         if not user_id:
             return jsonify({"error": "Authentication required, please log in"}), 401
         
-        return f(*args, **kwargs)
+        return run_with_api_limits(f, user_id, args, kwargs)
     
     return wrapper 
 
 
+def admin_token_required(f):
+    """
+    Decorator for operator-only endpoints (metrics, diagnostics). The request must send
+    the ADMIN_TOKEN config value in an X-Admin-Token header; if no token is configured
+    the endpoint doesn't exist (404).
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get("ADMIN_TOKEN"):
+            return jsonify({"error": "Not found"}), 404
+        
+        if not admin_token_valid():
+            return jsonify({"error": "Invalid admin token"}), 403
+        
+        return f(*args, **kwargs)
+    
+    return wrapper
+
+
+def rate_limited(limit_name, key_func, error="Too many requests, please try again later"):
+    """Early exit wrapper that rejects requests once the token bucket for this limit is empty.
+    Stack it above login_required (or on its own for public routes such as /auth/login) so
+    that excess requests are refused before any lookups or password checks happen.
+    
+    The rate itself comes from the RATE_LIMIT_<LIMIT_NAME> config value, e.g. 
+    RATE_LIMIT_LOGIN_IP = "20/60" for 20 attempts per minute.
+
+    Args:
+        limit_name (String): name of the limit, e.g. 'login_ip'
+        key_func (Callable): returns the bucket key for the current request, or None to skip
+        error (String): error message returned with the 429
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = key_func()
+            if key is not None:
+                allowed, retry_after = check_rate_limit(limit_name, key)
+                if not allowed:
+                    return too_many_requests(error, retry_after)
+            
+            return f(*args, **kwargs)
+        
+        return wrapper
+    return decorator
+
+
 def require_project_role(allowed_roles):
     """Early exit wrapper for role-restricted endpoints. If checks pass, execution
     continues as normal. 
@@ -241,7 +547,7 @@ def require_project_role(allowed_roles):
             if role not in allowed_roles:
                 return jsonify({"error": "Insufficient role permissions"}), 403
             
-            return f(project_id, *args, **kwargs)
+            return run_with_api_limits(f, user_id, (project_id, *args), kwargs)
         
         return wrapper
     return decorator
\ No newline at end of file
@@ -0,0 +1,82 @@
+"""
+Compares the two ways of loading an issue list with its labels, against the database
+configured in .env:
+
+    python bench_issue_labels.py --project-id 3 --runs 20
+
+- two-query: the issues, then every label of those issues with an IN (...) list of ids,
+  grouped in Python (attach_labels_to_issues)
+- single-query: one query with labels aggregated per issue in SQL (ISSUE_LABELS_JOIN),
+  as GET /projects/<id>/issues does
+
+Both results are checked to be identical. Pick a large project; the difference grows
+with the number of issues.
+"""
+import argparse
+import statistics
+import time
+from config import Config
+from db import connect
+from auth_utils import (attach_labels_to_issues, decode_issue_labels, ISSUE_LABELS_HINT,
+                        ISSUE_LABELS_COLUMN, ISSUE_LABELS_JOIN)
+
+ISSUE_COLUMNS = """i.issue_number, i.issue_id, i.title, i.description, i.type, i.status, i.priority,
+    i.reporter_id, i.assignee_id, i.due_date, i.created_at, i.updated_at"""
+
+
+def two_queries(conn, project_id):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT {ISSUE_COLUMNS} FROM issues i WHERE i.project_id = %s ORDER BY i.issue_number ASC",
+            (project_id,)
+        )
+        issues = cursor.fetchall()
+    return attach_labels_to_issues(conn, issues)
+
+def single_query(conn, project_id):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT {ISSUE_LABELS_HINT} {ISSUE_COLUMNS}, {ISSUE_LABELS_COLUMN}
+            FROM issues i {ISSUE_LABELS_JOIN}
+            WHERE i.project_id = %s
+            ORDER BY i.issue_number ASC
+            """,
+            (project_id,)
+        )
+        return decode_issue_labels(cursor.fetchall())
+
+def time_runs(fn, conn, project_id, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn(conn, project_id)
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark issue list label loading")
+    parser.add_argument("--project-id", type=int, required=True)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    cfg = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    conn = connect(cfg)
+    try:
+        expected = two_queries(conn, args.project_id)
+        if single_query(conn, args.project_id) != expected:
+            raise SystemExit("The two approaches returned different results")
+
+        label_links = sum(len(issue["labels"]) for issue in expected)
+        print(f"Project {args.project_id}: {len(expected)} issues, {label_links} issue labels, {args.runs} runs\n")
+
+        for name, fn in (("two-query", two_queries), ("single-query", single_query)):
+            timings = time_runs(fn, conn, args.project_id, args.runs)
+            print(f"{name:<14} median {statistics.median(timings):8.2f} ms   "
+                  f"min {min(timings):8.2f} ms   max {max(timings):8.2f} ms")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
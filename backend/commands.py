@@ -0,0 +1,130 @@
+import click
+from db import get_db
+from jobs import enqueue_job
+from history_archive import archive_history, rotate_archive_partitions
+from project_deletion import pending_deletions
+from due_scanner import scan_due_issues
+from issue_activity import repair_issue_activity
+from issue_cache import shared_issue_cache
+from project_stats import rebuild_project_stats
+
+
+def register_commands(app):
+    """
+    Registers maintenance commands on the Flask CLI, e.g.
+
+        flask --app app rebuild-stats --project-id 3
+    """
+
+    @app.cli.command("rebuild-stats")
+    @click.option("--project-id", type=int, default=None, help="Only rebuild this project (default: all)")
+    @click.option("--background", is_flag=True, help="Enqueue as a background job instead of running now")
+    def rebuild_stats(project_id, background):
+        """Recompute per-project issue counts and statistics from the issues table"""
+        conn = get_db()
+        target = f"project {project_id}" if project_id is not None else "all projects"
+
+        if background:
+            job_id = enqueue_job(
+                conn, "rebuild_stats", {"project_id": project_id},
+                unique_key=f"rebuild_stats:{project_id if project_id is not None else 'all'}"
+            )
+            conn.commit()
+            click.echo(f"Enqueued statistics rebuild for {target} as job {job_id}")
+            return
+
+        rebuild_project_stats(conn, project_id)
+        click.echo(f"Rebuilt issue statistics for {target}")
+
+    @app.cli.command("resume-deletions")
+    def resume_deletions():
+        """Re-enqueue project deletions that haven't finished (e.g. after their job failed for good)"""
+        conn = get_db()
+        project_ids = pending_deletions(conn)
+        for project_id in project_ids:
+            job_id = enqueue_job(
+                conn, "delete_project", {"project_id": project_id},
+                unique_key=f"delete_project:{project_id}"
+            )
+            click.echo(f"Project {project_id}: job {job_id}")
+        conn.commit()
+
+        click.echo(f"Resumed {len(project_ids)} deletion(s)")
+
+    @app.cli.command("archive-history")
+    @click.option("--older-than-days", type=int, default=None, help="Default: HISTORY_HOT_DAYS")
+    @click.option("--background", is_flag=True, help="Enqueue as a background job instead of running now")
+    def archive_history_command(older_than_days, background):
+        """Move old issue_history rows into the partitioned archive table"""
+        conn = get_db()
+        if older_than_days is None:
+            older_than_days = app.config["HISTORY_HOT_DAYS"]
+
+        if background:
+            job_id = enqueue_job(
+                conn, "archive_history", {"older_than_days": older_than_days},
+                unique_key="archive_history"
+            )
+            conn.commit()
+            click.echo(f"Enqueued history archiving as job {job_id}")
+            return
+
+        # Make sure the months being archived into have their own partitions first
+        rotate_archive_partitions(conn, older_than_days, months_ahead=app.config["HISTORY_PARTITIONS_AHEAD"])
+        archived = archive_history(
+            conn, older_than_days, batch_size=app.config["HISTORY_ARCHIVE_BATCH_SIZE"],
+            on_progress=lambda total: click.echo(f"  {total} row(s) archived...")
+        )
+        click.echo(f"Archived {archived} history row(s) older than {older_than_days} day(s)")
+
+    @app.cli.command("rotate-history-partitions")
+    @click.option("--months-ahead", type=int, default=None, help="Default: HISTORY_PARTITIONS_AHEAD")
+    @click.option("--retention-days", type=int, default=None, help="Default: HISTORY_RETENTION_DAYS (0 keeps everything)")
+    def rotate_history_partitions(months_ahead, retention_days):
+        """Add upcoming monthly partitions to the history archive and drop expired ones"""
+        rotated = rotate_archive_partitions(
+            get_db(),
+            app.config["HISTORY_HOT_DAYS"],
+            months_ahead=app.config["HISTORY_PARTITIONS_AHEAD"] if months_ahead is None else months_ahead,
+            retention_days=app.config["HISTORY_RETENTION_DAYS"] if retention_days is None else retention_days
+        )
+        click.echo(f"Added partitions: {', '.join(rotated['added']) or 'none'}")
+        click.echo(f"Dropped partitions: {', '.join(rotated['dropped']) or 'none'}")
+
+    @app.cli.command("scan-due-dates")
+    @click.option("--at-risk-days", type=int, default=None, help="Default: DUE_SCAN_AT_RISK_DAYS")
+    @click.option("--background", is_flag=True, help="Enqueue as a background job instead of running now")
+    def scan_due_dates(at_risk_days, background):
+        """Record overdue and at-risk open issues for the per-project due date endpoints"""
+        conn = get_db()
+        if at_risk_days is None:
+            at_risk_days = app.config["DUE_SCAN_AT_RISK_DAYS"]
+
+        if background:
+            job_id = enqueue_job(
+                conn, "scan_due_dates", {"at_risk_days": at_risk_days},
+                unique_key="scan_due_dates"
+            )
+            conn.commit()
+            click.echo(f"Enqueued due date scan as job {job_id}")
+            return
+
+        result = scan_due_issues(
+            conn, at_risk_days, batch_size=app.config["DUE_SCAN_BATCH_SIZE"],
+            on_progress=lambda total: click.echo(f"  {total} issue(s) scanned...")
+        )
+        click.echo(f"{result['overdue']} overdue and {result['at_risk']} at-risk issue(s) "
+                   f"across {result['projects']} project(s)")
+
+    @app.cli.command("repair-issue-activity")
+    @click.option("--project-id", type=int, default=None, help="Only repair this project (default: all)")
+    def repair_issue_activity_command(project_id):
+        """Recompute issue comment counts and last activity times (also the backfill for new columns)"""
+        cache = shared_issue_cache(app.config)
+        result = repair_issue_activity(
+            get_db(), project_id, batch_size=app.config["ISSUE_ACTIVITY_REPAIR_BATCH_SIZE"],
+            on_progress=lambda checked, repaired: click.echo(f"  {checked} issue(s) checked, {repaired} repaired..."),
+            on_batch=cache.delete_many if cache is not None else None
+        )
+        target = f"project {project_id}" if project_id is not None else "all projects"
+        click.echo(f"Repaired {result['issues_repaired']} of {result['issues_checked']} issue(s) in {target}")
@@ -18,4 +18,99 @@ class Config:
     DB_NAME = os.environ.get("DB_NAME", "itms")
     DB_USER = os.environ.get("DB_USER", "root")
     DB_PASSWORD = os.environ.get("DB_PASSWORD", "")
-    FRONTEND_ORIGIN = os.environ.get("FRONTEND_ORIGIN", "http://localhost:5173") # Default for Vite dev
\ No newline at end of file
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 0))      # Per process, 0 opens a connection per request (gunicorn.conf.py defaults to 10)
+    DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 5))
+    
+    # Read replicas: "host[:port],host[:port]" (same credentials as the primary), empty to disable
+    DB_REPLICA_HOSTS = os.environ.get("DB_REPLICA_HOSTS", "")
+    REPLICA_LAG_SECONDS = float(os.environ.get("REPLICA_LAG_SECONDS", 5))   # reads stay on the primary this long after a session writes
+    
+    FRONTEND_ORIGIN = os.environ.get("FRONTEND_ORIGIN", "http://localhost:5173") # Default for Vite dev
+    
+    # Token bucket rate limiting. Rates are "<requests>/<seconds>"
+    RATE_LIMIT_ENABLED = bool(int(os.environ.get("RATE_LIMIT_ENABLED", "1")))
+    RATE_LIMIT_BACKEND = os.environ.get("RATE_LIMIT_BACKEND", "memory")    # memory (single node) | database (multi-node)
+    RATE_LIMIT_LOGIN_IP = os.environ.get("RATE_LIMIT_LOGIN_IP", "20/60")
+    RATE_LIMIT_LOGIN_IDENTIFIER = os.environ.get("RATE_LIMIT_LOGIN_IDENTIFIER", "5/60")
+    
+    # General API quotas, applied per user by login_required/require_project_role
+    RATE_LIMIT_USER = os.environ.get("RATE_LIMIT_USER", "600/60")
+    RATE_LIMIT_ROUTES = os.environ.get("RATE_LIMIT_ROUTES", "")     # "endpoint=rate,...", e.g. "show_project_issues=120/60"
+    
+    # Concurrency limits per route class (per process, 0 = unlimited) and load shedding
+    CONCURRENCY_LIMIT_READ = int(os.environ.get("CONCURRENCY_LIMIT_READ", 0))
+    CONCURRENCY_LIMIT_WRITE = int(os.environ.get("CONCURRENCY_LIMIT_WRITE", 0))
+    CONCURRENCY_LIMIT_EXPORT = int(os.environ.get("CONCURRENCY_LIMIT_EXPORT", 0))
+    CONCURRENCY_WAIT_TIMEOUT = float(os.environ.get("CONCURRENCY_WAIT_TIMEOUT", 2))
+    LOAD_SHED_QUEUE_DEPTH = int(os.environ.get("LOAD_SHED_QUEUE_DEPTH", 0))     # 0 disables
+    LOAD_SHED_POOL_WAIT_MS = float(os.environ.get("LOAD_SHED_POOL_WAIT_MS", 0))  # 0 disables
+    LOAD_SHED_RETRY_AFTER = int(os.environ.get("LOAD_SHED_RETRY_AFTER", 5))
+    
+    # Server-side sessions
+    SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "memory")   # memory (single node) | database (multi-node) | cookie
+    SESSION_TTL = int(os.environ.get("SESSION_TTL", 7 * 24 * 3600))  # seconds, sliding
+    SESSION_PURGE_INTERVAL = int(os.environ.get("SESSION_PURGE_INTERVAL", 60))
+    SESSION_PURGE_BATCH = int(os.environ.get("SESSION_PURGE_BATCH", 1000))
+    SESSION_MAX_ENTRIES = int(os.environ.get("SESSION_MAX_ENTRIES", 100000))    # memory backend only
+    
+    # Rows removed per DELETE statement when purging a project in the background
+    PROJECT_DELETE_BATCH_SIZE = int(os.environ.get("PROJECT_DELETE_BATCH_SIZE", 500))
+    
+    # Issues updated per transaction when unassigning/reassigning a removed member's issues
+    MEMBER_REASSIGN_BATCH_SIZE = int(os.environ.get("MEMBER_REASSIGN_BATCH_SIZE", 500))
+    
+    # Issues checked per transaction by `flask repair-issue-activity`
+    ISSUE_ACTIVITY_REPAIR_BATCH_SIZE = int(os.environ.get("ISSUE_ACTIVITY_REPAIR_BATCH_SIZE", 1000))
+    
+    # Bulk label endpoints: max ids per array, and max issue x label links added per request
+    LABEL_BULK_MAX_ITEMS = int(os.environ.get("LABEL_BULK_MAX_ITEMS", 500))
+    LABEL_BULK_MAX_LINKS = int(os.environ.get("LABEL_BULK_MAX_LINKS", 10000))
+    
+    # Issue history archiving (see history_archive.py)
+    HISTORY_HOT_DAYS = int(os.environ.get("HISTORY_HOT_DAYS", 180))                    # older changes move to issue_history_archive
+    HISTORY_ARCHIVE_BATCH_SIZE = int(os.environ.get("HISTORY_ARCHIVE_BATCH_SIZE", 1000))
+    HISTORY_PARTITIONS_AHEAD = int(os.environ.get("HISTORY_PARTITIONS_AHEAD", 3))      # monthly archive partitions created in advance
+    HISTORY_RETENTION_DAYS = int(os.environ.get("HISTORY_RETENTION_DAYS", 0))          # drop archived months older than this, 0 = keep forever
+    
+    # Due date scanning (see due_scanner.py)
+    DUE_SCAN_AT_RISK_DAYS = int(os.environ.get("DUE_SCAN_AT_RISK_DAYS", 3))   # open issues due within this many days are "at risk"
+    DUE_SCAN_BATCH_SIZE = int(os.environ.get("DUE_SCAN_BATCH_SIZE", 1000))
+    DUE_SCAN_INTERVAL = int(os.environ.get("DUE_SCAN_INTERVAL", 900))         # seconds between scheduled scans, 0 = only on demand
+    
+    # Background jobs (see worker.py)
+    JOB_WORKER_CONCURRENCY = int(os.environ.get("JOB_WORKER_CONCURRENCY", 2))
+    JOB_INLINE_WORKERS = int(os.environ.get("JOB_INLINE_WORKERS", 1))  # Worker threads inside `python app.py`, 0 in production
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 2))
+    JOB_LOCK_TIMEOUT = int(os.environ.get("JOB_LOCK_TIMEOUT", 600))    # seconds without heartbeat before a job is requeued
+    JOB_RETRY_BACKOFF = int(os.environ.get("JOB_RETRY_BACKOFF", 10))
+    JOB_RETRY_BACKOFF_MAX = int(os.environ.get("JOB_RETRY_BACKOFF_MAX", 3600))
+    
+    # Issue cache (see issue_cache.py)
+    ISSUE_CACHE_BACKEND = os.environ.get("ISSUE_CACHE_BACKEND", "")     # "" (off) | memory (per process) | redis (shared) | module:factory
+    ISSUE_CACHE_MAX_ENTRIES = int(os.environ.get("ISSUE_CACHE_MAX_ENTRIES", 10000))
+    ISSUE_CACHE_MAX_BYTES = int(os.environ.get("ISSUE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    ISSUE_CACHE_TTL = float(os.environ.get("ISSUE_CACHE_TTL", 30))      # seconds, bounds staleness across processes
+    ISSUE_CACHE_REDIS_URL = os.environ.get("ISSUE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    
+    # Token for operator endpoints such as /metrics/cache (sent as X-Admin-Token); unset disables them
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+    
+    # Async serving mode (asgi.py)
+    ASYNC_DB_POOL_SIZE = int(os.environ.get("ASYNC_DB_POOL_SIZE", 20))                # aiomysql connections per process (per host)
+    ASYNC_WATCH_TIMEOUT = float(os.environ.get("ASYNC_WATCH_TIMEOUT", 25))            # max seconds a /issues/<id>/watch long-poll waits
+    ASYNC_WATCH_POLL_INTERVAL = float(os.environ.get("ASYNC_WATCH_POLL_INTERVAL", 1))
+    
+    # Log how long each phase of create_app() takes (see startup_profile.py)
+    STARTUP_PROFILE = bool(int(os.environ.get("STARTUP_PROFILE", 0)))
+    
+    # Route groups served by this process (see routes/__init__.py), e.g. "issues,labels,comments"
+    # for a dedicated pool; empty serves them all. API_READ_ONLY rejects every non-GET request.
+    API_BLUEPRINTS = os.environ.get("API_BLUEPRINTS", "")
+    API_READ_ONLY = bool(int(os.environ.get("API_READ_ONLY", 0)))
+    
+    # Per-request profiling (see profiling.py). Admins can also profile one request with
+    # "X-Profile: sampling|cprofile" plus X-Admin-Token.
+    PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", 0))          # fraction of requests sampled, 0 disables
+    PROFILE_SAMPLE_INTERVAL_MS = float(os.environ.get("PROFILE_SAMPLE_INTERVAL_MS", 2))
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(BASE_DIR, "profiles"))
+    PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", 200))               # oldest profiles are deleted beyond this
@@ -1,28 +1,274 @@
+import itertools
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
 import pymysql
 from pymysql.cursors import DictCursor
-from flask import current_app, g
+from flask import current_app, g, request, session
+
+logger = logging.getLogger("itms.db")
+
+# Methods whose requests may be served from a read replica
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class PoolTimeout(Exception):
+    """Raised when no pooled connection becomes available within DB_POOL_TIMEOUT"""
+
+
+class ConnectionPool:
+    """
+    Bounded pool of PyMySQL connections shared by the request threads of one process.
+
+    Also keeps a moving average of how long callers wait for a connection, which the
+    load shedder uses as its "database is saturated" signal. The average also decays
+    with time, so once requests stop waiting (or stop arriving, e.g. because they are
+    being shed) it falls back towards zero on its own.
+    """
+    # Weight given to the newest sample in the moving average
+    WAIT_SMOOTHING = 0.2
+    # Seconds for the average to halve when no new samples arrive
+    WAIT_HALF_LIFE = 1.0
+
+    def __init__(self, connect, size: int, timeout: float):
+        self._connect = connect
+        self._timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self.size = size
+        self._avg_wait = 0.0
+        self._sampled_at = time.monotonic()
+
+    def _decayed_wait(self, now: float) -> float:
+        return self._avg_wait * 0.5 ** ((now - self._sampled_at) / self.WAIT_HALF_LIFE)
+
+    @property
+    def avg_wait(self) -> float:
+        """Moving average of the wait for a connection (seconds), decayed to now"""
+        with self._lock:
+            return self._decayed_wait(time.monotonic())
+
+    def _record_wait(self, seconds: float):
+        with self._lock:
+            now = time.monotonic()
+            avg = self._decayed_wait(now)
+            self._avg_wait = avg + self.WAIT_SMOOTHING * (seconds - avg)
+            self._sampled_at = now
+
+    def acquire(self):
+        start = time.monotonic()
+        acquired = self._slots.acquire(timeout=self._timeout)
+        self._record_wait(time.monotonic() - start)
+
+        if not acquired:
+            raise PoolTimeout(f"No database connection available after {self._timeout}s")
+
+        try:
+            try:
+                conn = self._idle.get_nowait()
+                conn.ping(reconnect=True)
+            except queue.Empty:
+                conn = self._connect()
+        except Exception:
+            self._slots.release()
+            raise
+
+        return conn
+
+    def release(self, conn):
+        """Returns a connection to the pool, discarding it if it can't be cleaned up"""
+        try:
+            # Never hand out a connection mid-transaction or with another user's trigger context
+            conn.rollback()
+            with conn.cursor() as cursor:
+                cursor.execute("SET @current_user_id := NULL, @issue_bookkeeping := NULL")
+            self._idle.put(conn)
+        except Exception:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def connect(cfg, host=None, port=None):
+    """
+    Opens a new DB connection from a config mapping (app.config or similar).
+    `host`/`port` override DB_HOST/DB_PORT, e.g. to connect to a replica.
+    """
+    return pymysql.connect(
+        host = host or cfg["DB_HOST"],
+        port = port or cfg["DB_PORT"],
+        user = cfg["DB_USER"],
+        password = cfg["DB_PASSWORD"],
+        database = cfg["DB_NAME"],
+        cursorclass = DictCursor,
+        autocommit = False
+    )
+
+def parse_replica_hosts(value: str, default_port: int):
+    """Parses DB_REPLICA_HOSTS ("host[:port],host[:port]") into [(host, port)]"""
+    replicas = []
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        host, _, port = entry.partition(":")
+        replicas.append((host, int(port) if port else default_port))
+    return replicas
+
+
+class ReplicaSet:
+    """
+    Read replicas, picked round robin per request. Each replica gets its own pool when
+    pooling is enabled, otherwise a fresh connection is opened per request.
+    """
+    def __init__(self, cfg, replicas, pool_size: int, pool_timeout: float):
+        self.replicas = []
+        for host, port in replicas:
+            opener = (lambda host=host, port=port: connect(cfg, host=host, port=port))
+            pool = ConnectionPool(opener, pool_size, pool_timeout) if pool_size > 0 else None
+            self.replicas.append((opener, pool))
+        self._next = itertools.cycle(range(len(self.replicas)))
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Returns (conn, pool) from the next replica; pool is None for unpooled connections"""
+        with self._lock:
+            index = next(self._next)
+        opener, pool = self.replicas[index]
+        return (pool.acquire(), pool) if pool is not None else (opener(), None)
+
+    def close_all(self):
+        for _, pool in self.replicas:
+            if pool is not None:
+                pool.close_all()
+
+
+def init_db(app):
+    """
+    Registers connection teardown and, when DB_POOL_SIZE > 0, a per-process connection pool.
+    With DB_POOL_SIZE = 0 every request opens and closes its own connection.
+
+    When DB_REPLICA_HOSTS is set, routes that read through get_read_db() are served
+    from the replicas (see get_read_db for when the primary is used instead).
+    """
+    app.teardown_appcontext(close_db)
+    _create_pools(app)
+
+    if app.extensions.get("itms_db_replicas") is not None:
+        app.after_request(_stick_to_primary_after_write)
+
+def _create_pools(app):
+    cfg = app.config
+    size = app.config.get("DB_POOL_SIZE", 0)
+    timeout = app.config.get("DB_POOL_TIMEOUT", 5)
+    app.extensions["itms_db_pool"] = ConnectionPool(lambda: connect(cfg), size, timeout) if size > 0 else None
+
+    replicas = parse_replica_hosts(app.config.get("DB_REPLICA_HOSTS", ""), app.config["DB_PORT"])
+    app.extensions["itms_db_replicas"] = ReplicaSet(cfg, replicas, size, timeout) if replicas else None
+
+def reinit_db_pools(app):
+    """
+    Replaces the app's connection pools with empty ones. Call in each worker process
+    after a pre-forking server forks from a preloaded app: connections (and locks)
+    inherited from the parent must never be shared between processes. The inherited
+    connections are dropped without a COM_QUIT, which would also end them for the parent.
+    """
+    _create_pools(app)
+
+def get_pool():
+    """Returns the app's connection pool, or None if pooling is disabled"""
+    return current_app.extensions.get("itms_db_pool")
+
+def get_replicas():
+    """Returns the app's ReplicaSet, or None if no replicas are configured"""
+    return current_app.extensions.get("itms_db_replicas")
 
 def get_db():
     """
     Gets a per-request DB connection and stores it in Flask global
-    Opens a new connection on first use, per request
+    Opens a new connection (or checks one out of the pool) on first use, per request
     """
-    
+
     if "db" not in g:
-        cfg = current_app.config
-        g.db = pymysql.connect(
-            host = cfg["DB_HOST"],
-            port = cfg["DB_PORT"],
-            user = cfg["DB_USER"],
-            password = cfg["DB_PASSWORD"],
-            database = cfg["DB_NAME"],
-            cursorclass = DictCursor,
-            autocommit = False
-        )
+        pool = get_pool()
+        g.db = pool.acquire() if pool is not None else connect(current_app.config)
     return g.db
 
+def db_now(conn) -> datetime:
+    """
+    The database's CURRENT_TIMESTAMP (DATETIME, whole seconds), read on `conn`. Writes
+    that set timestamps from this can echo the row back without reading it again, and
+    stay consistent with the defaults and triggers, whatever the API host's clock says.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT CURRENT_TIMESTAMP AS now")
+        return cursor.fetchone()["now"]
+
+def get_read_db():
+    """
+    Gets a per-request connection for reads that may lag slightly behind the primary.
+
+    Returns a replica connection unless:
+    - no replicas are configured
+    - the request isn't read-only (writes and the reads they depend on stay on the primary)
+    - the session wrote something within the last REPLICA_LAG_SECONDS (read-your-writes)
+    - the replica can't be reached
+    """
+    if "read_db" in g:
+        return g.read_db
+
+    replicas = get_replicas()
+    if (replicas is None or request.method not in READ_ONLY_METHODS
+            or session.get("primary_until", 0) > time.time() or g.get("replica_unavailable")):
+        return get_db()
+
+    try:
+        g.read_db, g.read_db_pool = replicas.acquire()
+    except Exception:
+        # Only tried (and logged) once per request
+        g.replica_unavailable = True
+        logger.warning("Read replica unavailable, reading from the primary", exc_info=True)
+        return get_db()
+    return g.read_db
+
+def _stick_to_primary_after_write(response):
+    """After a successful write, keep this session's reads on the primary for REPLICA_LAG_SECONDS"""
+    if (request.method not in READ_ONLY_METHODS and response.status_code < 400
+            and session.get("user_id") is not None):
+        session["primary_until"] = time.time() + current_app.config.get("REPLICA_LAG_SECONDS", 5)
+    return response
+
 def close_db(e=None):
-    """Close the DB connection at request teardown"""
+    """Close the DB connections (or return them to their pools) at request teardown"""
     db = g.pop("db", None)
     if db is not None:
-        db.close()
\ No newline at end of file
+        pool = get_pool()
+        if pool is not None:
+            pool.release(db)
+        else:
+            db.close()
+
+    read_db = g.pop("read_db", None)
+    read_pool = g.pop("read_db_pool", None)
+    if read_db is not None:
+        if read_pool is not None:
+            read_pool.release(read_db)
+        else:
+            read_db.close()
@@ -0,0 +1,175 @@
+import logging
+import time
+from db import connect
+from jobs import enqueue_job
+
+logger = logging.getLogger("itms.jobs")
+
+##################################
+#        DUE DATE SCANNING       #
+##################################
+# Dashboards read overdue/at-risk issues from issue_due_alerts and project_due_counts
+# instead of scanning issues on every view. A scan walks the open issues due on or
+# before today + DUE_SCAN_AT_RISK_DAYS along idx_issues_due (status, due_date), a
+# batch at a time, and records each one it sees; alerts the scan didn't see again
+# (resolved, rescheduled, no longer due) are dropped at the end.
+OPEN_STATUSES = ("OPEN", "IN_PROGRESS")
+DUE_STATES = ("OVERDUE", "AT_RISK")
+
+
+def scan_due_issues(conn, at_risk_days: int, batch_size: int = 1000, on_progress=None) -> dict:
+    """
+    Rebuilds issue_due_alerts and project_due_counts from the open issues' due dates.
+
+    Every date is judged against the database's CURRENT_DATE as of the start of the
+    scan, so a scan running past midnight stays consistent. Each batch is committed on
+    its own; readers see the previous results (plus the batches written so far) until
+    the scan finishes.
+
+    `on_progress(issues_scanned_total)` is called after each committed batch.
+    Returns {"scanned_at", "overdue", "at_risk", "projects"}
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT NOW(6) AS scanned_at, CURRENT_DATE AS today, CURRENT_DATE + INTERVAL %s DAY AS horizon",
+            (at_risk_days,)
+        )
+        scan = cursor.fetchone()
+    conn.commit()
+
+    total = 0
+    for status in OPEN_STATUSES:
+        after = None  # (due_date, issue_id) of the last issue of the previous batch
+        while True:
+            rows = _next_batch(conn, status, scan["horizon"], after, batch_size)
+            if not rows:
+                break
+
+            with conn.cursor() as cursor:
+                cursor.executemany(
+                    """
+                    INSERT INTO issue_due_alerts (issue_id, project_id, state, due_date, scanned_at)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON DUPLICATE KEY UPDATE project_id = VALUES(project_id), state = VALUES(state),
+                        due_date = VALUES(due_date), scanned_at = VALUES(scanned_at)
+                    """,
+                    [
+                        (row["issue_id"], row["project_id"],
+                         "OVERDUE" if row["due_date"] < scan["today"] else "AT_RISK",
+                         row["due_date"], scan["scanned_at"])
+                        for row in rows
+                    ]
+                )
+            conn.commit()
+
+            total += len(rows)
+            if on_progress is not None:
+                on_progress(total)
+            if len(rows) < batch_size:
+                break
+            after = (rows[-1]["due_date"], rows[-1]["issue_id"])
+
+    _delete_stale(conn, "issue_due_alerts", scan["scanned_at"], batch_size)
+    counts = _rebuild_project_counts(conn, scan["scanned_at"])
+    _delete_stale(conn, "project_due_counts", scan["scanned_at"], batch_size)
+
+    return {"scanned_at": scan["scanned_at"], **counts}
+
+def _next_batch(conn, status: str, horizon, after, batch_size: int):
+    """The next `batch_size` issues in `status` due on or before `horizon`, after the keyset `after`"""
+    keyset = ""
+    params = [status, horizon]
+    if after is not None:
+        keyset = " AND (due_date > %s OR (due_date = %s AND issue_id > %s))"
+        params += [after[0], after[0], after[1]]
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT issue_id, project_id, due_date
+            FROM issues FORCE INDEX (idx_issues_due)
+            WHERE status = %s AND due_date <= %s{keyset}
+            ORDER BY due_date ASC, issue_id ASC
+            LIMIT %s
+            """,
+            [*params, batch_size]
+        )
+        rows = cursor.fetchall()
+    conn.commit()
+    return rows
+
+def _delete_stale(conn, table: str, scanned_at, batch_size: int):
+    """Deletes the rows of `table` written by earlier scans, a batch per transaction"""
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE scanned_at < %s LIMIT %s", (scanned_at, batch_size))
+            deleted = cursor.rowcount
+        conn.commit()
+        if deleted < batch_size:
+            break
+
+def _rebuild_project_counts(conn, scanned_at) -> dict:
+    """Writes this scan's per-project totals into project_due_counts, returns the overall totals"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO project_due_counts (project_id, overdue_count, at_risk_count, scanned_at)
+            SELECT project_id, SUM(state = 'OVERDUE'), SUM(state = 'AT_RISK'), %s
+            FROM issue_due_alerts
+            WHERE scanned_at = %s
+            GROUP BY project_id
+            ON DUPLICATE KEY UPDATE overdue_count = VALUES(overdue_count),
+                at_risk_count = VALUES(at_risk_count), scanned_at = VALUES(scanned_at)
+            """,
+            (scanned_at, scanned_at)
+        )
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS projects, COALESCE(SUM(overdue_count), 0) AS overdue,
+                COALESCE(SUM(at_risk_count), 0) AS at_risk
+            FROM project_due_counts
+            WHERE scanned_at = %s
+            """,
+            (scanned_at,)
+        )
+        totals = cursor.fetchone()
+    conn.commit()
+    return {"overdue": int(totals["overdue"]), "at_risk": int(totals["at_risk"]), "projects": totals["projects"]}
+
+def schedule_due_scan(conn, interval: int, at=None):
+    """
+    Enqueues the scan_due_dates job for the next multiple of `interval` seconds. Does not commit.
+
+    The job is keyed by that time slot, so however many callers schedule it (each run
+    schedules its successor, workers schedule one on startup) a slot only ever gets one
+    scan. Returns the job_id, or None if scheduled scans are disabled (interval <= 0).
+    """
+    if interval <= 0:
+        return None
+
+    now = time.time() if at is None else at
+    slot = int(now // interval) + 1
+    return enqueue_job(
+        conn, "scan_due_dates", {},
+        unique_key=f"scan_due_dates:{slot}",
+        delay_seconds=max(0, int(slot * interval - now))
+    )
+
+def ensure_due_scan_scheduled(cfg):
+    """
+    Makes sure a scheduled scan is queued, so the scan_due_dates chain survives a queue
+    reset or a run that failed for good. Called when workers start; never raises.
+    """
+    interval = cfg.get("DUE_SCAN_INTERVAL", 0)
+    if interval <= 0:
+        return
+
+    try:
+        conn = connect(cfg)
+        try:
+            schedule_due_scan(conn, interval)
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception:
+        logger.warning("Could not schedule the due date scan", exc_info=True)
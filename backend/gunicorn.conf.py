@@ -0,0 +1,61 @@
+"""
+Gunicorn settings for the API (`gunicorn -c gunicorn.conf.py wsgi:app`).
+
+Every value can be overridden through the environment (or the .env file); see
+"Production Deployment" in the README for how to size workers against the DB pool.
+"""
+import multiprocessing
+import os
+
+# Production defaults, applied before config.py reads the environment
+os.environ.setdefault("FLASK_DEBUG", "0")
+os.environ.setdefault("FLASK_ENV", "production")
+os.environ.setdefault("JOB_INLINE_WORKERS", "0")
+os.environ.setdefault("DB_POOL_SIZE", "10")
+# Several processes must share sessions and login rate limit buckets (see the check below)
+os.environ.setdefault("SESSION_BACKEND", "database")
+os.environ.setdefault("RATE_LIMIT_BACKEND", "database")
+
+from config import Config  # noqa: E402 - must see the defaults above
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+# Processes x threads. Requests mostly wait on MySQL, so a few processes with several
+# threads each go further than many single-threaded processes. Threads beyond
+# DB_POOL_SIZE would only queue for a connection, so they default to the pool size.
+workers = int(os.environ.get("GUNICORN_WORKERS", min(multiprocessing.cpu_count() * 2, 8)))
+threads = int(os.environ.get("GUNICORN_THREADS", Config.DB_POOL_SIZE or 4))
+worker_class = "gthread"
+
+# With the memory backends each process would keep its own sessions (a login made in one
+# worker is unknown to the others: random 401s) and its own login buckets (multiplying
+# the brute-force allowance by the worker count)
+if workers > 1:
+    memory_backends = [key for key in ("SESSION_BACKEND", "RATE_LIMIT_BACKEND") if getattr(Config, key) == "memory"]
+    if memory_backends:
+        raise RuntimeError(
+            f"{' and '.join(memory_backends)}=memory can't be shared by {workers} worker processes; "
+            "use the database backend or GUNICORN_WORKERS=1"
+        )
+
+# Import the app once in the master so workers share its memory copy-on-write
+preload_app = True
+
+# Recycle workers after a number of requests (jittered so they don't all restart at once)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.environ.get("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.environ.get("GUNICORN_KEEPALIVE", 5))
+
+accesslog = os.environ.get("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    """Each worker opens its own DB connections instead of inheriting the master's"""
+    from wsgi import app
+    from db import reinit_db_pools
+
+    reinit_db_pools(app)
@@ -0,0 +1,134 @@
+from datetime import date
+
+##################################
+#        HISTORY ARCHIVING       #
+##################################
+# issue_history only keeps recent ("hot") changes. Older rows are moved, a batch at
+# a time, into issue_history_archive, which is range partitioned by month on changed_at
+# so old months can be dropped as whole partitions instead of deleted row by row.
+ARCHIVE_TABLE = "issue_history_archive"
+HISTORY_COLUMNS = "change_id, issue_id, changed_by, field_name, old_value, new_value, changed_at"
+
+
+def archive_history(conn, older_than_days: int, batch_size: int = 1000, on_progress=None) -> int:
+    """
+    Moves issue_history rows older than `older_than_days` into the archive table.
+
+    Each batch is copied and deleted in one short transaction, so rows are never lost
+    or visible twice, and re-running after an interruption just carries on.
+
+    `on_progress(rows_archived_total)` is called after each committed batch.
+    Returns the number of rows archived.
+    """
+    total = 0
+
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT change_id FROM issue_history
+                WHERE changed_at < CURRENT_TIMESTAMP - INTERVAL %s DAY
+                ORDER BY changed_at ASC, change_id ASC
+                LIMIT %s
+                FOR UPDATE
+                """,
+                (older_than_days, batch_size)
+            )
+            change_ids = [row["change_id"] for row in cursor.fetchall()]
+
+            if not change_ids:
+                conn.commit()
+                break
+
+            placeholders = ", ".join(["%s"] * len(change_ids))
+            cursor.execute(
+                f"""
+                INSERT IGNORE INTO {ARCHIVE_TABLE} ({HISTORY_COLUMNS})
+                SELECT {HISTORY_COLUMNS} FROM issue_history
+                WHERE change_id IN ({placeholders})
+                """,
+                change_ids
+            )
+            cursor.execute(
+                f"DELETE FROM issue_history WHERE change_id IN ({placeholders})",
+                change_ids
+            )
+            moved = cursor.rowcount
+        conn.commit()
+
+        total += moved
+        if on_progress is not None:
+            on_progress(total)
+        if len(change_ids) < batch_size:
+            break
+
+    return total
+
+def _month_start(d: date, offset: int = 0) -> date:
+    month = d.month - 1 + offset
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+def archive_partitions(conn):
+    """Returns [(partition_name, upper_bound)] for the archive table, oldest first"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT PARTITION_NAME AS name, PARTITION_DESCRIPTION AS bound
+            FROM information_schema.PARTITIONS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+            ORDER BY PARTITION_ORDINAL_POSITION ASC
+            """,
+            (ARCHIVE_TABLE,)
+        )
+        # Bounds come back quoted, e.g. "'2025-01-01'"; keep just the date part
+        return [(row["name"], row["bound"].strip("'")[:10]) for row in cursor.fetchall()]
+
+def rotate_archive_partitions(conn, hot_days: int, months_ahead: int = 3, retention_days: int = 0,
+                              today: date = None):
+    """
+    Keeps one partition per month on the archive table.
+
+    Splits monthly partitions off the catch-all `pmax` partition, from the month that
+    rows older than `hot_days` are being archived into up to `months_ahead` months past
+    the current one, and, when `retention_days` > 0, drops monthly partitions whose rows
+    are all older than that. DDL commits implicitly.
+
+    Returns dict {"added": [...], "dropped": [...]}
+    """
+    today = today or date.today()
+    first_month = _month_start(date.fromordinal(today.toordinal() - hot_days))
+    months_back = (today.year - first_month.year) * 12 + today.month - first_month.month
+
+    partitions = archive_partitions(conn)
+    bounds = {bound for _, bound in partitions if bound != "MAXVALUE"}
+    added, dropped = [], []
+
+    with conn.cursor() as cursor:
+        for offset in range(-months_back, months_ahead + 1):
+            start = _month_start(today, offset)
+            upper = _month_start(today, offset + 1)
+            if upper.isoformat() in bounds or any(b > upper.isoformat() for b in bounds):
+                continue
+
+            name = f"p{start:%Y%m}"
+            cursor.execute(
+                f"""
+                ALTER TABLE {ARCHIVE_TABLE} REORGANIZE PARTITION pmax INTO (
+                    PARTITION {name} VALUES LESS THAN ('{upper.isoformat()}'),
+                    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+                )
+                """
+            )
+            bounds.add(upper.isoformat())
+            added.append(name)
+
+        if retention_days > 0:
+            cutoff = date.fromordinal(today.toordinal() - retention_days).isoformat()
+            for name, bound in partitions:
+                # Never drop the initial catch-all partitions, only whole expired months
+                if name in ("p_initial", "pmax") or bound > cutoff:
+                    continue
+                cursor.execute(f"ALTER TABLE {ARCHIVE_TABLE} DROP PARTITION {name}")
+                dropped.append(name)
+
+    return {"added": added, "dropped": dropped}
@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+
+##################################
+#         ISSUE ACTIVITY         #
+##################################
+# issues.comment_count and issues.last_activity_at let issue lists show and sort by
+# activity without joining comments and issue_history per issue. The comment routes
+# keep them current in the same transaction as the comment itself, trg_issues_version
+# moves last_activity_at on history-tracked edits, and repair_issue_activity()
+# recomputes both from scratch (`flask repair-issue-activity`).
+#
+# Updates made here run with @issue_bookkeeping set and set updated_at to itself, so
+# the row's "last edited" time and version (see trg_issues_version) only reflect edits
+# of the issue proper.
+
+# Latest of the issue's creation, comments and history (hot and archived), for `issues i`
+LAST_ACTIVITY_SQL = """GREATEST(
+    i.created_at,
+    IFNULL((SELECT MAX(c.created_at) FROM comments c WHERE c.issue_id = i.issue_id), i.created_at),
+    IFNULL((SELECT MAX(h.changed_at) FROM issue_history h WHERE h.issue_id = i.issue_id), i.created_at),
+    IFNULL((SELECT MAX(ha.changed_at) FROM issue_history_archive ha WHERE ha.issue_id = i.issue_id), i.created_at)
+)"""
+
+
+@contextmanager
+def _bookkeeping(cursor):
+    """Marks the issue UPDATEs run in the block as bookkeeping for trg_issues_version"""
+    cursor.execute("SET @issue_bookkeeping := 1")
+    try:
+        yield
+    finally:
+        cursor.execute("SET @issue_bookkeeping := NULL")
+
+def record_comment_added(cursor, issue_id: int, at) -> bool:
+    """
+    Counts a new comment on the issue. Run before inserting the comment, in the same
+    transaction: locking the issue row first keeps the lock order the same as
+    repair_issue_activity(). Returns False if the issue no longer exists.
+    """
+    with _bookkeeping(cursor):
+        cursor.execute(
+            """
+            UPDATE issues
+            SET comment_count = comment_count + 1, last_activity_at = GREATEST(last_activity_at, %s),
+                updated_at = updated_at
+            WHERE issue_id = %s
+            """,
+            (at, issue_id)
+        )
+    return cursor.rowcount == 1
+
+def record_comment_removed(cursor, issue_id: int):
+    """
+    Uncounts a deleted comment, in the same transaction as the DELETE and after it, with
+    the issue row locked (SELECT ... FOR UPDATE) before the DELETE to keep the lock order
+    of record_comment_added(). last_activity_at is recomputed, as the comment may have
+    been the latest activity.
+    """
+    with _bookkeeping(cursor):
+        cursor.execute(
+            f"""
+            UPDATE issues i
+            SET i.comment_count = GREATEST(i.comment_count, 1) - 1, i.last_activity_at = {LAST_ACTIVITY_SQL},
+                i.updated_at = i.updated_at
+            WHERE i.issue_id = %s
+            """,
+            (issue_id,)
+        )
+
+def repair_issue_activity(conn, project_id: int = None, batch_size: int = 1000, on_progress=None,
+                          on_batch=None) -> dict:
+    """
+    Recomputes comment_count and last_activity_at of every issue (or only those of
+    `project_id`), rewriting the ones that drifted. Also serves as the backfill after
+    the columns were added.
+
+    Each batch locks its issue rows before counting, so comments posted or deleted
+    meanwhile wait for the batch's commit and then apply on top of the repaired values.
+
+    `on_progress(issues_checked_total, issues_repaired_total)` and `on_batch(issue_ids)`
+    (repaired issues only, e.g. to invalidate cached issues) are called after each
+    committed batch.
+    Returns dict {"issues_checked": <int>, "issues_repaired": <int>}
+    """
+    checked = 0
+    repaired = 0
+    last_issue_id = 0
+
+    while True:
+        project_filter = ""
+        params = [last_issue_id]
+        if project_id is not None:
+            project_filter = " AND project_id = %s"
+            params.append(project_id)
+
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT issue_id FROM issues
+                WHERE issue_id > %s{project_filter}
+                ORDER BY issue_id
+                LIMIT %s
+                FOR UPDATE
+                """,
+                [*params, batch_size]
+            )
+            issue_ids = [row["issue_id"] for row in cursor.fetchall()]
+
+            drifted = []
+            if issue_ids:
+                placeholders = ", ".join(["%s"] * len(issue_ids))
+                cursor.execute(
+                    f"""
+                    SELECT i.issue_id, i.comment_count, i.last_activity_at,
+                        (SELECT COUNT(*) FROM comments c WHERE c.issue_id = i.issue_id) AS actual_comment_count,
+                        {LAST_ACTIVITY_SQL} AS actual_last_activity_at
+                    FROM issues i
+                    WHERE i.issue_id IN ({placeholders})
+                    """,
+                    issue_ids
+                )
+                drifted = [
+                    row for row in cursor.fetchall()
+                    if (row["comment_count"], row["last_activity_at"])
+                    != (row["actual_comment_count"], row["actual_last_activity_at"])
+                ]
+
+            if drifted:
+                with _bookkeeping(cursor):
+                    cursor.executemany(
+                        """
+                        UPDATE issues
+                        SET comment_count = %s, last_activity_at = %s, updated_at = updated_at
+                        WHERE issue_id = %s
+                        """,
+                        [(row["actual_comment_count"], row["actual_last_activity_at"], row["issue_id"]) for row in drifted]
+                    )
+        conn.commit()
+
+        checked += len(issue_ids)
+        repaired += len(drifted)
+        if on_batch is not None and drifted:
+            on_batch([row["issue_id"] for row in drifted])
+        if on_progress is not None:
+            on_progress(checked, repaired)
+        if len(issue_ids) < batch_size:
+            break
+        last_issue_id = issue_ids[-1]
+
+    return {"issues_checked": checked, "issues_repaired": repaired}
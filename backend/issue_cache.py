@@ -0,0 +1,218 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from flask.json.tag import TaggedJSONSerializer
+from label_loader import get_label_loader
+
+# Shared by every backend (Flask's session serializer): a cached issue renders to exactly
+# the same JSON as one fresh from PyMySQL, and the byte bound counts what a remote
+# backend would store. Entries are stored serialized, so callers always get a copy.
+_serializer = TaggedJSONSerializer()
+
+
+class CacheStats:
+    """Hit/miss counters kept per process, whichever backend holds the data"""
+    def __init__(self):
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, field: str, n: int = 1):
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + n)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations,
+        }
+
+
+##################################
+#       ISSUE CACHE BACKENDS     #
+##################################
+class MemoryIssueCache(CacheStats):
+    """
+    Process-local LRU cache, bounded by entry count and by the total serialized size
+    of its values. Entries also expire after `ttl` seconds, which bounds how stale
+    other processes' writes can leave this one (invalidation is only process-local).
+    """
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, ttl: float = 30,
+                 clock=time.monotonic):
+        super().__init__()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()   # key -> (payload, size, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= self._clock():
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return _serializer.loads(entry[0])
+
+    def set(self, key, value):
+        payload = _serializer.dumps(value)
+        size = len(payload)
+        if size > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (payload, size, self._clock() + self._ttl)
+            self._bytes += size
+
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def delete_many(self, keys):
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+        self._count("invalidations", len(keys))
+
+    def stats(self) -> dict:
+        with self._lock:
+            usage = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self._max_entries,
+                "max_bytes": self._max_bytes,
+                "evictions": self.evictions,
+            }
+        return {**super().stats(), **usage}
+
+
+class RedisIssueCache(CacheStats):
+    """
+    Cache shared by every API process through Redis, so an invalidation is seen by all
+    of them. Needs the optional `redis` package (pip install redis).
+    """
+    def __init__(self, url: str, ttl: float = 30, prefix: str = "itms:issue:"):
+        super().__init__()
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("ISSUE_CACHE_BACKEND 'redis' requires the redis package (pip install redis)")
+
+        self._client = redis.Redis.from_url(url)
+        self._ttl = max(1, int(ttl))
+        self._prefix = prefix
+
+    def get(self, key):
+        payload = self._client.get(f"{self._prefix}{key}")
+        if payload is None:
+            self._count("misses")
+            return None
+        self._count("hits")
+        return _serializer.loads(payload.decode("utf-8"))
+
+    def set(self, key, value):
+        self._client.setex(f"{self._prefix}{key}", self._ttl, _serializer.dumps(value))
+
+    def delete_many(self, keys):
+        keys = [f"{self._prefix}{key}" for key in keys]
+        if keys:
+            self._client.delete(*keys)
+        self._count("invalidations", len(keys))
+
+
+def _memory_cache(cfg):
+    return MemoryIssueCache(
+        max_entries=cfg.get("ISSUE_CACHE_MAX_ENTRIES", 10_000),
+        max_bytes=cfg.get("ISSUE_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        ttl=cfg.get("ISSUE_CACHE_TTL", 30),
+    )
+
+def _redis_cache(cfg):
+    return RedisIssueCache(cfg.get("ISSUE_CACHE_REDIS_URL", "redis://localhost:6379/0"),
+                           ttl=cfg.get("ISSUE_CACHE_TTL", 30))
+
+ISSUE_CACHE_BACKENDS = {
+    "memory": _memory_cache,
+    "redis": _redis_cache,
+}
+
+
+##################################
+#        HELPER FUNCTIONS        #
+##################################
+def build_issue_cache(cfg):
+    """
+    Builds the backend named by ISSUE_CACHE_BACKEND: empty (disabled, returns None),
+    'memory', 'redis', or a dotted path "package.module:factory" to a callable taking
+    the config mapping and returning an object with get/set/delete_many/stats.
+    """
+    name = (cfg.get("ISSUE_CACHE_BACKEND") or "").strip()
+    if not name:
+        return None
+    if name in ISSUE_CACHE_BACKENDS:
+        return ISSUE_CACHE_BACKENDS[name](cfg)
+
+    module_name, _, attr = name.replace(":", ".").rpartition(".")
+    if not module_name:
+        raise RuntimeError(f"Unknown ISSUE_CACHE_BACKEND '{name}'")
+    return getattr(importlib.import_module(module_name), attr)(cfg)
+
+def init_issue_cache(app, backend=None):
+    """Attaches the configured issue cache (or `backend`) to the app, if any"""
+    backend = backend if backend is not None else build_issue_cache(app.config)
+    app.extensions["itms_issue_cache"] = backend
+    return backend
+
+def get_issue_cache():
+    return current_app.extensions.get("itms_issue_cache")
+
+def invalidate_issues(issue_ids):
+    """
+    Drops cached issues after they (or their labels) changed, from the issue cache and
+    from the request's label loader. Call after commit.
+    """
+    issue_ids = list(issue_ids)
+    get_label_loader().clear(issue_ids)
+    cache = get_issue_cache()
+    if cache is not None:
+        cache.delete_many(issue_ids)
+
+_worker_cache = None
+
+def shared_issue_cache(cfg):
+    """
+    The issue cache for code running outside a request, e.g. job handlers. Only shared
+    backends are returned: a worker's own memory cache is never read by the API, so its
+    changes there are left to expire (ISSUE_CACHE_TTL) instead.
+    """
+    global _worker_cache
+    if (cfg.get("ISSUE_CACHE_BACKEND") or "memory") == "memory":
+        return None
+    if _worker_cache is None:
+        _worker_cache = build_issue_cache(cfg)
+    return _worker_cache
@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from db import connect
+
+logger = logging.getLogger("itms.jobs")
+
+# kind -> handler(ctx, payload)
+JOB_HANDLERS = {}
+
+
+def job_handler(kind: str):
+    """
+    Registers a function as the handler for a job kind. Handlers are called as
+    handler(ctx, payload) with a JobContext and the decoded payload, and may return a
+    JSON-serializable result. Raising marks the attempt as failed (and retried).
+    """
+    def decorator(f):
+        JOB_HANDLERS[kind] = f
+        return f
+    return decorator
+
+
+##################################
+#            QUEUEING            #
+##################################
+def enqueue_job(conn, kind: str, payload: dict, created_by=None, unique_key=None,
+                max_attempts: int = 5, delay_seconds: int = 0):
+    """
+    Adds a job to the queue using the caller's connection and transaction, so a job can
+    be enqueued atomically with the rows it refers to. Does not commit.
+
+    If `unique_key` is given and a job with that key is still queued or running, no new
+    job is created and the existing job_id is returned instead.
+
+    Returns the job_id
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO jobs (kind, payload, unique_key, max_attempts, created_by, run_after)
+            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP + INTERVAL %s SECOND)
+            ON DUPLICATE KEY UPDATE job_id = LAST_INSERT_ID(job_id)
+            """,
+            (kind, json.dumps(payload), unique_key, max_attempts, created_by, delay_seconds)
+        )
+        return cursor.lastrowid
+
+def fetch_job(conn, job_id: int):
+    """Returns a job row with payload/progress/result decoded, or None"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT job_id, kind, payload, status, attempts, max_attempts, run_after, progress,
+                result, last_error, created_by, created_at, updated_at, finished_at
+            FROM jobs WHERE job_id = %s
+            """,
+            (job_id,)
+        )
+        return _decode(cursor.fetchone())
+
+def _decode(job):
+    if job is not None:
+        for field in ("payload", "progress", "result"):
+            if isinstance(job.get(field), str):
+                job[field] = json.loads(job[field])
+    return job
+
+
+##################################
+#          JOB EXECUTION         #
+##################################
+class JobContext:
+    """
+    Passed to job handlers.
+
+    `conn` is a connection dedicated to the handler's work. Progress is written through
+    a separate bookkeeping connection so it can be committed independently of the
+    handler's own transactions, and doubles as a heartbeat for long-running jobs.
+    """
+    def __init__(self, worker, job, conn):
+        self._worker = worker
+        self.job_id = job["job_id"]
+        self.attempt = job["attempts"]
+        self.config = worker.cfg
+        self.conn = conn
+
+    def progress(self, **data):
+        self._worker.record_progress(self.job_id, data)
+
+
+class JobWorker:
+    """
+    Claims and runs jobs from the `jobs` table.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number of worker
+    threads and processes can share the queue without double-running a job. Failed
+    attempts are retried with exponential backoff until max_attempts is reached, and
+    jobs whose worker disappeared (no heartbeat for JOB_LOCK_TIMEOUT seconds) are
+    put back on the queue.
+    """
+    def __init__(self, cfg, name: str = None, kinds=None):
+        self.cfg = cfg
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+        self.kinds = set(kinds) if kinds else None
+        self.poll_interval = cfg.get("JOB_POLL_INTERVAL", 2)
+        self.lock_timeout = cfg.get("JOB_LOCK_TIMEOUT", 600)
+        self.backoff_base = cfg.get("JOB_RETRY_BACKOFF", 10)
+        self.backoff_max = cfg.get("JOB_RETRY_BACKOFF_MAX", 3600)
+        self._conn = None
+
+    @property
+    def conn(self):
+        """Bookkeeping connection, (re)opened on demand"""
+        if self._conn is None:
+            self._conn = connect(self.cfg)
+        return self._conn
+
+    def _reset_conn(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+        self._conn = None
+
+    def requeue_stale(self) -> int:
+        """
+        Puts RUNNING jobs whose worker stopped heartbeating back on the queue, or marks
+        them FAILED if that was their last attempt (a job that keeps killing or hanging
+        its worker must not be retried forever)
+        """
+        conn = self.conn
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE jobs
+                SET last_error = CONCAT('Worker ', IFNULL(locked_by, '?'), ' stopped responding on the last attempt'),
+                    status = 'FAILED', unique_key = NULL, locked_by = NULL, locked_at = NULL,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE status = 'RUNNING' AND locked_at < CURRENT_TIMESTAMP - INTERVAL %s SECOND
+                    AND attempts >= max_attempts
+                """,
+                (self.lock_timeout,)
+            )
+            cursor.execute(
+                """
+                UPDATE jobs
+                -- last_error first: assignments apply left to right
+                SET last_error = CONCAT('Worker ', IFNULL(locked_by, '?'), ' stopped responding'),
+                    status = 'QUEUED', locked_by = NULL, locked_at = NULL
+                WHERE status = 'RUNNING' AND locked_at < CURRENT_TIMESTAMP - INTERVAL %s SECOND
+                """,
+                (self.lock_timeout,)
+            )
+            requeued = cursor.rowcount
+        conn.commit()
+        return requeued
+
+    def claim(self):
+        """Claims the next runnable job, or returns None if the queue is empty"""
+        conn = self.conn
+        kind_filter = ""
+        params = []
+        if self.kinds:
+            kind_filter = " AND kind IN (" + ", ".join(["%s"] * len(self.kinds)) + ")"
+            params = sorted(self.kinds)
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT job_id, kind, payload, attempts, max_attempts
+                    FROM jobs
+                    WHERE status = 'QUEUED' AND run_after <= CURRENT_TIMESTAMP{kind_filter}
+                    ORDER BY run_after ASC, job_id ASC
+                    LIMIT 1
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    params
+                )
+                job = cursor.fetchone()
+                if job is None:
+                    conn.commit()
+                    return None
+
+                cursor.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'RUNNING', attempts = attempts + 1, locked_by = %s,
+                        locked_at = CURRENT_TIMESTAMP
+                    WHERE job_id = %s
+                    """,
+                    (self.name, job["job_id"])
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        job["attempts"] += 1
+        return _decode(job)
+
+    def record_progress(self, job_id: int, data: dict):
+        conn = self.conn
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE jobs SET progress = %s, locked_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s AND locked_by = %s
+                """,
+                (json.dumps(data, default=str), job_id, self.name)
+            )
+        conn.commit()
+
+    def _finish(self, job, result):
+        conn = self.conn
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE jobs
+                SET status = 'SUCCEEDED', result = %s, unique_key = NULL, locked_by = NULL,
+                    locked_at = NULL, last_error = NULL, finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = %s
+                """,
+                (json.dumps(result, default=str), job["job_id"])
+            )
+        conn.commit()
+
+    def _fail(self, job, error: Exception):
+        conn = self.conn
+        message = f"{type(error).__name__}: {error}"
+
+        with conn.cursor() as cursor:
+            if job["attempts"] < job["max_attempts"]:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (job["attempts"] - 1))
+                cursor.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'QUEUED', last_error = %s, locked_by = NULL, locked_at = NULL,
+                        run_after = CURRENT_TIMESTAMP + INTERVAL %s SECOND
+                    WHERE job_id = %s
+                    """,
+                    (message, delay, job["job_id"])
+                )
+            else:
+                cursor.execute(
+                    """
+                    UPDATE jobs
+                    SET status = 'FAILED', last_error = %s, unique_key = NULL, locked_by = NULL,
+                        locked_at = NULL, finished_at = CURRENT_TIMESTAMP
+                    WHERE job_id = %s
+                    """,
+                    (message, job["job_id"])
+                )
+        conn.commit()
+
+    def run_job(self, job):
+        handler = JOB_HANDLERS.get(job["kind"])
+        work_conn = connect(self.cfg)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{job['kind']}'")
+
+            result = handler(JobContext(self, job, work_conn), job["payload"])
+            work_conn.commit()
+        except Exception as e:
+            try:
+                work_conn.rollback()
+            except Exception:
+                pass
+            logger.exception("Job %s (%s) failed on attempt %s", job["job_id"], job["kind"], job["attempts"])
+            self._fail(job, e)
+            return False
+        finally:
+            work_conn.close()
+
+        self._finish(job, result)
+        return True
+
+    def run(self, stop_event: threading.Event = None, burst: bool = False):
+        """
+        Processes jobs until stop_event is set. With burst=True, returns as soon as the
+        queue has no runnable jobs instead of polling.
+        """
+        stop_event = stop_event or threading.Event()
+        next_reap = 0.0
+
+        while not stop_event.is_set():
+            try:
+                if time.monotonic() >= next_reap:
+                    self.requeue_stale()
+                    next_reap = time.monotonic() + self.lock_timeout / 4
+
+                job = self.claim()
+            except Exception:
+                logger.exception("Worker %s lost its database connection, retrying", self.name)
+                self._reset_conn()
+                stop_event.wait(self.poll_interval)
+                continue
+
+            if job is None:
+                if burst:
+                    break
+                stop_event.wait(self.poll_interval)
+                continue
+
+            try:
+                self.run_job(job)
+            except Exception:
+                # Recording the outcome failed; the job stays RUNNING until requeue_stale()
+                # picks it up once its heartbeat times out
+                logger.exception("Worker %s could not record the outcome of job %s, retrying",
+                                 self.name, job["job_id"])
+                self._reset_conn()
+                stop_event.wait(self.poll_interval)
+
+        self._reset_conn()
+
+
+def start_workers(cfg, concurrency: int, kinds=None, stop_event: threading.Event = None, burst: bool = False):
+    """Starts `concurrency` worker threads sharing one stop_event. Returns (threads, stop_event)"""
+    stop_event = stop_event or threading.Event()
+    threads = []
+
+    for i in range(concurrency):
+        worker = JobWorker(cfg, name=f"{socket.gethostname()}:{os.getpid()}:{i}", kinds=kinds)
+        thread = threading.Thread(
+            target=worker.run,
+            kwargs={"stop_event": stop_event, "burst": burst},
+            name=f"job-worker-{i}",
+            daemon=True
+        )
+        thread.start()
+        threads.append(thread)
+
+    return threads, stop_event
@@ -0,0 +1,108 @@
+import unicodedata
+from flask import g, has_request_context
+
+##################################
+#          LABEL LOADING         #
+##################################
+# Every endpoint that returns issues with their labels goes through the request's
+# LabelLoader. Issue ids are registered with it as soon as they are read (fetch_issue,
+# bulk updates), and the first lookup that needs labels resolves every registered id
+# in one query. Labels aggregated into an issue list query are stored with it too, so
+# each issue's labels are read at most once per request; label changes clear them.
+
+
+def group_labels_by_issue(issues, label_rows):
+    """Sets 'labels' on each issue from (issue_id, label_id, name) rows ordered by name"""
+    labels_by_issue_id = {}
+    for row in label_rows:
+        iid = row["issue_id"]
+        labels_by_issue_id.setdefault(iid, []).append({
+            "label_id": row["label_id"],
+            "name": row["name"]
+        })
+
+    for issue in issues:
+        iid = issue["issue_id"]
+        issue["labels"] = labels_by_issue_id.get(iid, [])
+
+    return issues
+
+def label_sort_key(label) -> str:
+    """
+    Sort key matching ORDER BY l.name under the labels table's utf8mb4_0900_ai_ci
+    collation (case- and accent-insensitive), for labels ordered in Python
+    """
+    decomposed = unicodedata.normalize("NFKD", label["name"])
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+class LabelLoader:
+    """
+    Batched, memoized label lookups by issue_id.
+
+    prime() only registers ids; the next load_many()/attach() fetches every pending id,
+    plus any unknown ids it was asked for, in a single query. Results are handed out as
+    copies, so callers may modify them freely.
+    """
+    def __init__(self):
+        self._labels = {}       # issue_id -> [{"label_id", "name"}], ordered by name
+        self._pending = set()   # ids registered by prime(), not fetched yet
+
+    def prime(self, issue_ids):
+        """Registers ids whose labels may be needed later in the request"""
+        self._pending.update(iid for iid in issue_ids if iid not in self._labels)
+
+    def store(self, issue_id: int, labels):
+        """Records labels already read some other way (e.g. aggregated into an issue query)"""
+        self._labels[issue_id] = [dict(label) for label in labels]
+        self._pending.discard(issue_id)
+
+    def clear(self, issue_ids=None):
+        """Forgets the labels of `issue_ids` (all if None), e.g. after they were changed"""
+        if issue_ids is None:
+            self._labels.clear()
+            return
+        for iid in issue_ids:
+            self._labels.pop(iid, None)
+
+    def _fetch(self, conn, issue_ids):
+        placeholders = ", ".join(["%s"] * len(issue_ids))
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT il.issue_id, l.label_id, l.name
+                FROM issue_labels il JOIN labels l on l.label_id = il.label_id
+                WHERE il.issue_id IN ({placeholders})
+                ORDER BY l.name ASC
+                """,
+                issue_ids
+            )
+            label_rows = cursor.fetchall()
+
+        for issue in group_labels_by_issue([{"issue_id": iid} for iid in issue_ids], label_rows):
+            self._labels[issue["issue_id"]] = issue["labels"]
+
+    def load_many(self, conn, issue_ids):
+        """Returns {issue_id: labels} for `issue_ids`, fetching them with all pending ids in one query"""
+        self.prime(issue_ids)
+        if self._pending:
+            pending = sorted(self._pending)
+            self._pending.clear()
+            self._fetch(conn, pending)
+        return {iid: [dict(label) for label in self._labels[iid]] for iid in issue_ids}
+
+    def attach(self, conn, issues):
+        """Sets 'labels' on each issue dict, in place, and returns the list"""
+        labels = self.load_many(conn, [issue["issue_id"] for issue in issues])
+        for issue in issues:
+            issue["labels"] = labels[issue["issue_id"]]
+        return issues
+
+
+def get_label_loader() -> LabelLoader:
+    """The current request's LabelLoader (a throwaway one outside of requests, e.g. in jobs)"""
+    if not has_request_context():
+        return LabelLoader()
+    if "label_loader" not in g:
+        g.label_loader = LabelLoader()
+    return g.label_loader
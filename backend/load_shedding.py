@@ -0,0 +1,127 @@
+import math
+import threading
+from contextlib import contextmanager
+from flask import current_app, request, jsonify
+from db import PoolTimeout, get_pool
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+ROUTE_CLASSES = ("read", "write", "export")
+
+
+class Overloaded(Exception):
+    """Raised when a request should be shed instead of served"""
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class LoadShedder:
+    """
+    Per-process concurrency limits for each route class (reads, writes, exports) plus
+    the load shedding decision.
+
+    A request is shed with a 503 when:
+        - more than `max_queue_depth` requests are already waiting for a slot, or
+        - the average wait for a pooled DB connection exceeds `max_pool_wait`, or
+        - no slot for its route class frees up within `slot_timeout` seconds
+    """
+    def __init__(self, limits: dict, slot_timeout: float, max_queue_depth: int,
+                 max_pool_wait: float, retry_after: float):
+        self._slots = {
+            route_class: threading.BoundedSemaphore(limit)
+            for route_class, limit in limits.items() if limit > 0
+        }
+        self._slot_timeout = slot_timeout
+        self._max_queue_depth = max_queue_depth
+        self._max_pool_wait = max_pool_wait
+        self._retry_after = retry_after
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+
+    def check_pressure(self):
+        """Raises Overloaded if the process is already past its shedding thresholds"""
+        if self._max_queue_depth > 0 and self.queue_depth >= self._max_queue_depth:
+            raise Overloaded("Request queue is full", self._retry_after)
+
+        pool = get_pool()
+        if pool is not None and self._max_pool_wait > 0 and pool.avg_wait > self._max_pool_wait:
+            raise Overloaded("Database is saturated", self._retry_after)
+
+    @contextmanager
+    def slot(self, route_class: str):
+        """Holds a concurrency slot for `route_class` for the duration of the block"""
+        self.check_pressure()
+
+        sem = self._slots.get(route_class)
+        if sem is None:
+            yield
+            return
+
+        with self._lock:
+            self.queue_depth += 1
+        try:
+            acquired = sem.acquire(timeout=self._slot_timeout)
+        finally:
+            with self._lock:
+                self.queue_depth -= 1
+
+        if not acquired:
+            raise Overloaded(f"Too many concurrent {route_class} requests", self._retry_after)
+
+        try:
+            yield
+        finally:
+            sem.release()
+
+
+##################################
+#        HELPER FUNCTIONS        #
+##################################
+def init_load_shedding(app):
+    cfg = app.config
+    app.extensions["itms_load_shedder"] = LoadShedder(
+        limits={
+            "read": cfg.get("CONCURRENCY_LIMIT_READ", 0),
+            "write": cfg.get("CONCURRENCY_LIMIT_WRITE", 0),
+            "export": cfg.get("CONCURRENCY_LIMIT_EXPORT", 0),
+        },
+        slot_timeout=cfg.get("CONCURRENCY_WAIT_TIMEOUT", 2),
+        max_queue_depth=cfg.get("LOAD_SHED_QUEUE_DEPTH", 0),
+        max_pool_wait=cfg.get("LOAD_SHED_POOL_WAIT_MS", 0) / 1000,
+        retry_after=cfg.get("LOAD_SHED_RETRY_AFTER", 5),
+    )
+
+    # A request that still can't get a DB connection is shed the same way
+    @app.errorhandler(PoolTimeout)
+    def handle_pool_timeout(e):
+        return overloaded_response(Overloaded("Database is saturated", cfg.get("LOAD_SHED_RETRY_AFTER", 5)))
+
+def get_load_shedder():
+    return current_app.extensions["itms_load_shedder"]
+
+def overloaded_response(e: Overloaded):
+    response = jsonify({"error": "Service temporarily overloaded, please retry", "reason": e.reason})
+    response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+    return response, 503
+
+def route_class(name: str):
+    """
+    Marks a view as belonging to a route class for concurrency limiting. Views that
+    aren't marked are classed by method: safe methods are 'read', everything else 'write'.
+
+    Place it below login_required/require_project_role, directly above the view.
+    """
+    if name not in ROUTE_CLASSES:
+        raise ValueError(f"Unknown route class '{name}'")
+
+    def decorator(f):
+        f.route_class = name
+        return f
+    return decorator
+
+def resolve_route_class(view) -> str:
+    explicit = getattr(view, "route_class", None)
+    if explicit:
+        return explicit
+    return "read" if request.method in SAFE_METHODS else "write"
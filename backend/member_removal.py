@@ -0,0 +1,75 @@
+##################################
+#    BATCHED ISSUE REASSIGNMENT  #
+##################################
+# When a member leaves a project their issues are unassigned (or handed to another
+# member) a batch at a time. Each batch is its own short transaction, so the history
+# and statistics triggers never run for thousands of rows under one lock.
+
+
+def reassign_member_issues(conn, project_id: int, member_id: int, reassign_to: int = None,
+                           acting_user_id: int = None, batch_size: int = 500, on_progress=None,
+                           on_batch=None) -> dict:
+    """
+    Moves every issue in a project assigned to `member_id` to `reassign_to`, or
+    unassigns them if `reassign_to` is None. Meant to run after the membership row is
+    deleted: batches only touch issues while `member_id` is still not a member, so a
+    re-added member keeps any issues not yet processed.
+
+    If `reassign_to` stops being a LEAD/DEVELOPER of the project part way through, the
+    remaining issues are unassigned instead.
+
+    `on_progress(issues_updated_total)` and `on_batch(issue_ids)` are called after each
+    committed batch, the latter e.g. to invalidate cached issues.
+    Returns dict {"issues_updated": <int>, "reassigned_to": <user_id>|None}
+    """
+    total = 0
+
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute("SET @current_user_id := %s", (acting_user_id,))
+
+            if reassign_to is not None:
+                cursor.execute(
+                    """
+                    SELECT 1 FROM project_memberships
+                    WHERE project_id = %s AND user_id = %s AND role IN ('LEAD', 'DEVELOPER')
+                    """,
+                    (project_id, reassign_to)
+                )
+                if cursor.fetchone() is None:
+                    reassign_to = None
+
+            cursor.execute(
+                """
+                SELECT issue_id FROM issues
+                WHERE project_id = %s AND assignee_id = %s
+                    AND NOT EXISTS (
+                        SELECT 1 FROM project_memberships
+                        WHERE project_id = %s AND user_id = %s
+                    )
+                ORDER BY issue_id
+                LIMIT %s
+                FOR UPDATE
+                """,
+                (project_id, member_id, project_id, member_id, batch_size)
+            )
+            issue_ids = [row["issue_id"] for row in cursor.fetchall()]
+
+            if issue_ids:
+                placeholders = ", ".join(["%s"] * len(issue_ids))
+                cursor.execute(
+                    f"UPDATE issues SET assignee_id = %s WHERE issue_id IN ({placeholders})",
+                    [reassign_to, *issue_ids]
+                )
+        conn.commit()
+
+        updated = len(issue_ids)
+        total += updated
+        if on_batch is not None and issue_ids:
+            on_batch(issue_ids)
+        if on_progress is not None:
+            on_progress(total)
+        if updated < batch_size:
+            break
+
+    return {"issues_updated": total, "reassigned_to": reassign_to}
@@ -0,0 +1,160 @@
+import cProfile
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from collections import Counter
+from flask import current_app, g, request
+from auth_utils import admin_token_valid
+
+# Profiler kinds a request can ask for with the X-Profile header
+PROFILERS = ("sampling", "cprofile")
+PROFILE_NAME_RE = re.compile(r"^[\w.-]+\.(folded|prof)$")
+
+
+##################################
+#           PROFILERS            #
+##################################
+class StackSampler:
+    """
+    Samples the stack of one thread every `interval` seconds from a background thread and
+    counts identical stacks. The result is "folded" stacks (`frame;frame;frame count` per
+    line), the input format of flamegraph.pl and speedscope.
+    """
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="itms-profiler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.counts[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.counts.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class CProfileRecorder:
+    """
+    Deterministic cProfile of the request; writes a pstats file (snakeviz, pstats, gprof2dot).
+    Only one may run per process at a time (newer Pythons allow a single active profiler).
+    """
+    active = threading.Lock()
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        CProfileRecorder.active.release()
+
+    def write(self, path: str):
+        self._profile.dump_stats(path)
+
+
+##################################
+#        REQUEST PROFILING       #
+##################################
+def _requested_profiler():
+    """
+    Which profiler (if any) should run for this request: the one asked for with an
+    X-Profile header plus a valid X-Admin-Token, else a sampled one for PROFILE_SAMPLE_RATE
+    of requests
+    """
+    asked = request.headers.get("X-Profile")
+    if asked and admin_token_valid():
+        return asked if asked in PROFILERS else "sampling"
+
+    rate = current_app.config.get("PROFILE_SAMPLE_RATE", 0)
+    if rate > 0 and random.random() < rate:
+        return "sampling"
+    return None
+
+def _start_profiling():
+    kind = _requested_profiler()
+    if kind is None:
+        return
+
+    if kind == "cprofile" and CProfileRecorder.active.acquire(blocking=False):
+        profiler = CProfileRecorder()
+    else:
+        interval = current_app.config.get("PROFILE_SAMPLE_INTERVAL_MS", 2) / 1000
+        profiler = StackSampler(threading.get_ident(), interval)
+
+    g.profiler = profiler
+    g.profile_started = time.perf_counter()
+    profiler.start()
+
+def _finish_profiling(response=None):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return response
+    profiler.stop()
+
+    elapsed_ms = (time.perf_counter() - g.pop("profile_started")) * 1000
+    endpoint = (request.endpoint or "unmatched").replace(".", "-")
+    extension = "prof" if isinstance(profiler, CProfileRecorder) else "folded"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.method}-{endpoint}-{elapsed_ms:.0f}ms-{secrets.token_hex(3)}.{extension}"
+
+    directory = current_app.config["PROFILE_DIR"]
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.write(os.path.join(directory, name))
+        _prune_profiles(directory, current_app.config.get("PROFILE_MAX_FILES", 200))
+    except OSError:
+        current_app.logger.warning("Could not save request profile %s", name, exc_info=True)
+        return response
+
+    if response is not None:
+        response.headers["X-Profile-Name"] = name
+    return response
+
+def _prune_profiles(directory: str, max_files: int):
+    """Deletes the oldest profiles beyond `max_files`"""
+    names = sorted(list_profiles(directory))
+    for name in names[:max(0, len(names) - max_files)]:
+        try:
+            os.remove(os.path.join(directory, name))
+        except FileNotFoundError:
+            pass
+
+def list_profiles(directory: str):
+    """Names of the saved profiles in `directory` (oldest first when sorted)"""
+    if not os.path.isdir(directory):
+        return []
+    return [name for name in os.listdir(directory) if PROFILE_NAME_RE.match(name)]
+
+def init_profiling(app):
+    """
+    Registers the per-request profiling hooks. Call before anything else registers
+    after_request hooks: Flask runs those in reverse order, so profiling then also covers
+    the other hooks and the response's JSON serialization.
+    """
+    app.before_request(_start_profiling)
+    app.after_request(_finish_profiling)
+    # Safety net for requests that never reach after_request (a no-op otherwise)
+    app.teardown_request(lambda e: _finish_profiling())
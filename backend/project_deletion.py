@@ -0,0 +1,179 @@
+##################################
+#       CHUNKED DELETION         #
+##################################
+# Issues are purged a batch at a time together with their children, then the
+# project-level rows. Every DELETE is bounded and committed on its own so no single
+# transaction holds locks (or undo log) for more than one batch.
+ISSUE_CHILD_TABLES = ("issue_history", "issue_history_archive", "comments", "issue_labels")
+PROJECT_CHILD_TABLES = ("labels", "project_memberships")
+
+
+def mark_project_deleting(conn, project_id: int, user_id: int) -> bool:
+    """
+    Hides a project immediately and records a pending deletion. Does not commit.
+
+    Returns False if the project doesn't exist or is already being deleted.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE projects SET deleting_at = CURRENT_TIMESTAMP
+            WHERE project_id = %s AND deleting_at IS NULL
+            """,
+            (project_id,)
+        )
+        if cursor.rowcount == 0:
+            return False
+
+        cursor.execute(
+            """
+            INSERT INTO project_deletions (project_id, project_key, requested_by, status, stage, rows_deleted)
+            SELECT project_id, project_key, %s, 'PENDING', 'issues', 0
+            FROM projects WHERE project_id = %s
+            ON DUPLICATE KEY UPDATE requested_by = VALUES(requested_by), status = 'PENDING',
+                stage = 'issues', rows_deleted = 0, last_error = NULL, finished_at = NULL
+            """,
+            (user_id, project_id)
+        )
+    return True
+
+def fetch_deletion(conn, project_id: int):
+    """Returns the project_deletions row for a project, or None"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT project_id, project_key, requested_by, requested_at, status, stage,
+                rows_deleted, last_error, updated_at, finished_at
+            FROM project_deletions WHERE project_id = %s
+            """,
+            (project_id,)
+        )
+        return cursor.fetchone()
+
+def _record_progress(conn, project_id, stage, deleted, status="RUNNING"):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE project_deletions
+            SET status = %s, stage = %s, rows_deleted = rows_deleted + %s,
+                finished_at = IF(%s = 'DONE', CURRENT_TIMESTAMP, NULL)
+            WHERE project_id = %s
+            """,
+            (status, stage, deleted, status, project_id)
+        )
+
+def _delete_batch(conn, project_id, stage, sql, params):
+    """Runs one bounded DELETE and records its progress in the same transaction"""
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        deleted = cursor.rowcount
+    _record_progress(conn, project_id, stage, deleted)
+    conn.commit()
+    return deleted
+
+def purge_project(conn, project_id: int, batch_size: int = 500, on_progress=None):
+    """
+    Removes a project marked as deleting and all of its rows, in bounded batches.
+
+    Safe to re-run after a crash: every stage just deletes whatever remains, so a
+    resumed purge continues where the last committed batch left off.
+
+    `on_progress(stage, rows_deleted_total)` is called after each committed batch.
+    """
+    deletion = fetch_deletion(conn, project_id)
+    if deletion is None or deletion["status"] == "DONE":
+        return deletion
+    total = deletion["rows_deleted"]
+
+    def progress(stage, deleted):
+        nonlocal total
+        total += deleted
+        if on_progress is not None:
+            on_progress(stage, total)
+
+    # Issues (and their history, comments and label links), one batch of issues at a time
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT issue_id FROM issues WHERE project_id = %s
+                ORDER BY issue_id ASC
+                LIMIT %s
+                """,
+                (project_id, batch_size)
+            )
+            issue_ids = [row["issue_id"] for row in cursor.fetchall()]
+        conn.commit()
+
+        if not issue_ids:
+            break
+
+        placeholders = ", ".join(["%s"] * len(issue_ids))
+        for table in ISSUE_CHILD_TABLES:
+            while True:
+                deleted = _delete_batch(
+                    conn, project_id, "issues",
+                    f"DELETE FROM {table} WHERE issue_id IN ({placeholders}) LIMIT %s",
+                    [*issue_ids, batch_size]
+                )
+                progress("issues", deleted)
+                if deleted < batch_size:
+                    break
+
+        deleted = _delete_batch(
+            conn, project_id, "issues",
+            f"DELETE FROM issues WHERE issue_id IN ({placeholders})",
+            issue_ids
+        )
+        progress("issues", deleted)
+
+    # Remaining project-level rows
+    for table in PROJECT_CHILD_TABLES:
+        while True:
+            deleted = _delete_batch(
+                conn, project_id, table,
+                f"DELETE FROM {table} WHERE project_id = %s LIMIT %s",
+                (project_id, batch_size)
+            )
+            progress(table, deleted)
+            if deleted < batch_size:
+                break
+
+    # Finally the project row itself (cascades the small per-project summary tables)
+    with conn.cursor() as cursor:
+        cursor.execute("DELETE FROM projects WHERE project_id = %s", (project_id,))
+        deleted = cursor.rowcount
+    _record_progress(conn, project_id, "done", deleted, status="DONE")
+    conn.commit()
+    progress("done", deleted)
+
+    return fetch_deletion(conn, project_id)
+
+def run_project_deletion(conn, project_id: int, batch_size: int = 500, on_progress=None):
+    """Runs purge_project, recording a failure on the deletion row before re-raising"""
+    try:
+        return purge_project(conn, project_id, batch_size=batch_size, on_progress=on_progress)
+    except Exception as e:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE project_deletions SET status = 'FAILED', last_error = %s
+                WHERE project_id = %s
+                """,
+                (str(e), project_id)
+            )
+        conn.commit()
+        raise
+
+def pending_deletions(conn):
+    """Returns project_ids whose deletion hasn't finished (e.g. interrupted by a restart)"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT project_id FROM project_deletions
+            WHERE status <> 'DONE'
+            ORDER BY requested_at ASC
+            """
+        )
+        return [row["project_id"] for row in cursor.fetchall()]
@@ -0,0 +1,33 @@
+##################################
+#      PROJECT STATISTICS        #
+##################################
+# project_issue_counts, project_issue_stats and label_usage_counts are kept current by
+# triggers; sp_rebuild_project_issue_stats recomputes them from issues. A rebuild of
+# every project calls it once per project, each in its own transaction, so no single
+# call holds locks on the whole issues table and a job can heartbeat between projects.
+
+
+def rebuild_project_stats(conn, project_id: int = None, on_progress=None) -> dict:
+    """
+    Recomputes the issue and label counts of `project_id`, or of every project if None.
+
+    `on_progress(projects_rebuilt_total, projects_total)` is called after each project.
+    Returns {"projects_rebuilt": <int>}
+    """
+    if project_id is not None:
+        project_ids = [project_id]
+    else:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT project_id FROM projects ORDER BY project_id")
+            project_ids = [row["project_id"] for row in cursor.fetchall()]
+        conn.commit()
+
+    for done, pid in enumerate(project_ids, start=1):
+        with conn.cursor() as cursor:
+            cursor.callproc("sp_rebuild_project_issue_stats", (pid,))
+        conn.commit()
+
+        if on_progress is not None:
+            on_progress(done, len(project_ids))
+
+    return {"projects_rebuilt": len(project_ids)}
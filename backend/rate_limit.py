@@ -0,0 +1,233 @@
+import hashlib
+import random
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, request
+from db import get_db
+
+##################################
+#       RATE LIMIT BACKENDS      #
+##################################
+class MemoryRateLimitBackend:
+    """
+    Token buckets held in process memory. Suitable for a single API process.
+
+    The bucket table is bounded (least recently touched keys are evicted first) so that
+    an attacker spraying many IPs/identifiers cannot grow it without limit.
+
+    `clock` can be swapped for a fake clock, which makes this backend usable as a
+    deterministic local fake in tests.
+    """
+    def __init__(self, clock=time.monotonic, max_keys: int = 100_000):
+        self._clock = clock
+        self._max_keys = max_keys
+        self._buckets = OrderedDict()   # key -> (tokens, last_refill)
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1):
+        """
+        Takes `cost` tokens from the bucket for `key`.
+
+        Returns tuple (bool, float) - whether the request is allowed, and how many seconds
+        the caller should wait before retrying (0 if allowed)
+        """
+        with self._lock:
+            now = self._clock()
+            tokens, last_refill = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last_refill) * refill_per_second)
+
+            if tokens >= cost:
+                tokens -= cost
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (cost - tokens) / refill_per_second
+
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+
+        return allowed, retry_after
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class DatabaseRateLimitBackend:
+    """
+    Token buckets stored in the `rate_limit_buckets` table, shared by every API node
+    pointed at the same database.
+
+    Bucket rows are locked with SELECT ... FOR UPDATE so that concurrent attempts on
+    different nodes cannot both spend the last token. Wall-clock time is used since
+    monotonic clocks are not comparable across machines.
+    """
+    # Chance that a consume() call also sweeps out long-idle buckets
+    PURGE_PROBABILITY = 0.01
+    PURGE_BATCH_SIZE = 1000
+
+    def __init__(self, clock=time.time, idle_ttl_seconds: int = 86400):
+        self._clock = clock
+        self._idle_ttl_seconds = idle_ttl_seconds
+
+    def consume(self, key: str, capacity: float, refill_per_second: float, cost: float = 1):
+        """Same contract as MemoryRateLimitBackend.consume()"""
+        conn = get_db()
+        now = self._clock()
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO rate_limit_buckets (bucket_key, tokens, refilled_at)
+                    VALUES (%s, %s, %s)
+                    ON DUPLICATE KEY UPDATE bucket_key = bucket_key
+                    """,
+                    (key, capacity, now)
+                )
+                cursor.execute(
+                    """
+                    SELECT tokens, refilled_at FROM rate_limit_buckets
+                    WHERE bucket_key = %s
+                    FOR UPDATE
+                    """,
+                    (key,)
+                )
+                row = cursor.fetchone()
+
+                elapsed = max(0.0, now - row["refilled_at"])
+                tokens = min(capacity, row["tokens"] + elapsed * refill_per_second)
+
+                if tokens >= cost:
+                    tokens -= cost
+                    allowed, retry_after = True, 0.0
+                else:
+                    allowed, retry_after = False, (cost - tokens) / refill_per_second
+
+                cursor.execute(
+                    """
+                    UPDATE rate_limit_buckets SET tokens = %s, refilled_at = %s
+                    WHERE bucket_key = %s
+                    """,
+                    (tokens, now, key)
+                )
+
+                if random.random() < self.PURGE_PROBABILITY:
+                    cursor.execute(
+                        """
+                        DELETE FROM rate_limit_buckets WHERE refilled_at < %s
+                        LIMIT %s
+                        """,
+                        (now - self._idle_ttl_seconds, self.PURGE_BATCH_SIZE)
+                    )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        return allowed, retry_after
+
+    def reset(self):
+        conn = get_db()
+        with conn.cursor() as cursor:
+            cursor.execute("DELETE FROM rate_limit_buckets")
+        conn.commit()
+
+
+RATE_LIMIT_BACKENDS = {
+    "memory": MemoryRateLimitBackend,
+    "database": DatabaseRateLimitBackend,
+}
+
+##################################
+#        HELPER FUNCTIONS        #
+##################################
+def init_rate_limiter(app, backend=None):
+    """
+    Attaches a rate limit backend to the app. `backend` overrides the configured
+    RATE_LIMIT_BACKEND, e.g. to install a MemoryRateLimitBackend with a fake clock.
+    """
+    if backend is None:
+        name = app.config.get("RATE_LIMIT_BACKEND", "memory")
+        if name not in RATE_LIMIT_BACKENDS:
+            raise RuntimeError(f"Unknown RATE_LIMIT_BACKEND '{name}'")
+        backend = RATE_LIMIT_BACKENDS[name]()
+
+    app.extensions["itms_rate_limiter"] = backend
+    app.config["ROUTE_RATE_LIMITS"] = parse_route_rate_limits(app.config.get("RATE_LIMIT_ROUTES"))
+    return backend
+
+def get_rate_limiter():
+    return current_app.extensions["itms_rate_limiter"]
+
+def parse_rate(rate: str):
+    """
+    Parses a rate string of the form "<requests>/<seconds>", e.g. "5/60" for five
+    requests per minute.
+
+    Returns tuple (capacity, refill_per_second)
+    """
+    try:
+        count, seconds = rate.split("/", 1)
+        count, seconds = float(count), float(seconds)
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid rate '{rate}', expected '<requests>/<seconds>'")
+
+    if count <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate '{rate}', both parts must be positive")
+
+    return count, count / seconds
+
+def parse_route_rate_limits(raw: str) -> dict:
+    """
+    Parses per-route quotas given as "endpoint=rate,endpoint=rate", e.g.
+    "show_project_issues=60/60,create_issue=30/60"
+    """
+    limits = {}
+    for part in (raw or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        endpoint, _, rate = part.partition("=")
+        if not endpoint.strip() or not rate.strip():
+            raise ValueError(f"Invalid route rate limit '{part}', expected 'endpoint=<requests>/<seconds>'")
+        parse_rate(rate.strip())
+        limits[endpoint.strip()] = rate.strip()
+    return limits
+
+def check_rate_limit(limit_name: str, key: str, cost: float = 1, rate: str = None):
+    """
+    Spends a token from the bucket `limit_name`:`key`, where the rate for `limit_name`
+    comes from the RATE_LIMIT_<LIMIT_NAME> config value unless `rate` is given.
+
+    Returns tuple (bool, float) - whether the request is allowed, and the suggested
+    Retry-After in seconds. Always allows if rate limiting is disabled or the limit
+    is not configured.
+    """
+    cfg = current_app.config
+    if rate is None:
+        rate = cfg.get("RATE_LIMIT_" + limit_name.upper())
+    if not cfg.get("RATE_LIMIT_ENABLED", True) or not rate:
+        return (True, 0.0)
+
+    capacity, refill_per_second = parse_rate(rate)
+
+    # Hash keys so identifiers/IPs aren't stored in the clear and key length is bounded
+    digest = hashlib.sha256(f"{limit_name}:{key}".encode("utf-8")).hexdigest()
+
+    return get_rate_limiter().consume(digest, capacity, refill_per_second, cost)
+
+def client_ip_key():
+    """Rate limit key for the requesting client's address"""
+    return request.remote_addr or "unknown"
+
+def login_identifier_key():
+    """Rate limit key for the username/email a login attempt targets, or None if absent"""
+    data = request.get_json(force=True, silent=True) or {}
+    identifier = data.get("identifier")
+
+    if not isinstance(identifier, str) or not identifier.strip():
+        return None
+
+    return identifier.strip().lower()
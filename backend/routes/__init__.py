@@ -0,0 +1,26 @@
+import importlib
+
+##################################
+#           BLUEPRINTS           #
+##################################
+# Every group of routes lives in its own blueprint module, imported only when the
+# blueprint is registered. API_BLUEPRINTS selects which ones an app serves, so a process
+# (or a test) can load just the routes it needs.
+BLUEPRINTS = ("auth", "projects", "members", "issues", "labels", "comments", "jobs", "admin", "users")
+
+
+def parse_blueprint_names(value: str):
+    """Parses API_BLUEPRINTS ("issues,labels,...", empty for all) into a tuple of names"""
+    names = tuple(name.strip() for name in (value or "").split(",") if name.strip())
+    unknown = [name for name in names if name not in BLUEPRINTS]
+    if unknown:
+        raise ValueError(f"Unknown API_BLUEPRINTS entries: {', '.join(unknown)} (choose from {', '.join(BLUEPRINTS)})")
+    return names or BLUEPRINTS
+
+def register_blueprints(app, names=None):
+    """Imports and registers the named blueprints (default: API_BLUEPRINTS from the config)"""
+    names = parse_blueprint_names(app.config.get("API_BLUEPRINTS")) if names is None else names
+    for name in names:
+        module = importlib.import_module(f"routes.{name}")
+        app.register_blueprint(module.bp)
+    return names
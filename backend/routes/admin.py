@@ -0,0 +1,70 @@
+"""Operator-only endpoints, guarded by ADMIN_TOKEN (X1-X3)"""
+import os
+from flask import Blueprint, current_app, jsonify, send_from_directory
+from werkzeug.exceptions import NotFound
+from auth_utils import admin_token_required
+from issue_cache import get_issue_cache
+from profiling import list_profiles, PROFILE_NAME_RE
+
+bp = Blueprint("admin", __name__)
+
+
+#########################
+#        METRICS        #
+#########################
+
+# X1
+@bp.route("/metrics/cache", methods=["GET"])
+@admin_token_required
+def issue_cache_metrics():
+    """
+    Hit/miss counters of this process's issue cache (requires the X-Admin-Token header):
+    {
+        "enabled": true|false,
+        "stats": {"backend": "...", "hits": <int>, "misses": <int>, "hit_ratio": <float>|null, ...}|null
+    }
+    """
+    cache = get_issue_cache()
+    return jsonify({"enabled": cache is not None, "stats": cache.stats() if cache else None}), 200
+
+
+##########################
+#        PROFILES        #
+##########################
+
+# X2
+@bp.route("/admin/profiles", methods=["GET"])
+@admin_token_required
+def list_request_profiles():
+    """
+    Lists the request profiles saved by this process, newest first (see profiling.py).
+    
+    A request is profiled when it sends "X-Profile: sampling|cprofile" along with
+    X-Admin-Token, or when it is picked by PROFILE_SAMPLE_RATE. Its response then has an
+    X-Profile-Name header naming the file:
+        - .folded: folded stacks, for flamegraph.pl or speedscope
+        - .prof: cProfile stats, for snakeviz or pstats
+    """
+    directory = current_app.config["PROFILE_DIR"]
+    profiles = []
+    for name in sorted(list_profiles(directory), reverse=True):
+        try:
+            size = os.path.getsize(os.path.join(directory, name))
+        except OSError:
+            continue
+        profiles.append({"name": name, "bytes": size})
+    
+    return jsonify({"profiles": profiles}), 200
+
+# X3
+@bp.route("/admin/profiles/<name>", methods=["GET"])
+@admin_token_required
+def download_request_profile(name: str):
+    """Downloads a saved request profile"""
+    if not PROFILE_NAME_RE.match(name):
+        return jsonify({"error": "Profile not found"}), 404
+    
+    try:
+        return send_from_directory(current_app.config["PROFILE_DIR"], name, as_attachment=True)
+    except NotFound:
+        return jsonify({"error": "Profile not found"}), 404
@@ -0,0 +1,222 @@
+"""Registration, login/logout and the current user's profile (A1-A6)"""
+from flask import Blueprint, current_app, request, jsonify, session
+from db import get_db
+from auth_utils import (login_required, get_current_user_id, rate_limited, get_current_user,
+                        write_response)
+from rate_limit import client_ip_key, login_identifier_key
+from session_store import revoke_user_sessions
+from pymysql.err import IntegrityError
+
+bp = Blueprint("auth", __name__)
+
+
+############################################
+#             Authentication               #
+############################################  
+
+# A1
+@bp.route("/auth/register", methods=["POST"])
+def register():
+    """Register a new user account, given email, username, password, and first/last name"""
+    data = request.get_json(force=True)
+    email = data.get("email")
+    username = data.get("username")
+    password = data.get("password")
+    first_name = data.get("first_name")
+    last_name = data.get("last_name")
+
+    if not all([email, username, password, first_name, last_name]):
+        return jsonify({"error": "Missing fields"}), 400
+
+    import bcrypt
+    pw_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    pw_hash_str = pw_hash.decode('utf-8')
+
+    conn = get_db()
+    with conn.cursor() as cursor:
+        try:
+            cursor.execute(
+                """
+                INSERT INTO users (email, username, password_hash, first_name, last_name)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (email, username, pw_hash_str, first_name, last_name)
+            )
+            conn.commit()
+
+        except Exception as e:
+            conn.rollback()
+
+            # Duplicate entry for key
+            if e.args[0] == 1062:
+                return jsonify({"error": "User already exists"}), 409
+            elif e.args[0] == 3819:
+                return jsonify({"error": "Invalid characters in username"}), 400
+            # Other DB error
+            return jsonify({"error": "Registration failed", "details": str(e)}), 400
+
+    return jsonify({"message": "User created"}), 201
+
+# A2
+@bp.route("/auth/login", methods=["POST"])
+@rate_limited("login_ip", client_ip_key, error="Too many login attempts, please try again later")
+@rate_limited("login_identifier", login_identifier_key, error="Too many login attempts, please try again later")
+def login():
+    """Logs in and creates session for user. Returns user info:
+        {
+            user: {
+                "email": "<email>",
+                "first_name": "<name>",
+                "last_name": "<name>",
+                "user_id": <user_id> (int),
+                "username": <username>
+            }
+        }
+    """
+    data = request.get_json(force=True)
+    identifier = data.get("identifier") # Since we take email or username
+    password = data.get("password")
+
+    if not identifier or not password:
+        return jsonify({"error": "username/email and password required"}), 400
+
+    conn = get_db()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT user_id, email, username, password_hash, first_name, last_name, created_at
+            FROM users
+            WHERE email = %s or username = %s
+            LIMIT 1
+            """,
+            (identifier, identifier),
+        )
+        user = cursor.fetchone()
+
+    import bcrypt    
+    if not user:
+        return jsonify({"error": "Invalid credentials"}), 401   # Avoid exposing whether username was not found or if password was incorrect
+
+    if not bcrypt.checkpw(password.encode('utf-8'), user["password_hash"].encode('utf-8')):
+        return jsonify({"error": "Invalid credentials"}), 401   # Avoid exposing whether username was not found or if password was incorrect
+
+    session.clear()
+    session["user_id"] = user["user_id"]
+
+    user.pop("password_hash", None)
+    session["user"] = user     # Cached so /me doesn't need to re-read users
+
+    return jsonify({"user": user}), 200
+
+
+# A3
+@bp.route("/auth/logout", methods=["POST"])
+def logout():
+    session.clear()
+    return jsonify({"message": "Logged out"}), 200 
+
+
+# A4
+@bp.route("/me", methods=["GET"])
+@login_required
+def me():
+    """Get user information in format:
+        {
+            "user": {
+                "created_at": "<DATETIME>",
+                "email": "<email>",
+                "first_name": "<name>",
+                "last_name": "<name>",
+                "user_id": <user_id> (int),
+                "username": <username>
+            }
+        }
+    """
+    user = get_current_user()
+
+    if not user:
+        # Shouldn't really happen unless the account is deleted mid-session
+        return jsonify({"error": "User not found"}), 404
+
+    return jsonify({"user": user}), 200
+
+
+# A5
+@bp.route("/me", methods=["PATCH"])
+@login_required
+def update_me():
+    """
+        Updates the user's info - either the username, first_name, or last_name.
+        Email address cannot be updated for this first version.
+
+        Request body expects one of those three fields with a new value.
+
+        Returns user's updated info
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True) or {}
+
+    username = data.get("username")
+    first_name = data.get("first_name")
+    last_name = data.get("last_name")
+
+    if not any([username, first_name, last_name]):
+        return jsonify({"error": "No fields to update"}), 400
+
+
+    fields = []
+    params = []
+
+    if username is not None:
+        fields.append("username = %s")
+        params.append(username)
+    if first_name is not None:
+        fields.append("first_name = %s")
+        params.append(first_name)
+    if last_name is not None:
+        fields.append("last_name = %s")
+        params.append(last_name )
+
+    params.append(user_id)
+
+    sql = "UPDATE users SET " + ", ".join(fields) + " WHERE user_id = %s"
+
+    # Cached summary (or one read if not cached yet), updated with the new values below
+    user = get_current_user()
+    if not user:
+        return jsonify({"error": "User not found"}), 404
+
+    conn = get_db()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, tuple(params))
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        if e.args[0] == 1062:
+            return jsonify({"error": "Username already in use"}), 409
+        return jsonify({"error": "Integrity error", "details": str(e)}), 400
+
+    user = {**user}
+    for field, value in (("username", username), ("first_name", first_name), ("last_name", last_name)):
+        if value is not None:
+            user[field] = value
+
+    session["user"] = user
+
+    return write_response({"user": user}, {"user_id": user_id})
+
+# A6
+@bp.route("/auth/logout-all", methods=["POST"])
+@login_required
+def logout_all():
+    """Revokes every session belonging to the current user, including this one"""
+    user_id = get_current_user_id()
+    revoked = revoke_user_sessions(current_app, user_id)
+    if revoked is None:
+        return jsonify({"error": "Session revocation requires a server-side SESSION_BACKEND"}), 501
+
+    session.clear()
+    return jsonify({"message": "Logged out of all sessions", "revoked": revoked}), 200
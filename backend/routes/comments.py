@@ -0,0 +1,265 @@
+"""Issue comments (C1-C4)"""
+from flask import Blueprint, request, jsonify
+from db import get_db, get_read_db, db_now
+from auth_utils import (login_required, get_current_user_id, get_project_role, fetch_issue,
+                        ensure_issue_visible, fetch_comment, expected_version, version_etag,
+                        version_conflict, write_response)
+from issue_activity import record_comment_added, record_comment_removed
+from issue_cache import invalidate_issues
+from pymysql.err import IntegrityError
+
+bp = Blueprint("comments", __name__)
+
+
+##########################
+#        COMMENTS        #
+##########################
+
+# C1
+@bp.route("/issues/<int:issue_id>/comments", methods=["GET"])
+@login_required
+def list_issue_comments(issue_id: int):
+    """
+    Returns all comments on a given issue. Returns empty list if no comments 
+    yet exist under the issue. 
+    """
+    user_id = get_current_user_id()
+
+    issue = fetch_issue(issue_id)
+
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT * FROM comments WHERE issue_id = %s
+            ORDER BY created_at ASC
+            """,
+            (issue_id,)
+        )
+        comments = cursor.fetchall()
+
+    return jsonify({"issue_id": issue_id, "comments": comments}), 200
+
+
+# C2
+@bp.route("/issues/<int:issue_id>/comments", methods=["POST"])
+@login_required
+def post_comment(issue_id: int):
+    """
+    Post a comment to an issue.
+
+    Body:
+    {
+        "content": "<CONTENT>"
+    }
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True)
+    content = (data.get('content') or "").strip()   # Trims whitespace and prevent all-whitespace comments
+
+    if not content:
+        return jsonify({"error": "Comment text cannot be empty"}), 400
+
+    issue = fetch_issue(issue_id)
+
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    conn = get_db()
+    now = db_now(conn)
+    try:
+        with conn.cursor() as cursor:
+            if not record_comment_added(cursor, issue_id, now):
+                conn.rollback()
+                return jsonify({"error": "Issue not found"}), 404
+
+            cursor.execute(
+                """
+                INSERT INTO comments (content, author_id, issue_id, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (content, user_id, issue_id, now, now)
+            )
+            comment_id = cursor.lastrowid
+
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Unable to add comment", "details": str(e)}), 400
+
+    invalidate_issues([issue_id])
+
+    comment = {
+        "comment_id": comment_id,
+        "content": content,
+        "issue_id": issue_id,
+        "author_id": user_id,
+        "created_at": now,
+        "updated_at": now,
+        "version": 1
+    }
+
+    return write_response(
+        {"comment": comment},
+        {"comment_id": comment_id, "version": 1},
+        201,
+        {"ETag": version_etag(1)}
+    )
+
+
+# C3
+@bp.route("/comments/<int:comment_id>", methods=["PATCH"])
+@login_required
+def edit_comment(comment_id: int):
+    """
+    Edits a comment, only if the user is the author of that comment
+
+    Body: 
+    {
+        "content": "<content>"    
+    }
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True)
+    new_content = (data.get("content") or "").strip()
+
+    if not new_content:
+        return jsonify({"error": "Comment text cannot be empty"}), 400
+
+
+    comment = fetch_comment(comment_id)
+    if not comment:
+        return jsonify({"error": "Comment not found"}), 404
+
+    issue = fetch_issue(comment["issue_id"])
+    if not issue:       # Should not happen unless DB consistency fails
+        return jsonify({"error": "Parent issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    if user_id != comment["author_id"]:
+        return jsonify({"error": "Insufficient permissions to edit comment"}), 403
+
+    # Optional compare-and-set: If-Match: "<version>" header or "version" in the body
+    version, version_error = expected_version(data)
+    if version_error:
+        return version_error
+    if version is not None and version != comment["version"]:
+        return version_conflict("Comment", comment["version"])
+
+    conn = get_db()
+    now = db_now(conn)
+    updated = None
+    try:
+        with conn.cursor() as cursor:
+            # Compare-and-set against the version we read, even when the client didn't
+            # send one, so the response can be built from that read
+            cursor.execute(
+                """
+                UPDATE comments 
+                SET content = %s, updated_at = %s
+                WHERE comment_id = %s AND version = %s
+                """,
+                (new_content, now, comment_id, comment["version"])
+            )
+
+            if cursor.rowcount == 0:
+                conn.rollback()
+                current = fetch_comment(comment_id)
+                if version is not None or current is None:
+                    return version_conflict("Comment", current["version"] if current else None)
+
+                # Unconditional edit that raced another one: last write wins as before,
+                # and this rare path reads the row back
+                cursor.execute(
+                    """
+                    UPDATE comments 
+                    SET content = %s, updated_at = %s
+                    WHERE comment_id = %s
+                    """,
+                    (new_content, now, comment_id)
+                )
+                cursor.execute("SELECT * FROM comments WHERE comment_id = %s", (comment_id,))
+                updated = cursor.fetchone()
+
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Unable to update comment", "details": str(e)}), 400
+
+    if updated is None:
+        updated = {**comment, "content": new_content, "updated_at": now, "version": comment["version"] + 1}
+
+    return write_response(
+        {"comment": updated},
+        {"comment_id": comment_id, "version": updated["version"]},
+        headers={"ETag": version_etag(updated["version"])}
+    )
+
+
+# C4
+@bp.route("/comments/<int:comment_id>", methods=["DELETE"])
+@login_required
+def delete_comment(comment_id):
+    """
+    Deletes a comment from an issue. Can only be carried out by the comment
+    author, or a project lead.
+    """
+    user_id = get_current_user_id()
+
+    comment = fetch_comment(comment_id)
+    if not comment:
+        return jsonify({"error": "Comment not found"}), 404
+
+    issue = fetch_issue(comment["issue_id"])
+    if not issue:
+        return jsonify({"error": "Parent issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    project_id = issue["project_id"]
+    user_role = get_project_role(project_id, user_id)
+
+    if user_id != comment["author_id"] and user_role != "LEAD":
+        return jsonify({"error": "Insufficient permissions to delete comment"}), 403
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            # Issue row before the comment, the same lock order as posting a comment
+            cursor.execute("SELECT issue_id FROM issues WHERE issue_id = %s FOR UPDATE", (comment["issue_id"],))
+            cursor.execute(
+                """
+                DELETE FROM comments
+                WHERE comment_id = %s
+                """,
+                (comment_id,)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()     # Should literally never happen, but to be safe
+                return jsonify({"error": "Comment not found"}), 404
+
+            record_comment_removed(cursor, comment["issue_id"])
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Unable to delete comment", "details": str(e)}), 400
+
+    invalidate_issues([comment["issue_id"]])
+
+    return jsonify({"success": True}), 200
@@ -0,0 +1,828 @@
+"""Issues, project statistics, due dates, the user's own issues and issue history (I1-I6, I8, I9, H1)"""
+from datetime import date
+from flask import Blueprint, request, jsonify
+from db import get_db, get_read_db
+from auth_utils import (login_required, get_current_user_id, require_project_role, get_project_role,
+                        is_visible_to_user, can_modify_issue, fetch_issue, ensure_issue_visible,
+                        expected_version, issue_etag, version_conflict, write_response,
+                        update_issue_fields, ISSUE_LABELS_HINT, ISSUE_LABELS_COLUMN, ISSUE_LABELS_JOIN,
+                        decode_issue_labels)
+from issue_cache import invalidate_issues
+from label_loader import label_sort_key
+from due_scanner import DUE_STATES
+from load_shedding import route_class
+from pymysql.err import IntegrityError
+
+bp = Blueprint("issues", __name__)
+
+MY_ISSUES_ROLES = {"assignee": "assignee_id", "reporter": "reporter_id"}
+ISSUE_STATUSES = ("OPEN", "IN_PROGRESS", "RESOLVED", "CLOSED")
+# ENUM order, which is also how MySQL sorts the column
+ISSUE_PRIORITIES = ("LOW", "MEDIUM", "HIGH", "CRITICAL")
+# I1 ?sort= keys, ties broken by issue number
+ISSUE_SORTS = {"number": "i.issue_number", "last_activity": "i.last_activity_at", "comments": "i.comment_count"}
+
+
+################################
+#       Issues & History       #
+################################
+
+# I1
+@bp.route("/projects/<int:project_id>/issues", methods=["GET"])
+@login_required
+def show_project_issues(project_id: int):
+    """
+    Lists a project's issues with their labels, comment counts and last activity.
+
+    Optional query params:
+        - label=<label_id>: only returns issues carrying that label
+        - sort=<key>: number (default), last_activity or comments, ascending; prefix
+          with "-" for descending, e.g. ?sort=-last_activity for most recently active first
+    """
+    user_id = get_current_user_id()
+    label_filter = request.args.get("label")
+    if label_filter is not None:
+        try:
+            label_filter = int(label_filter)
+        except ValueError:
+            return jsonify({"error": "label must be a label_id"}), 400
+
+    sort = request.args.get("sort", "number")
+    descending = sort.startswith("-")
+    sort_column = ISSUE_SORTS.get(sort[1:] if descending else sort)
+    if sort_column is None:
+        return jsonify({"error": "sort must be one of: " + ", ".join(ISSUE_SORTS)}), 400
+    direction = "DESC" if descending else "ASC"
+    order_by = f"{sort_column} {direction}, i.issue_number {direction}"
+
+    visible, err = is_visible_to_user(project_id, user_id)
+    if not visible:
+        if err == 404:
+            return jsonify({"error": "Project not found"}), 404
+        elif err == 403:
+            return jsonify({"error": "Not authorized to access this project"}), 403
+        else:
+            return jsonify({"error": "Unable to verify project membership/visibility"}), 400
+
+
+    conn = get_read_db()
+
+    # Issues and their labels in one query (see ISSUE_LABELS_JOIN)
+    with conn.cursor() as cursor:
+        if label_filter is None:
+            cursor.execute(
+                f"""
+                SELECT {ISSUE_LABELS_HINT} i.issue_number, i.issue_id, i.title, i.description, i.type, i.status,
+                    i.priority, i.reporter_id, i.assignee_id, i.due_date, i.created_at, i.updated_at,
+                    i.comment_count, i.last_activity_at, {ISSUE_LABELS_COLUMN}
+                FROM issues i {ISSUE_LABELS_JOIN}
+                WHERE i.project_id = %s
+                ORDER BY {order_by}
+                """,
+                (project_id,)
+            )
+        else:
+            # Range scan on idx_issue_labels_label, then primary key lookups
+            cursor.execute(
+                f"""
+                SELECT {ISSUE_LABELS_HINT} i.issue_number, i.issue_id, i.title, i.description, i.type, i.status,
+                    i.priority, i.reporter_id, i.assignee_id, i.due_date, i.created_at, i.updated_at,
+                    i.comment_count, i.last_activity_at, {ISSUE_LABELS_COLUMN}
+                FROM issue_labels fl
+                JOIN issues i ON i.issue_id = fl.issue_id {ISSUE_LABELS_JOIN}
+                WHERE fl.label_id = %s AND i.project_id = %s
+                ORDER BY {order_by}
+                """,
+                (label_filter, project_id)
+            )
+
+        issues = decode_issue_labels(cursor.fetchall())
+
+    return jsonify({
+        "project_id": project_id,
+        "issues": issues
+    }), 200
+
+
+# I2
+@bp.route("/projects/<int:project_id>/issues", methods=["POST"])
+@require_project_role(["LEAD", "DEVELOPER", "VIEWER"])
+def create_issue(project_id: int):
+    """Create an issue under a project
+
+    Expects body shape:
+    {
+        "title": "Title"
+        "description": [optional],
+        "type": "BUG"| "FEATURE"|"TASK"|"OTHER", [optional]
+        "priority": "LOW"|"MEDIUM"|"HIGH"|"CRITICAL", [optional]
+        "assignee_id": 2,   [optional - must be LEAD or DEVELOPER]
+        "due_date": "YYYY-MM-DD", [optional]
+        "labels": [label_ids], [optional]
+    }
+
+    - Caller must be a member of the project
+    - title is required
+    - status starts as OPEN
+    - reporter_id set to current user
+    - assignee_id is also optional
+    - labels is a list of label_ids
+    - issue_number is allocated per-project
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True)
+
+    title = data.get("title")
+    description = data.get("description")
+    issue_type = (data.get("type") or "TASK").upper()
+    priority = (data.get("priority") or "MEDIUM").upper()
+    assignee_id = data.get("assignee_id")
+    due_date = data.get("due_date") # Optional YYYY-MM-DD
+    labels = data.get("labels") or []
+
+    if not title:
+        return jsonify({"error": "Title is required"}), 400
+
+    valid_types = {"BUG", "FEATURE", "TASK", "OTHER"}
+    if issue_type not in valid_types:
+        return jsonify({"error": "Invalid type", "allowed": list(valid_types)}), 400
+
+    valid_priorities = {"LOW", "MEDIUM", "HIGH", "CRITICAL"}
+    if priority not in valid_priorities:
+        return jsonify({"error": "Invalid priority", "allowed": list(valid_priorities)}), 400
+
+    if assignee_id is not None:
+        try:
+            assignee_id = int(assignee_id)
+        except (TypeError, ValueError):
+            return jsonify({"error": "assignee_id must be an integer"}), 400
+
+        role = get_project_role(project_id, assignee_id)
+        if role not in ("LEAD", "DEVELOPER"):
+            return jsonify({"error": "Can only assign a LEAD or DEVELOPER to an issue"}), 400
+
+    if not isinstance(labels, list):
+        return jsonify({"error": "labels must be an array of label_ids"}), 400
+    labels = list(dict.fromkeys(labels))
+
+    if due_date is not None:
+        try:
+            due_date = date.fromisoformat(str(due_date))
+        except ValueError:
+            return jsonify({"error": "due_date must be YYYY-MM-DD"}), 400
+
+    conn = get_db()
+    label_names = {}
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET @current_user_id := %s", (user_id,))
+            if labels:
+                placeholders = ", ".join(["%s"] * len(labels))
+                cursor.execute(
+                    f"""
+                    SELECT label_id, name
+                    FROM labels WHERE project_id = %s AND label_id IN ({placeholders})
+                    """,
+                    [project_id, *labels]
+                )
+
+                label_names = {row["label_id"]: row["name"] for row in cursor.fetchall()}
+                missing = set(labels) - set(label_names)
+                if missing:
+                    return jsonify({
+                        "error": "Some labels do not belong to this project",
+                        "invalid_label_ids": sorted(missing)
+                    }), 400
+
+            cursor.callproc(
+                "sp_create_issue",
+                (
+                    project_id,
+                    title,
+                    description,
+                    issue_type,
+                    priority,
+                    user_id,
+                    assignee_id,
+                    due_date
+                )
+            )
+
+            # sp_create_issue returns the generated fields as a result set (pymysql has
+            # no OUT/INOUT params for callproc()), which must be drained before the next query
+            created = cursor.fetchone()
+            while cursor.nextset():
+                pass
+            if not created or not created["issue_id"]:
+                raise RuntimeError("sp_create_issue did not produce an insert id")
+            issue_id = created["issue_id"]
+
+            # Attach labels
+            if labels:
+                cursor.executemany(
+                    """
+                    INSERT INTO issue_labels (issue_id, label_id)
+                    VALUES (%s, %s)
+                    """,
+                    [(issue_id, lid) for lid in labels]
+                )
+
+        conn.commit()
+
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Issue creation failed", "details": str(e)}), 400
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": "Unexpected error during issue creation", "details": str(e)}), 500
+
+    issue = {
+        "issue_id": issue_id,
+        "project_id": project_id,
+        "issue_number": created["issue_number"],
+        "title": title,
+        "description": description,
+        "type": issue_type,
+        "status": "OPEN",
+        "priority": priority,
+        "reporter_id": user_id,
+        "assignee_id": assignee_id,
+        "due_date": due_date,
+        "created_at": created["created_at"],
+        "updated_at": created["created_at"],
+        "version": 1,
+        "comment_count": 0,
+        "last_activity_at": created["created_at"],
+        "labels": sorted(
+            ({"label_id": lid, "name": label_names[lid]} for lid in labels),
+            key=label_sort_key
+        )
+    }
+
+    return write_response(
+        {"message": "Issue created", "issue": issue},
+        {"message": "Issue created", "issue_id": issue_id, "issue_number": created["issue_number"]},
+        201,
+        {"ETag": issue_etag(issue)}
+    )
+
+# I3
+@bp.route("/issues/<int:issue_id>", methods=["GET"])
+@login_required
+def get_issue_details(issue_id: int):
+    user_id = get_current_user_id()
+
+    issue = fetch_issue(issue_id, add_labels=True)
+
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    return jsonify({"issue": issue}), 200, {"ETag": issue_etag(issue)}
+
+
+# I4
+@bp.route("/issues/<int:issue_id>", methods=["PATCH"])
+@login_required
+def edit_issue(issue_id: int):
+    """
+    Edits an existing issue in one or more of the following fields:
+    - Title
+    - Description
+    - Type
+    - Priority
+    - Due_date
+    - Status
+
+    Only a project LEAD or the ASSIGNED developer ('assignee') may edit an issue's details
+
+    I expect this endpoint to be hit often, as it's more of less the core of the application,
+    so I'm trying to minimize the cost of roundtrip checks while still maintaining functionality
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True)
+    conn = get_db()
+
+    new_title = data.get("title")
+    new_description = data.get("description")
+    new_type = data.get("type")
+    new_priority = data.get("priority")
+    new_due_date = data.get("due_date")
+    new_status = data.get("status")
+
+
+    if not any([new_title, new_description, new_type, new_priority, new_due_date, new_status]):
+        return jsonify({"error": "No valid fields for change provided"}), 400
+
+    valid_types = {"BUG", "FEATURE", "TASK", "OTHER"}
+    valid_priorities = {"LOW", "MEDIUM", "HIGH", "CRITICAL"}
+    valid_statuses = {"OPEN", "IN_PROGRESS", "RESOLVED", "CLOSED"}
+
+    changes = {}
+
+    if new_title is not None:
+        changes["title"] = new_title
+
+    if new_description is not None:
+        changes["description"] = new_description
+
+    if new_type is not None:
+        new_type = str(new_type).upper()
+        if new_type not in valid_types:
+            return jsonify({
+                "error": "Invalid type",
+                "allowed": sorted(list(valid_types)),
+            }), 400
+        changes["type"] = new_type
+
+    if new_priority is not None:
+        new_priority = str(new_priority).upper()
+        if new_priority not in valid_priorities:
+            return jsonify({
+                "error": "Invalid priority",
+                "allowed": sorted(list(valid_priorities)),
+            }), 400
+        changes["priority"] = new_priority
+
+    if new_status is not None:
+        new_status = str(new_status).upper()
+        if new_status not in valid_statuses:
+            return jsonify({
+                "error": "Invalid status",
+                "allowed": sorted(list(valid_statuses)),
+            }), 400
+        changes["status"] = new_status
+
+    if new_due_date is not None:
+        # Parsed here (rather than left to MySQL) so the response can echo the stored value
+        try:
+            changes["due_date"] = date.fromisoformat(str(new_due_date))
+        except ValueError:
+            return jsonify({"error": "due_date must be YYYY-MM-DD"}), 400
+
+    # Second sanity check
+    if not changes:
+        return jsonify({"error": "No valid fields to update"}), 400
+
+    # Optional compare-and-set: If-Match: "<version>" header or "version" in the body
+    version, version_error = expected_version(data)
+    if version_error:
+        return version_error
+
+
+    issue = fetch_issue(issue_id)
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    project_id = issue["project_id"]
+    role = get_project_role(project_id, user_id)
+    if not can_modify_issue(issue, user_id, role):
+        return jsonify({"error": "Insufficient permission to modify this issue"}), 403
+
+    # Already stale, no need to attempt the write
+    if version is not None and version != issue["version"]:
+        return version_conflict("Issue", issue["version"])
+
+    try:
+        updated_issue, current_version = update_issue_fields(conn, issue, changes, user_id, version)
+        if updated_issue is None:
+            conn.rollback()
+            return version_conflict("Issue", current_version)
+        conn.commit()
+        invalidate_issues([issue_id])
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Issue update failed", "details": str(e)}), 400
+
+    return write_response(
+        {"issue": updated_issue},
+        {"issue_id": issue_id, "version": updated_issue["version"]},
+        headers={"ETag": issue_etag(updated_issue)}
+    )
+
+# I5
+@bp.route("/issues/<int:issue_id>/assignee", methods=["PATCH"])
+@login_required
+def update_issue_assignee(issue_id: int):
+    """
+    Change the assigned LEAD/DEVELOPER on an issue. 
+
+    Expects 'assignee_id', which can be null to unassign an issue
+
+    Only a LEAD can reassign an issue
+    """
+    user_id = get_current_user_id()
+    conn = get_db()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT * FROM issues WHERE issue_id = %s
+            """,
+            (issue_id,)
+        )
+        issue = cursor.fetchone()
+
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    project_id = issue["project_id"]
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    acting_role = get_project_role(project_id, user_id)
+    if acting_role != "LEAD":
+        return jsonify({"error": "Only project leads may change issue assignees"}), 403
+
+    data = request.get_json(force=True)
+    new_assignee = data.get("assignee_id")
+
+    version, version_error = expected_version(data)
+    if version_error:
+        return version_error
+    if version is not None and version != issue["version"]:
+        return version_conflict("Issue", issue["version"])
+
+    if new_assignee is not None:
+        try:
+            new_assignee = int(new_assignee)
+        except (TypeError, ValueError):
+            return jsonify({"error": "assignee_id must be an integer or null"}), 400
+
+        assignee_role = get_project_role(project_id, new_assignee)
+        if assignee_role not in ("LEAD", "DEVELOPER"):
+            return jsonify({"error": "Assignee must be a LEAD or DEVELOPER in this project"}), 400
+
+    try:
+        updated_issue, current_version = update_issue_fields(
+            conn, issue, {"assignee_id": new_assignee}, user_id, version
+        )
+        if updated_issue is None:
+            conn.rollback()
+            return version_conflict("Issue", current_version)
+        conn.commit()
+        invalidate_issues([issue_id])
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Assignee update failed", "details": str(e)}), 400
+
+    return write_response(
+        {"issue": updated_issue},
+        {"issue_id": issue_id, "version": updated_issue["version"]},
+        headers={"ETag": issue_etag(updated_issue)}
+    )
+
+# I6
+@bp.route("/projects/<int:project_id>/stats", methods=["GET"])
+@login_required
+def get_project_issue_stats(project_id: int):
+    """
+    Returns issue counts for a project, by status overall and broken down by
+    priority, type and assignee:
+    {
+        "project_id": <project_id>,
+        "total": <int>,
+        "by_status": {"OPEN": <int>, "IN_PROGRESS": <int>, "RESOLVED": <int>, "CLOSED": <int>},
+        "by_priority": {"LOW": {<status counts>}, ...},
+        "by_type": {"BUG": {<status counts>}, ...},
+        "by_assignee": [{"assignee_id": <user_id>|null, "counts": {<status counts>}}, ...]
+    }
+
+    Reads the precomputed project_issue_stats table, so cost doesn't grow with issue count.
+    """
+    user_id = get_current_user_id()
+    visible, err = is_visible_to_user(project_id, user_id)
+    if not visible:
+        if err == 404:
+            return jsonify({"error": "Project not found"}), 404
+        elif err == 403:
+            return jsonify({"error": "Not authorized to access this project"}), 403
+        else:
+            return jsonify({"error": "Unable to verify project membership/visibility"}), 400
+
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT status, priority, type, assignee_key, issue_count
+            FROM project_issue_stats
+            WHERE project_id = %s AND issue_count > 0
+            """,
+            (project_id,)
+        )
+        rows = cursor.fetchall()
+
+    statuses = ("OPEN", "IN_PROGRESS", "RESOLVED", "CLOSED")
+
+    def empty_counts():
+        return {status: 0 for status in statuses}
+
+    by_status = empty_counts()
+    by_priority = {priority: empty_counts() for priority in ("LOW", "MEDIUM", "HIGH", "CRITICAL")}
+    by_type = {issue_type: empty_counts() for issue_type in ("BUG", "FEATURE", "TASK", "OTHER")}
+    by_assignee = {}
+
+    for row in rows:
+        status, count = row["status"], row["issue_count"]
+        by_status[status] += count
+        by_priority[row["priority"]][status] += count
+        by_type[row["type"]][status] += count
+        by_assignee.setdefault(row["assignee_key"] or None, empty_counts())[status] += count
+
+    return jsonify({
+        "project_id": project_id,
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_priority": by_priority,
+        "by_type": by_type,
+        "by_assignee": [
+            {"assignee_id": assignee_id, "counts": counts}
+            for assignee_id, counts in by_assignee.items()
+        ]
+    }), 200
+
+# I8
+@bp.route("/me/issues", methods=["GET"])
+@login_required
+def list_my_issues():
+    """
+    The current user's work across every project they can see, most urgent first:
+    highest priority first, then earliest due date (issues without one first), then oldest.
+    
+    Optional query params:
+    - role=assignee|reporter: issues assigned to (default) or reported by the user
+    - status=OPEN,IN_PROGRESS: comma-separated statuses (default: OPEN,IN_PROGRESS)
+    - limit=<n>: page size, default 50, at most 200
+    - cursor=<next_cursor>: continue after the previous page
+    
+    Returns:
+    {
+        "issues": [{<issue>, "project_key": ..., "project_name": ..., "labels": [...]}, ...],
+        "next_cursor": "<cursor>"|null
+    }
+    """
+    user_id = get_current_user_id()
+    
+    role = request.args.get("role", "assignee")
+    if role not in MY_ISSUES_ROLES:
+        return jsonify({"error": "role must be 'assignee' or 'reporter'"}), 400
+    
+    statuses = list(dict.fromkeys(s.strip() for s in request.args.get("status", "OPEN,IN_PROGRESS").split(",") if s.strip()))
+    if not statuses or any(s not in ISSUE_STATUSES for s in statuses):
+        return jsonify({"error": f"status must be a comma-separated list of {', '.join(ISSUE_STATUSES)}"}), 400
+    
+    try:
+        limit = min(max(int(request.args.get("limit", 50)), 1), 200)
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    
+    after = None
+    if request.args.get("cursor"):
+        after = _parse_work_cursor(request.args["cursor"])
+        if after is None:
+            return jsonify({"error": "Invalid cursor"}), 400
+    
+    # One index range scan per status on idx_issues_<role>_work, each already in display
+    # order, merged here. limit + 1 rows each tells whether another page exists.
+    keyset_sql, keyset_params = _work_keyset(after)
+    issues = []
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        for status in statuses:
+            cursor.execute(
+                f"""
+                SELECT {ISSUE_LABELS_HINT} i.issue_id, i.project_id, p.project_key, p.name AS project_name,
+                    i.issue_number, i.title, i.description, i.type, i.status, i.priority, i.reporter_id,
+                    i.assignee_id, i.due_date, i.created_at, i.updated_at, {ISSUE_LABELS_COLUMN}
+                FROM issues i
+                JOIN projects p ON p.project_id = i.project_id AND p.deleting_at IS NULL
+                {ISSUE_LABELS_JOIN}
+                WHERE i.{MY_ISSUES_ROLES[role]} = %s AND i.status = %s{keyset_sql}
+                    AND (p.is_public = 1 OR EXISTS (
+                        SELECT 1 FROM project_memberships pm
+                        WHERE pm.project_id = i.project_id AND pm.user_id = %s
+                    ))
+                ORDER BY i.priority DESC, i.due_date ASC, i.issue_id ASC
+                LIMIT %s
+                """,
+                (user_id, status, *keyset_params, user_id, limit + 1)
+            )
+            issues.extend(cursor.fetchall())
+    
+    issues.sort(key=_work_order)
+    page = decode_issue_labels(issues[:limit])
+    next_cursor = None
+    if len(issues) > limit:
+        last = page[-1]
+        next_cursor = f"{last['priority']},{last['due_date'].isoformat() if last['due_date'] else ''},{last['issue_id']}"
+    
+    return jsonify({"issues": page, "next_cursor": next_cursor}), 200
+
+def _work_order(issue):
+    """Sort key matching ORDER BY priority DESC, due_date ASC (NULLs first), issue_id ASC"""
+    due = issue["due_date"]
+    return (-ISSUE_PRIORITIES.index(issue["priority"]), due is not None, due or date.min, issue["issue_id"])
+
+def _parse_work_cursor(value: str):
+    """Parses "<priority>,<due_date or empty>,<issue_id>", or returns None if malformed"""
+    parts = value.split(",")
+    if len(parts) != 3 or parts[0] not in ISSUE_PRIORITIES:
+        return None
+    try:
+        due = date.fromisoformat(parts[1]) if parts[1] else None
+        return parts[0], due, int(parts[2])
+    except ValueError:
+        return None
+
+def _work_keyset(after):
+    """
+    WHERE clause continuing after the cursor row in /me/issues order. Priorities are compared
+    with = / IN rather than < (comparing an ENUM to a string is alphabetical), so the
+    index ranges still apply.
+    """
+    if after is None:
+        return "", []
+    
+    priority, due, issue_id = after
+    lower = list(ISSUE_PRIORITIES[:ISSUE_PRIORITIES.index(priority)])
+    if due is None:
+        same_priority = "(i.due_date IS NOT NULL OR i.issue_id > %s)"
+        params = [priority, issue_id]
+    else:
+        same_priority = "(i.due_date > %s OR (i.due_date = %s AND i.issue_id > %s))"
+        params = [priority, due, due, issue_id]
+    
+    sql = f"(i.priority = %s AND {same_priority})"
+    if lower:
+        sql = f"({sql} OR i.priority IN ({', '.join(['%s'] * len(lower))}))"
+        params += lower
+    return f" AND {sql}", params
+
+
+# I9
+@bp.route("/projects/<int:project_id>/due-issues", methods=["GET"])
+@login_required
+def list_project_due_issues(project_id: int):
+    """
+    Returns the project's overdue and at-risk (due within DUE_SCAN_AT_RISK_DAYS) open issues,
+    overdue first, then by due date:
+    {
+        "project_id": <project_id>,
+        "scanned_at": <datetime>|null,
+        "counts": {"overdue": <int>, "at_risk": <int>},
+        "issues": [{"issue_id", "issue_number", "title", "status", "priority", "assignee_id",
+                    "due_date", "due_state": "OVERDUE"|"AT_RISK"}, ...],
+        "next_cursor": <str>|null
+    }
+
+    Optional query parameters:
+        - state: overdue or at_risk (default: both)
+        - limit: page size (1-200, default 50)
+        - cursor: "next_cursor" of the previous page
+
+    Reads the snapshot written by the due date scanner (due_scanner.py) rather than the
+    issues table, so it is as fresh as the last scan (see "scanned_at"); scanned_at is
+    null if the last scan found nothing due in this project.
+    """
+    user_id = get_current_user_id()
+    visible, err = is_visible_to_user(project_id, user_id)
+    if not visible:
+        if err == 404:
+            return jsonify({"error": "Project not found"}), 404
+        elif err == 403:
+            return jsonify({"error": "Not authorized to access this project"}), 403
+        else:
+            return jsonify({"error": "Unable to verify project membership/visibility"}), 400
+
+    state = request.args.get("state")
+    if state is None:
+        states = list(DUE_STATES)
+    elif state.upper() in DUE_STATES:
+        states = [state.upper()]
+    else:
+        return jsonify({"error": "state must be overdue or at_risk"}), 400
+
+    try:
+        limit = int(request.args.get("limit", 50))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= 200:
+        return jsonify({"error": "limit must be between 1 and 200"}), 400
+
+    after = None
+    if request.args.get("cursor"):
+        after = _parse_due_cursor(request.args["cursor"])
+        if after is None or after[0] not in states:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    keyset, keyset_params = _due_keyset(after, states)
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT overdue_count, at_risk_count, scanned_at FROM project_due_counts WHERE project_id = %s",
+            (project_id,)
+        )
+        counts = cursor.fetchone() or {"overdue_count": 0, "at_risk_count": 0, "scanned_at": None}
+
+        # Walks idx_issue_due_alerts_project (project_id, state, due_date), already in display order
+        cursor.execute(
+            f"""
+            SELECT i.issue_id, i.issue_number, i.title, i.status, i.priority, i.assignee_id,
+                a.due_date, a.state AS due_state
+            FROM issue_due_alerts a
+            JOIN issues i ON i.issue_id = a.issue_id
+            WHERE a.project_id = %s AND a.state IN ({", ".join(["%s"] * len(states))}){keyset}
+            ORDER BY a.state ASC, a.due_date ASC, a.issue_id ASC
+            LIMIT %s
+            """,
+            [project_id, *states, *keyset_params, limit + 1]
+        )
+        issues = cursor.fetchall()
+
+    next_cursor = None
+    if len(issues) > limit:
+        issues = issues[:limit]
+        last = issues[-1]
+        next_cursor = f"{last['due_state']},{last['due_date'].isoformat()},{last['issue_id']}"
+
+    return jsonify({
+        "project_id": project_id,
+        "scanned_at": counts["scanned_at"],
+        "counts": {"overdue": counts["overdue_count"], "at_risk": counts["at_risk_count"]},
+        "issues": issues,
+        "next_cursor": next_cursor
+    }), 200
+
+def _parse_due_cursor(value: str):
+    """Parses "<due_state>,<due_date>,<issue_id>", or returns None if malformed"""
+    parts = value.split(",")
+    if len(parts) != 3 or parts[0] not in DUE_STATES:
+        return None
+    try:
+        return parts[0], date.fromisoformat(parts[1]), int(parts[2])
+    except ValueError:
+        return None
+
+def _due_keyset(after, states):
+    """
+    WHERE clause continuing after the cursor row of I9. As with _work_keyset, states are
+    matched with = / IN since comparing an ENUM to a string is alphabetical.
+    """
+    if after is None:
+        return "", []
+
+    state, due, issue_id = after
+    later = [s for s in states if DUE_STATES.index(s) > DUE_STATES.index(state)]
+    sql = "(a.state = %s AND (a.due_date > %s OR (a.due_date = %s AND a.issue_id > %s)))"
+    params = [state, due, due, issue_id]
+    if later:
+        sql = f"({sql} OR a.state IN ({', '.join(['%s'] * len(later))}))"
+        params += later
+    return f" AND {sql}", params
+
+
+#######################
+#       HISTORY       #
+#######################
+
+# H1
+@bp.route("/issues/<int:issue_id>/history", methods=["GET"])                
+@login_required
+@route_class("export")     # unpaginated, and may read the history archive
+def get_issue_history(issue_id: int):
+    user_id = get_current_user_id()
+
+    issue = fetch_issue(issue_id)
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT change_id, issue_id, changed_by, field_name, old_value, new_value, changed_at
+            FROM issue_history WHERE issue_id = %s
+            UNION ALL
+            SELECT change_id, issue_id, changed_by, field_name, old_value, new_value, changed_at
+            FROM issue_history_archive WHERE issue_id = %s
+            ORDER BY changed_at ASC, change_id ASC
+            """,
+            (issue_id, issue_id)
+        )
+        history = cursor.fetchall()
+
+    return jsonify({"issue_id": issue_id, "history": history}), 200
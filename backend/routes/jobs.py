@@ -0,0 +1,76 @@
+"""Background job status for the user who started them (J1-J2)"""
+from flask import Blueprint, request, jsonify
+from db import get_db
+from auth_utils import login_required, get_current_user_id
+from jobs import fetch_job
+
+bp = Blueprint("jobs", __name__)
+
+
+######################
+#        JOBS        #
+######################
+
+# J1
+@bp.route("/jobs/<int:job_id>", methods=["GET"])
+@login_required
+def get_job(job_id: int):
+    """
+    Returns status and progress of a background job started by the current user:
+    {
+        "job": {
+            "job_id": <job_id>,
+            "kind": "<kind>",
+            "status": "QUEUED"|"RUNNING"|"SUCCEEDED"|"FAILED",
+            "attempts": <int>,
+            "progress": {...}|null,
+            "result": {...}|null,
+            "last_error": "<error>"|null,
+            ...
+        }
+    }
+    """
+    user_id = get_current_user_id()
+    job = fetch_job(get_db(), job_id)
+
+    if not job or job["created_by"] != user_id:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({"job": job}), 200
+
+# J2
+@bp.route("/jobs", methods=["GET"])
+@login_required
+def list_jobs():
+    """
+    Returns the current user's 50 most recent background jobs, newest first.
+    Optional query param: ?status=QUEUED|RUNNING|SUCCEEDED|FAILED
+    """
+    user_id = get_current_user_id()
+    status = request.args.get("status")
+
+    if status is not None and status not in ("QUEUED", "RUNNING", "SUCCEEDED", "FAILED"):
+        return jsonify({"error": "Invalid status"}), 400
+
+    status_filter = ""
+    params = [user_id]
+    if status is not None:
+        status_filter = " AND status = %s"
+        params.append(status)
+
+    conn = get_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"""
+            SELECT job_id, kind, status, attempts, max_attempts, run_after, last_error,
+                created_at, updated_at, finished_at
+            FROM jobs
+            WHERE created_by = %s{status_filter}
+            ORDER BY created_at DESC, job_id DESC
+            LIMIT 50
+            """,
+            params
+        )
+        jobs = cursor.fetchall()
+
+    return jsonify({"jobs": jobs}), 200
@@ -0,0 +1,556 @@
+"""Project labels and issue labelling (L1-L8)"""
+from flask import Blueprint, current_app, request, jsonify
+from db import get_db, get_read_db
+from auth_utils import (login_required, get_current_user_id, require_project_role,
+                        get_project_visibility, get_project_role, can_modify_issue, fetch_issue,
+                        ensure_issue_visible, prefers_minimal, write_response, parse_id_list,
+                        attach_labels_to_issues, select_labeled_issue_ids)
+from issue_cache import invalidate_issues
+from label_loader import label_sort_key
+from pymysql.err import IntegrityError
+
+bp = Blueprint("labels", __name__)
+
+
+########################        
+#        Labels        #
+########################        
+
+# L1
+@bp.route("/projects/<int:project_id>/labels", methods=["GET"])
+@login_required
+def get_project_labels(project_id):
+    """
+    Gets all labels associated with a given project, with how many issues carry
+    each one (from label_usage_counts, no scan over issues):
+    {
+        "label_id": <label_id>, "name": "<name>", "project_id": <project_id>,
+        "issue_count": <int>,
+        "counts": {"OPEN": <int>, "IN_PROGRESS": <int>, "RESOLVED": <int>, "CLOSED": <int>}
+    }
+    """
+    user_id = get_current_user_id()
+
+    visibility = get_project_visibility(project_id, user_id)
+    if not visibility["exists"]:
+        return jsonify({"error": "Project not found"}), 404
+
+    if not visibility["visible"]:
+        return jsonify({"error": "Not authorized to access this project"}), 403
+
+    conn = get_read_db()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT l.label_id, l.name, l.project_id, c.status, c.issue_count
+            FROM labels l
+            LEFT JOIN label_usage_counts c ON c.label_id = l.label_id
+            WHERE l.project_id = %s
+            ORDER BY l.name ASC, l.label_id ASC
+            """,
+            (project_id,)
+        )
+        rows = cursor.fetchall()
+
+    labels = {}
+    for row in rows:
+        label = labels.setdefault(row["label_id"], {
+            "label_id": row["label_id"],
+            "name": row["name"],
+            "project_id": row["project_id"],
+            "issue_count": 0,
+            "counts": {"OPEN": 0, "IN_PROGRESS": 0, "RESOLVED": 0, "CLOSED": 0}
+        })
+        if row["status"] is not None:
+            label["counts"][row["status"]] = row["issue_count"]
+            label["issue_count"] += row["issue_count"]
+
+    return jsonify({"project_id": project_id, "labels": list(labels.values())}), 200
+
+# L2
+@bp.route("/projects/<int:project_id>/labels", methods=["POST"])
+@require_project_role(["LEAD"])
+def add_label_to_project(project_id: int):
+    """
+    Create a new label for a given project
+
+    Body:
+    {
+        "name": "<name>"
+    }
+
+    Requires caller to be a project LEAD, and enforces per-project uniqueness on (project_id, name)
+    """
+    data = request.get_json(force=True)
+    name = data.get("name")
+
+    if not name:
+        return jsonify({"error": "Label name required"}), 400
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO labels (name, project_id)
+                VALUES (%s, %s)
+                """,
+                (name, project_id)
+            )
+            label_id = cursor.lastrowid
+
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+
+        if e.args[0] == 1062:
+            return jsonify({"error": "Label already exists with that name"}), 409
+        return jsonify({"error": "Failed to create label", "details": str(e)}), 400
+
+    label = {"label_id": label_id, "project_id": project_id, "name": name}
+
+    return write_response(
+        {"project_id": project_id, "label": label},
+        {"project_id": project_id, "label_id": label_id},
+        201
+    )
+
+
+# L3
+@bp.route("/projects/<int:project_id>/labels/<int:label_id>", methods=["PATCH"])
+@require_project_role(["LEAD"])
+def edit_project_label(project_id: int, label_id: int):
+    """
+    Changes the name of a project's label.
+
+    Body:
+    {
+        "name": "<name>"
+    }
+
+    Enforces name-collision restraint
+    """
+    data = request.get_json(force=True)
+    new_name = data.get("name")
+
+    if not new_name:
+        return jsonify({"error": "Label name required"}), 400
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE labels
+                SET name=%s WHERE label_id=%s AND project_id=%s
+                """,
+                (new_name, label_id, project_id)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return jsonify({"error": "Label not found"}), 404
+            labeled_issue_ids = select_labeled_issue_ids(cursor, label_id)
+        conn.commit()
+        invalidate_issues(labeled_issue_ids)
+    except IntegrityError as e:
+        conn.rollback()
+
+        if e.args[0] == 1062:
+            return jsonify({"error": "Label already exists with that name"}), 409
+        return jsonify({"error": "Unable to update label name", "details": str(e)}), 400
+
+    return write_response(
+        {"project_id": project_id, "label_id": label_id, "name": new_name},
+        {"project_id": project_id, "label_id": label_id}
+    )
+
+
+# L4
+@bp.route("/projects/<int:project_id>/labels/<int:label_id>", methods=["DELETE"])
+@require_project_role(["LEAD"])
+def delete_project_label(project_id: int, label_id: int):
+    """
+    Remove a label from a project. As per DB CASCADE, this will also remove 
+    this label from all issues in the project that currently have it.
+    """
+    conn = get_db()
+
+    try:
+        with conn.cursor() as cursor:
+            # Read before the cascade removes the links
+            labeled_issue_ids = select_labeled_issue_ids(cursor, label_id)
+            cursor.execute(
+                """
+                DELETE FROM labels WHERE project_id=%s AND label_id=%s
+                """,
+                (project_id, label_id)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return jsonify({"error": "Label not found"}), 404
+        conn.commit()
+        invalidate_issues(labeled_issue_ids)
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Unable to remove label from project", "details": str(e)}), 400
+
+    return jsonify({"success": True}), 200
+
+
+# L5
+@bp.route("/issues/<int:issue_id>/labels", methods=["POST"])
+@login_required
+def add_label_to_issue(issue_id: int):
+    """
+    Add existing project label to an issue.
+
+    Requires that label exists in project, and that user is either a project
+    LEAD or the issue assignee. No duplicate labels on an issue.
+
+    Body:
+    {
+        "label_id": <label_id>
+    }
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True)
+
+    raw_label_id = data.get("label_id")
+    if raw_label_id is None:
+        return jsonify({"error": "label_id is required"}), 400
+
+    try:
+        label_id = int(raw_label_id)
+    except (TypeError, ValueError):
+        return jsonify({"error": "label_id must be an integer"}), 400
+
+    conn = get_db()
+    minimal = prefers_minimal()
+
+    # Current labels are read up front, so the response needs no re-read after the insert
+    issue = fetch_issue(issue_id, add_labels=not minimal)
+
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    project_id = issue["project_id"]
+
+    user_role = get_project_role(project_id, user_id)
+    if not can_modify_issue(issue, user_id, user_role):
+        return jsonify({"error": "Insufficient permissions to modify this issue"}), 403
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT label_id, project_id, name
+                FROM labels
+                WHERE label_id = %s
+                """,
+                (label_id,)
+            )
+            label = cursor.fetchone()
+
+            if not label or label["project_id"] != project_id:
+                return jsonify({"error": "Label not found in this project"}), 404
+
+            try:
+                cursor.execute(
+                    """
+                    INSERT INTO issue_labels (issue_id, label_id)
+                    VALUES (%s, %s)
+                    """,
+                    (issue_id, label_id)
+                )
+            except IntegrityError as e:
+                conn.rollback()
+                if e.args[0] == 1062:
+                    return jsonify({
+                        "error": "Label already attached to this issue",
+                        "label_id": label_id,
+                        "issue_id": issue_id
+                    }), 409
+                return jsonify({"error": "Failed to attach label", "details": str(e)}), 400
+        conn.commit()
+        invalidate_issues([issue_id])
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Failed to attach label", "details": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": "Unexpected error while attaching label", "details": str(e)}), 500
+
+    if not minimal:
+        issue["labels"] = sorted(
+            [*issue["labels"], {"label_id": label_id, "name": label["name"]}],
+            key=label_sort_key
+        )
+
+    return write_response(
+        {"message": "label attached", "issue": issue},
+        {"message": "label attached", "issue_id": issue_id, "label_id": label_id}
+    )
+
+
+# L6
+@bp.route("/issues/<int:issue_id>/labels/<int:label_id>", methods=["DELETE"])
+@login_required
+def remove_label_from_issue(issue_id: int, label_id: int):
+    """
+    Remove a label from an issue, provided it is already present on that issue.
+    """
+    user_id = get_current_user_id()
+
+    issue = fetch_issue(issue_id)
+
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    project_id = issue["project_id"]
+
+    user_role = get_project_role(project_id, user_id)
+    if not can_modify_issue(issue, user_id, user_role):
+        return jsonify({"error": "Insufficient permissions to modify this issue"}), 403
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                DELETE FROM issue_labels
+                WHERE issue_id = %s AND label_id = %s
+                """,
+                (issue_id, label_id)
+            )
+            if cursor.rowcount == 0:
+                conn.rollback()
+                return jsonify({"error": "Label not found on this issue"}), 404
+        conn.commit()
+        invalidate_issues([issue_id])
+    except Exception as e:
+        conn.rollback()
+        return jsonify({"error": "Failed to remove label", "details": str(e)}), 400
+
+    return jsonify({"success": True}), 200
+
+
+# L7
+@bp.route("/issues/<int:issue_id>/labels", methods=["PUT"])
+@login_required
+def set_issue_labels(issue_id: int):
+    """
+    Replaces the full label set of an issue.
+
+    Same permissions as adding a single label: project LEAD or the issue assignee.
+
+    Body:
+    {
+        "label_ids": [<label_id>, ...]     (empty array removes every label)
+    }
+
+    Returns the issue's final labels, sorted by name
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True) or {}
+
+    label_ids, error = parse_id_list(data.get("label_ids"), "label_ids", current_app.config["LABEL_BULK_MAX_ITEMS"])
+    if error:
+        return error
+
+    issue = fetch_issue(issue_id)
+    if not issue:
+        return jsonify({"error": "Issue not found"}), 404
+
+    visibility_error = ensure_issue_visible(issue, user_id)
+    if visibility_error:
+        return visibility_error
+
+    project_id = issue["project_id"]
+
+    user_role = get_project_role(project_id, user_id)
+    if not can_modify_issue(issue, user_id, user_role):
+        return jsonify({"error": "Insufficient permissions to modify this issue"}), 403
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            labels = []
+            if label_ids:
+                placeholders = ", ".join(["%s"] * len(label_ids))
+                cursor.execute(
+                    f"""
+                    SELECT label_id, name FROM labels
+                    WHERE project_id = %s AND label_id IN ({placeholders})
+                    ORDER BY name ASC
+                    """,
+                    [project_id, *label_ids]
+                )
+                labels = cursor.fetchall()
+
+                missing = set(label_ids) - {label["label_id"] for label in labels}
+                if missing:
+                    conn.rollback()
+                    return jsonify({
+                        "error": "Some labels do not belong to this project",
+                        "invalid_label_ids": sorted(missing)
+                    }), 400
+
+                cursor.execute(
+                    f"""
+                    DELETE FROM issue_labels
+                    WHERE issue_id = %s AND label_id NOT IN ({placeholders})
+                    """,
+                    [issue_id, *label_ids]
+                )
+                cursor.execute(
+                    "INSERT IGNORE INTO issue_labels (issue_id, label_id) VALUES "
+                    + ", ".join(["(%s, %s)"] * len(label_ids)),
+                    [value for label_id in label_ids for value in (issue_id, label_id)]
+                )
+            else:
+                cursor.execute("DELETE FROM issue_labels WHERE issue_id = %s", (issue_id,))
+        conn.commit()
+        invalidate_issues([issue_id])
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Failed to set labels", "details": str(e)}), 400
+
+    return write_response(
+        {"issue_id": issue_id, "labels": labels},
+        {"issue_id": issue_id}
+    )
+
+# L8
+@bp.route("/projects/<int:project_id>/labels/bulk", methods=["POST"])
+@require_project_role(["LEAD", "DEVELOPER"])
+def bulk_update_issue_labels(project_id: int):
+    """
+    Adds and/or removes labels across many issues of a project at once, e.g. during triage.
+
+    Body:
+    {
+        "issue_ids": [<issue_id>, ...],
+        "add": [<label_id>, ...],       [optional]
+        "remove": [<label_id>, ...]     [optional]
+    }
+
+    All-or-nothing: every issue must be in the project and modifiable by the caller
+    (LEADs: any issue, DEVELOPERs: issues assigned to them), and every label must belong
+    to the project. A label in both "add" and "remove" is removed.
+
+    Returns the final labels of every issue:
+    {
+        "project_id": <project_id>,
+        "issues": [{"issue_id": <issue_id>, "labels": [{"label_id": .., "name": ..}, ...]}, ...]
+    }
+    """
+    user_id = get_current_user_id()
+    data = request.get_json(force=True) or {}
+    max_items = current_app.config["LABEL_BULK_MAX_ITEMS"]
+
+    issue_ids, error = parse_id_list(data.get("issue_ids"), "issue_ids", max_items)
+    if error:
+        return error
+    add_ids, error = parse_id_list(data.get("add", []), "add", max_items)
+    if error:
+        return error
+    remove_ids, error = parse_id_list(data.get("remove", []), "remove", max_items)
+    if error:
+        return error
+
+    removed = set(remove_ids)
+    add_ids = [label_id for label_id in add_ids if label_id not in removed]
+    if not issue_ids or not (add_ids or remove_ids):
+        return jsonify({"error": "issue_ids and at least one label to add or remove are required"}), 400
+
+    if len(issue_ids) * len(add_ids) > current_app.config["LABEL_BULK_MAX_LINKS"]:
+        return jsonify({"error": f"At most {current_app.config['LABEL_BULK_MAX_LINKS']} labels can be attached per request"}), 400
+
+    role = get_project_role(project_id, user_id)
+    issue_placeholders = ", ".join(["%s"] * len(issue_ids))
+    label_ids = [*add_ids, *remove_ids]
+    label_placeholders = ", ".join(["%s"] * len(label_ids))
+
+    conn = get_db()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT issue_id, project_id, assignee_id FROM issues
+                WHERE project_id = %s AND issue_id IN ({issue_placeholders})
+                """,
+                [project_id, *issue_ids]
+            )
+            issues = cursor.fetchall()
+
+            missing = set(issue_ids) - {issue["issue_id"] for issue in issues}
+            if missing:
+                conn.rollback()
+                return jsonify({
+                    "error": "Some issues do not belong to this project",
+                    "invalid_issue_ids": sorted(missing)
+                }), 400
+
+            forbidden = [issue["issue_id"] for issue in issues if not can_modify_issue(issue, user_id, role)]
+            if forbidden:
+                conn.rollback()
+                return jsonify({
+                    "error": "Insufficient permissions to modify some issues",
+                    "forbidden_issue_ids": sorted(forbidden)
+                }), 403
+
+            cursor.execute(
+                f"""
+                SELECT label_id FROM labels
+                WHERE project_id = %s AND label_id IN ({label_placeholders})
+                """,
+                [project_id, *label_ids]
+            )
+            missing = set(label_ids) - {row["label_id"] for row in cursor.fetchall()}
+            if missing:
+                conn.rollback()
+                return jsonify({
+                    "error": "Some labels do not belong to this project",
+                    "invalid_label_ids": sorted(missing)
+                }), 400
+
+            if remove_ids:
+                cursor.execute(
+                    f"""
+                    DELETE FROM issue_labels
+                    WHERE issue_id IN ({issue_placeholders})
+                        AND label_id IN ({", ".join(["%s"] * len(remove_ids))})
+                    """,
+                    [*issue_ids, *remove_ids]
+                )
+
+            if add_ids:
+                pairs = [(issue_id, label_id) for issue_id in issue_ids for label_id in add_ids]
+                cursor.execute(
+                    "INSERT IGNORE INTO issue_labels (issue_id, label_id) VALUES "
+                    + ", ".join(["(%s, %s)"] * len(pairs)),
+                    [value for pair in pairs for value in pair]
+                )
+        conn.commit()
+        invalidate_issues(issue_ids)
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Bulk label update failed", "details": str(e)}), 400
+
+    # Final labels for every issue in one query
+    labeled = None if prefers_minimal() else attach_labels_to_issues(
+        conn, [{"issue_id": issue_id} for issue_id in issue_ids]
+    )
+
+    return write_response(
+        {"project_id": project_id, "issues": labeled},
+        {"project_id": project_id, "issue_ids": issue_ids}
+    )
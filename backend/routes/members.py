@@ -0,0 +1,331 @@
+"""Project membership management (M1-M4)"""
+from flask import Blueprint, current_app, request, jsonify
+from db import get_db, get_read_db
+from auth_utils import (login_required, get_current_user_id, require_project_role, get_project_role,
+                        is_visible_to_user)
+from jobs import enqueue_job
+from member_removal import reassign_member_issues
+from issue_cache import invalidate_issues
+from pymysql.err import IntegrityError
+
+bp = Blueprint("members", __name__)
+
+
+#######################################
+#        Membership Management        #
+#######################################
+
+# M1
+@bp.route("/projects/<int:project_id>/members", methods=["GET"])
+@login_required
+def list_project_members(project_id: int):
+    """Lists all members of a project"""
+    user_id = get_current_user_id()
+
+    visible, err = is_visible_to_user(project_id, user_id)
+    if not visible:
+        if err == 404:
+            return jsonify({"error": "Project not found"}), 404
+        elif err == 403:
+            return jsonify({"error": "Not authorized to access this project"}), 403
+        else:
+            return jsonify({"error": "Unable to verify project membership/visibility"}), 400
+
+
+    conn = get_read_db()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT pm.user_id, u.username, u.first_name, u.last_name, pm.role, pm.joined_at
+            FROM project_memberships pm JOIN users u ON u.user_id = pm.user_id
+            WHERE pm.project_id = %s
+            ORDER BY
+                CASE pm.role
+                    WHEN 'LEAD' THEN 1
+                    WHEN 'DEVELOPER' THEN 2
+                    ELSE 3
+                END,
+                u.username
+            """,
+            (project_id,)
+        )
+
+        members = cursor.fetchall()
+
+    return jsonify({
+        "project_id": project_id,
+        "members": members
+    }), 200
+
+# M2
+@bp.route("/projects/<int:project_id>/members", methods=["POST"])
+@require_project_role(["LEAD"])
+def add_user_to_project(project_id: int):
+    """
+    Adds a user to a project with a given role.
+    Expects an identifier (username or email) and a role: LEAD|DEVELOPER|VIEWER
+    """
+    data = request.get_json(force=True)
+    identifier = data.get("identifier")
+    role = str(data.get("role"))
+
+    if not identifier or not role:
+        return jsonify({"error": "Requires user identifier and role"}), 400
+
+    if role.lower() not in ("lead", "developer", "viewer"):
+        return jsonify({"error": "Invalid role"}), 400
+
+    role = role.upper()
+
+    conn = get_db()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT user_id FROM users
+                WHERE username = %s OR email = %s
+                """,
+                (identifier, identifier)
+            )
+            new_user_id = cursor.fetchone()
+            if new_user_id is None:
+                conn.rollback()
+                return jsonify({"error": "User not found"}), 404
+
+            new_user_id = new_user_id["user_id"]
+
+            cursor.execute(
+                """
+                INSERT INTO project_memberships (project_id, user_id, role)
+                VALUES (%s, %s, %s)
+                """,
+                (project_id, new_user_id, role)
+            )
+        conn.commit()
+
+    except IntegrityError as e:
+        conn.rollback()
+        if e.args[0] == 1062:
+            return jsonify({"error": "User is already a member of this project"}), 409
+        return jsonify({"error": "Membership update failed", "details": str(e)}), 400
+
+    return jsonify({
+        "user_id": new_user_id,
+        "project_id": project_id,
+        "role": role
+    })
+
+# M3
+@bp.route("/projects/<int:project_id>/members/<int:member_id>", methods=["PATCH"])
+@require_project_role(["LEAD"])
+def change_member_role(project_id: int, member_id: int):
+    """
+    Changes role of an existing member in a project.
+
+    Caller must be a project LEAD, target user must be a project member,
+    and you cannot demote the last LEAD to a non-LEAD role
+    """
+    acting_user_id = get_current_user_id()
+    data = request.get_json(force=True)
+    new_role = str(data.get("role"))
+
+    if new_role is None:
+        return jsonify({"error": "Role is required"}), 400
+
+    new_role = str(new_role).upper()
+
+    if new_role not in ("LEAD", "DEVELOPER", "VIEWER"):
+        return jsonify({"error": "Invalid role"}), 400
+
+    conn = get_db()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT role FROM project_memberships 
+                WHERE project_id = %s AND user_id = %s
+                """,
+                (project_id, member_id)
+            )
+            membership = cursor.fetchone()
+
+            if not membership:
+                return jsonify({"error": "User is not a member of this project"}), 404
+
+            current_role = membership["role"]
+
+            # Refuse to demote the last LEAD
+            if current_role == "LEAD" and new_role != "LEAD":
+                cursor.execute(
+                    """
+                    SELECT COUNT(*) AS lead_count FROM project_memberships
+                    WHERE project_id = %s and role='LEAD'
+                    """,
+                    (project_id,)
+                )
+                row = cursor.fetchone()
+                lead_count = row["lead_count"]
+
+                if lead_count <= 1:
+                    if member_id == acting_user_id:
+                        msg = "Cannot demote yourself when you are the only lead on the project"
+                    else:
+                        msg = "Cannot demote the last lead on the project"
+
+                    return jsonify({"error": msg}), 409
+
+            cursor.execute(
+                """
+                UPDATE project_memberships
+                SET role = %s
+                WHERE project_id = %s AND user_id = %s
+                """,
+                (new_role, project_id, member_id)
+            )
+            updated = cursor.rowcount
+
+        conn.commit()
+
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Could not update role", "details": str(e)}), 400
+
+    if updated == 0:
+        # Occurs if membership is changed to the same
+        return jsonify({"message": "User already possesses that role"}), 200
+
+    return jsonify({
+        "message": "Role updated",
+        "project_id": project_id,
+        "user_id": member_id,
+        "new_role": new_role
+    }), 200
+
+# M4
+@bp.route("/projects/<int:project_id>/members/<int:member_id>", methods=["DELETE"])
+@require_project_role(["LEAD"])
+def remove_member_from_project(project_id: int, member_id: int):
+    """
+    Removes a member from a project. Allows self-removal, but does not allow
+    removal of the last LEAD on a project. Target must be a project member.
+
+    Issues assigned to the member are unassigned in batches after the membership
+    is removed. Optional query params:
+    - reassign_to=<user_id>: hand the issues to this LEAD/DEVELOPER instead
+    - defer=true: do the reassignment in a background job and return 202 with its job_id
+    """
+    acting_user_id = get_current_user_id()
+    reassign_to = request.args.get("reassign_to")
+    defer = (request.args.get("defer") or "").lower() in ("1", "true")
+
+    if reassign_to is not None:
+        try:
+            reassign_to = int(reassign_to)
+        except (TypeError, ValueError):
+            return jsonify({"error": "reassign_to must be an integer"}), 400
+
+        if reassign_to == member_id:
+            return jsonify({"error": "Cannot reassign issues to the member being removed"}), 400
+
+        if get_project_role(project_id, reassign_to) not in ("LEAD", "DEVELOPER"):
+            return jsonify({"error": "reassign_to must be a LEAD or DEVELOPER on this project"}), 400
+
+    conn = get_db()
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT role FROM project_memberships
+                WHERE project_id = %s AND user_id = %s
+                FOR UPDATE
+                """,
+                (project_id, member_id)
+            )
+            current_membership = cursor.fetchone()
+
+            if not current_membership:
+                conn.rollback()
+                return jsonify({"error": "User is not a member of this project"}), 404
+
+            current_role = current_membership["role"]
+
+            if current_role == "LEAD":
+                cursor.execute(
+                    """
+                    SELECT COUNT(*) AS lead_count FROM project_memberships
+                    WHERE project_id = %s AND role='LEAD'
+                    """,
+                    (project_id,)
+                )
+                row = cursor.fetchone()
+                lead_count = row["lead_count"]
+
+                if lead_count <= 1:
+                    if member_id == acting_user_id:
+                        msg = "Cannot leave a project as the last lead"
+                    else:
+                        msg = "Cannot remove the last lead on the project"
+
+                    conn.rollback()
+                    return jsonify({"error": msg}), 409
+
+            # Membership goes first, so the removed user can't be assigned new issues
+            # while their existing ones are being reassigned
+            cursor.execute(
+                """
+                DELETE FROM project_memberships WHERE project_id = %s AND user_id = %s
+                """,
+                (project_id, member_id)
+            )
+            deleted = cursor.rowcount
+
+        if deleted == 0:
+            conn.rollback()
+            return jsonify({"error": "Membership not found"}), 404
+
+        job_id = None
+        if defer:
+            job_id = enqueue_job(
+                conn, "reassign_member_issues",
+                {
+                    "project_id": project_id,
+                    "member_id": member_id,
+                    "reassign_to": reassign_to,
+                    "acting_user_id": acting_user_id
+                },
+                created_by=acting_user_id,
+                unique_key=f"reassign_member_issues:{project_id}:{member_id}"
+            )
+
+        conn.commit()
+
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Could not remove member from project", "details": str(e)}), 400
+
+    if defer:
+        return jsonify({
+            "message": "Member removed from project, issues are being reassigned",
+            "user_id": member_id,
+            "project_id": project_id,
+            "job_id": job_id
+        }), 202
+
+    result = reassign_member_issues(
+        conn, project_id, member_id,
+        reassign_to=reassign_to,
+        acting_user_id=acting_user_id,
+        batch_size=current_app.config["MEMBER_REASSIGN_BATCH_SIZE"],
+        on_batch=invalidate_issues
+    )
+
+    return jsonify({
+        "message": "Member removed from project",
+        "user_id": member_id,
+        "project_id": project_id,
+        **result
+    })
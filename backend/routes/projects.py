@@ -0,0 +1,425 @@
+"""Projects: listing, creation, settings and deletion (P1-P7)"""
+from flask import Blueprint, request, jsonify
+from db import get_db, get_read_db
+from auth_utils import (login_required, get_current_user_id, require_project_role, prefers_minimal,
+                        write_response, lock_project_row)
+from project_deletion import mark_project_deleting, fetch_deletion
+from jobs import enqueue_job
+from pymysql.err import IntegrityError
+
+bp = Blueprint("projects", __name__)
+
+
+####################################
+#        Project Management        #
+####################################
+
+# P1
+@bp.route("/projects", methods=["GET"])
+@login_required
+def list_projects():
+    """Returns visible projects to the logged-in user, ordered by project_key
+
+    Optional query parameters:
+        - q: case-insensitive search on project key (prefix) or name (substring)
+        - limit: page size (1-200). If omitted, all visible projects are returned
+        - after: project_key cursor, as returned in "next_cursor" of the previous page
+        - include_counts: if 1/true, adds "issue_counts" by status to each project
+        - include_due: if 1/true, adds "due_counts" (overdue and at-risk open issues, as of
+          the last due date scan) to each project
+
+    The listing is the union of two index-driven queries - the user's memberships, and
+    public projects the user isn't a member of - rather than a join over every project.
+    """
+
+    user_id = get_current_user_id()
+
+    q = (request.args.get("q") or "").strip()
+    after = request.args.get("after")
+    raw_limit = request.args.get("limit")
+    include_counts = (request.args.get("include_counts") or "").lower() in ("1", "true")
+    include_due = (request.args.get("include_due") or "").lower() in ("1", "true")
+
+    limit = None
+    if raw_limit is not None:
+        try:
+            limit = int(raw_limit)
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        if not 1 <= limit <= 200:
+            return jsonify({"error": "limit must be between 1 and 200"}), 400
+
+    filters = ""
+    filter_params = []
+    if after:
+        filters += " AND p.project_key > %s"
+        filter_params.append(after)
+    if q:
+        escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        filters += " AND (p.project_key LIKE %s OR p.name LIKE %s)"
+        filter_params.extend([escaped + "%", "%" + escaped + "%"])
+
+    # Each half is limited on its own so neither reads past the page it can contribute
+    branch_limit = ""
+    branch_limit_params = []
+    if limit is not None:
+        branch_limit = " LIMIT %s"
+        branch_limit_params = [limit + 1]
+
+    sql = f"""
+        (
+            SELECT p.project_id, p.project_key, p.name, p.description, p.is_public, p.created_by, p.created_at, pm.role AS user_role
+            FROM project_memberships pm
+            JOIN projects p ON p.project_id = pm.project_id
+            WHERE pm.user_id = %s AND p.deleting_at IS NULL{filters}
+            ORDER BY p.project_key ASC{branch_limit}
+        )
+        UNION ALL
+        (
+            SELECT p.project_id, p.project_key, p.name, p.description, p.is_public, p.created_by, p.created_at, NULL AS user_role
+            FROM projects p
+            WHERE p.is_public = 1 AND p.deleting_at IS NULL{filters}
+                AND NOT EXISTS (
+                    SELECT 1 FROM project_memberships pm
+                    WHERE pm.project_id = p.project_id AND pm.user_id = %s
+                )
+            ORDER BY p.project_key ASC{branch_limit}
+        )
+        ORDER BY project_key ASC{branch_limit}
+    """
+    params = [
+        user_id, *filter_params, *branch_limit_params,
+        *filter_params, user_id, *branch_limit_params,
+        *branch_limit_params
+    ]
+
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1]["project_key"]
+
+        if include_counts and rows:
+            project_ids = [row["project_id"] for row in rows]
+            placeholders = ", ".join(["%s"] * len(project_ids))
+            cursor.execute(
+                f"""
+                SELECT project_id, status, issue_count
+                FROM project_issue_counts
+                WHERE project_id IN ({placeholders})
+                """,
+                project_ids
+            )
+            count_rows = cursor.fetchall()
+
+            counts_by_project_id = {}
+            for row in count_rows:
+                counts_by_project_id.setdefault(row["project_id"], {})[row["status"]] = row["issue_count"]
+
+            for project in rows:
+                counts = counts_by_project_id.get(project["project_id"], {})
+                project["issue_counts"] = {
+                    status: counts.get(status, 0)
+                    for status in ("OPEN", "IN_PROGRESS", "RESOLVED", "CLOSED")
+                }
+
+        if include_due and rows:
+            project_ids = [row["project_id"] for row in rows]
+            placeholders = ", ".join(["%s"] * len(project_ids))
+            cursor.execute(
+                f"""
+                SELECT project_id, overdue_count, at_risk_count
+                FROM project_due_counts
+                WHERE project_id IN ({placeholders})
+                """,
+                project_ids
+            )
+            due_by_project_id = {row["project_id"]: row for row in cursor.fetchall()}
+
+            for project in rows:
+                due = due_by_project_id.get(project["project_id"], {})
+                project["due_counts"] = {
+                    "overdue": due.get("overdue_count", 0),
+                    "at_risk": due.get("at_risk_count", 0)
+                }
+
+    return jsonify({"projects": rows, "next_cursor": next_cursor}), 200
+
+
+# P2
+@bp.route("/projects", methods=["POST"])
+@login_required
+def create_project():
+    """ 
+    Create project and set current user as lead 
+
+    Requires project_key, name, and optionally is_public and description.
+    is_public defaults to 1 if not provided
+    """
+
+    user_id = get_current_user_id()
+    data = request.get_json(force=True) or {}
+    conn = get_db()
+
+    project_key = data.get("project_key")
+    project_name = data.get("name")
+    project_description = data.get("description")
+    raw = data.get("is_public")
+
+    if raw is None:
+        is_public = 1
+    elif isinstance(raw, bool):
+        is_public = 1 if raw else 0
+    elif isinstance(raw, int) and raw in (0, 1):
+        is_public = raw
+    elif isinstance(raw, str) and raw.lower() in ("0", "1", "true", "false"):
+        is_public = 1 if raw.lower() in ("1", "true") else 0
+    else: 
+        return jsonify({"error": "Invalid is_public value"}), 400
+
+    if not project_key or not project_name:
+        return jsonify({"error": "Project key and name are required"}), 400
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO projects (project_key, name, description, is_public, created_by)
+                VALUES (%s, %s, %s, %s, %s)
+                """,
+                (project_key, project_name, project_description, is_public, user_id)
+            )
+
+            project_id = cursor.lastrowid
+
+            cursor.execute(
+                """
+                INSERT INTO project_memberships (project_id, user_id, role)
+                VALUES (%s, %s, 'LEAD')
+                """,
+                (project_id, user_id)
+            )
+
+        conn.commit()
+
+    except IntegrityError as e:
+        conn.rollback()
+
+        if "uq_project_key" in str(e):
+            return jsonify({"error": "Project key already exists"}), 409
+
+        return jsonify({"error": "Unable to create project", "details": str(e)}), 400
+
+
+    return jsonify({
+        "message": "Project created",
+        "project": {
+            "project_id": project_id,
+            "project_key": project_key,
+            "name": project_name,
+            "description": project_description,
+            "is_public": is_public,
+            "created_by": user_id
+        }
+    }), 201
+
+# P3
+@bp.route("/projects/<int:project_id>", methods=["GET"])
+@login_required
+def get_project(project_id: int):
+    """
+    Return a single project, if that project is visible to the user
+
+    Public projects are visible to all users, while private projects are only
+    visible to members of that project.
+    """
+    user_id = get_current_user_id()
+    conn = get_read_db()
+
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT p.project_id, p.project_key, p.name, p.description, p.is_public, p.created_by, p.created_at, pm.role AS user_role
+            FROM projects p
+            LEFT JOIN project_memberships pm ON p.project_id = pm.project_id AND pm.user_id = %s
+            WHERE p.project_id = %s AND p.deleting_at IS NULL AND (p.is_public = 1 OR pm.role IS NOT NULL)
+            """,
+            (user_id, project_id)
+        )
+
+        row = cursor.fetchone()
+
+    # If no row is returned, it means either:
+    # - project doesn't exist
+    # - project is private and user is not a member
+    if not row:
+        return jsonify({"error": "Project not found"}), 404
+
+    return jsonify({"project": row}), 200
+
+# P4
+@bp.route("/projects/<int:project_id>", methods=["PATCH"])
+@require_project_role(["LEAD"])
+def edit_project(project_id: int):
+    """
+    Allows a project lead to change the name, key, or description of a project
+
+    project_key must be unique - throw 409 if already present in db
+    """
+    conn = get_db()
+    data = request.get_json(force=True) or {}
+
+    new_name = data.get("name")
+    new_description = data.get("description")
+    new_key = data.get("project_key")
+
+    if not any((new_name, new_description, new_key)):
+        return jsonify({"error": "No new attributes provided"}), 400
+
+    fields = []
+    params = []
+
+    if new_name is not None:
+        fields.append("name = %s")
+        params.append(new_name)
+    if new_description is not None:
+        fields.append("description = %s")
+        params.append(new_description)
+    if new_key is not None:
+        fields.append("project_key = %s")
+        params.append(new_key)
+
+    params.append(project_id)
+
+    sql = "UPDATE projects SET " + ", ".join(fields) + " WHERE project_id = %s"
+    minimal = prefers_minimal()
+
+    try:
+        with conn.cursor() as cursor:
+            project = None if minimal else lock_project_row(cursor, project_id)
+            cursor.execute(sql, tuple(params))
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        if e.args[0] == 1062:
+            return jsonify({"error": "Project key already in use"}), 409
+        return jsonify({"error": "Integrity error", "details": str(e)}), 400
+
+    if project is not None:
+        for field, value in (("name", new_name), ("description", new_description), ("project_key", new_key)):
+            if value is not None:
+                project[field] = value
+
+    return write_response({"project": project}, {"project_id": project_id})
+
+# P5
+@bp.route("/projects/<int:project_id>/visibility", methods=["PATCH"])
+@require_project_role(["LEAD"])
+def update_visibility(project_id: int):
+    data = request.get_json(force=True) or {}
+
+    raw = data.get("is_public")
+
+    if raw is None:
+        return jsonify({"error": "is_public must be provided"}), 400
+
+    if isinstance(raw, bool):
+        is_public = 1 if raw else 0
+
+    elif isinstance(raw, int) and raw in (0,1):
+        is_public = raw
+
+    elif isinstance(raw, str) and raw.lower() in ("0", "1", "true", "false"):
+        is_public = 1 if raw.lower() in ("1", "true") else 0
+
+    else:
+        return jsonify({"error": "Invalid is_public (must be boolean or 0/1)"}), 400
+
+    conn = get_db()
+    minimal = prefers_minimal()
+    try:
+        with conn.cursor() as cursor:
+            project = None if minimal else lock_project_row(cursor, project_id)
+            cursor.execute(
+                """
+                UPDATE projects SET is_public = %s WHERE project_id = %s
+                """,
+                (is_public, project_id)
+            )
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Integrity error", "details": str(e)}), 400
+
+    if project is not None:
+        project["is_public"] = is_public
+
+    return write_response({"project": project}, {"project_id": project_id})
+
+# P6
+@bp.route("/projects/<int:project_id>", methods=["DELETE"])
+@require_project_role(["LEAD"])
+def delete_project(project_id: int):
+    """
+    Deletes a project, assuming current user is a project LEAD
+
+    The project is hidden immediately and then purged in bounded batches by a background
+    job (enqueued in the same transaction). Returns 202 with the deletion record and job_id;
+    progress can be polled at GET /projects/<project_id>/deletion or GET /jobs/<job_id>
+    """
+    user_id = get_current_user_id()
+    conn = get_db()
+
+    try:
+        marked = mark_project_deleting(conn, project_id, user_id)
+        if not marked:
+            # Shouldn't happen, require_project_role already saw a live project
+            conn.rollback()
+            return jsonify({"error": "Project not found"}), 404
+
+        job_id = enqueue_job(
+            conn, "delete_project", {"project_id": project_id},
+            created_by=user_id, unique_key=f"delete_project:{project_id}"
+        )
+        conn.commit()
+    except IntegrityError as e:
+        conn.rollback()
+        return jsonify({"error": "Integrity Error", "details": str(e)}), 400
+
+    return jsonify({
+        "success": True,
+        "job_id": job_id,
+        "deletion": fetch_deletion(conn, project_id)
+    }), 202
+
+# P7
+@bp.route("/projects/<int:project_id>/deletion", methods=["GET"])
+@login_required
+def get_project_deletion(project_id: int):
+    """
+    Returns progress of a project deletion:
+    {
+        "deletion": {
+            "project_id": <project_id>,
+            "project_key": "<key>",
+            "status": "PENDING"|"RUNNING"|"DONE"|"FAILED",
+            "stage": "issues"|"labels"|"project_memberships"|"done",
+            "rows_deleted": <int>,
+            ...
+        }
+    }
+
+    Only visible to the user who requested the deletion.
+    """
+    user_id = get_current_user_id()
+    conn = get_db()
+
+    deletion = fetch_deletion(conn, project_id)
+    if not deletion or deletion["requested_by"] != user_id:
+        return jsonify({"error": "Deletion not found"}), 404
+
+    return jsonify({"deletion": deletion}), 200
@@ -0,0 +1,30 @@
+"""Public user summaries"""
+from flask import Blueprint, jsonify
+from db import get_read_db
+from auth_utils import login_required
+
+bp = Blueprint("users", __name__)
+
+
+#######################
+#        USERS        #
+#######################
+@bp.route("/users/<int:user_id>", methods=["GET"])
+@login_required
+def get_user_summary(user_id: int):
+    conn = get_read_db()
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT user_id, username, first_name, last_name
+            FROM users
+            WHERE user_id = %s
+            """,
+            (user_id,)
+        )
+        row = cursor.fetchone()
+
+    if not row:
+        return jsonify({"error": "User not found"}), 404
+
+    return jsonify({"user": row}), 200
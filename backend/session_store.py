@@ -0,0 +1,310 @@
+import hashlib
+import heapq
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+from db import get_db
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """
+    Session whose data lives in a session backend. The cookie only carries an opaque token.
+
+    clear() marks the session for rotation, so the token is replaced on the next save
+    (login calls session.clear() before setting user_id, which also prevents fixation).
+    """
+    def __init__(self, initial=None, token=None, expires_at=0.0):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.token = token
+        self.expires_at = expires_at
+        self.cleared = False
+        self.modified = False
+
+    def clear(self):
+        super().clear()
+        self.cleared = True
+
+
+##################################
+#        SESSION BACKENDS        #
+##################################
+class MemorySessionBackend:
+    """
+    In-process LRU session store, suitable for a single API process.
+
+    Sessions beyond `max_entries` are evicted least recently used first. Expiry is
+    tracked separately in a heap ordered by expires_at, so purge_expired() finds every
+    expired session whatever its lifetime or last use. Heap entries left behind by
+    re-saved or removed sessions are skipped when popped, and dropped when they
+    outnumber the live ones.
+    """
+    def __init__(self, max_entries: int = 100_000, clock=time.time):
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries = OrderedDict()   # key -> (user_id, data, expires_at)
+        self._by_user = {}              # user_id -> set of keys
+        self._expiries = []             # heap of (expires_at, key), may hold stale pairs
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        user_id, _, _ = self._entries.pop(key)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def load(self, key):
+        """Returns tuple (data, expires_at), or None if the session doesn't exist or has expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            _, data, expires_at = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return dict(data), expires_at
+
+    def save(self, key, user_id, data, expires_at):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (user_id, dict(data), expires_at)
+            if user_id is not None:
+                self._by_user.setdefault(user_id, set()).add(key)
+            heapq.heappush(self._expiries, (expires_at, key))
+
+            while len(self._entries) > self._max_entries:
+                self._remove(next(iter(self._entries)))
+
+            if len(self._expiries) > 2 * len(self._entries) + 64:
+                self._expiries = [(entry[2], k) for k, entry in self._entries.items()]
+                heapq.heapify(self._expiries)
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def delete_user(self, user_id) -> int:
+        with self._lock:
+            keys = list(self._by_user.get(user_id, ()))
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def purge_expired(self, batch_size: int) -> int:
+        purged = 0
+        now = self._clock()
+        with self._lock:
+            while purged < batch_size and self._expiries and self._expiries[0][0] <= now:
+                expires_at, key = heapq.heappop(self._expiries)
+                entry = self._entries.get(key)
+                if entry is None or entry[2] != expires_at:
+                    continue    # removed or re-saved since
+                self._remove(key)
+                purged += 1
+        return purged
+
+
+class DatabaseSessionBackend:
+    """
+    Session store backed by the `user_sessions` table, shared by every API node.
+
+    Data is stored with Flask's tagged JSON serializer so datetimes etc. round-trip.
+    Any uncommitted work left on the request connection is rolled back before writing,
+    which is what teardown would have done with it anyway.
+    """
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._serializer = TaggedJSONSerializer()
+
+    def load(self, key):
+        conn = get_db()
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT data, expires_at FROM user_sessions
+                WHERE session_key = %s AND expires_at > %s
+                """,
+                (key, self._clock())
+            )
+            row = cursor.fetchone()
+
+        if not row:
+            return None
+        return self._serializer.loads(row["data"]), row["expires_at"]
+
+    def _write(self, sql, params):
+        conn = get_db()
+        conn.rollback()
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql, params)
+                affected = cursor.rowcount
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return affected
+
+    def save(self, key, user_id, data, expires_at):
+        self._write(
+            """
+            INSERT INTO user_sessions (session_key, user_id, data, expires_at)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE user_id = VALUES(user_id), data = VALUES(data),
+                expires_at = VALUES(expires_at)
+            """,
+            (key, user_id, self._serializer.dumps(dict(data)), expires_at)
+        )
+
+    def delete(self, key):
+        self._write("DELETE FROM user_sessions WHERE session_key = %s", (key,))
+
+    def delete_user(self, user_id) -> int:
+        return self._write("DELETE FROM user_sessions WHERE user_id = %s", (user_id,))
+
+    def purge_expired(self, batch_size: int) -> int:
+        return self._write(
+            "DELETE FROM user_sessions WHERE expires_at <= %s LIMIT %s",
+            (self._clock(), batch_size)
+        )
+
+
+SESSION_BACKENDS = {
+    "memory": MemorySessionBackend,
+    "database": DatabaseSessionBackend,
+}
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface that keeps session data in a backend, keyed by a hash of the
+    cookie token (so a leaked session table doesn't hand out live sessions).
+
+    Sessions slide: they are re-saved with a fresh expiry once less than half of
+    `ttl` remains, rather than on every request. Expired sessions are purged in
+    batches of `purge_batch`, at most once per `purge_interval` seconds per process.
+    """
+    def __init__(self, backend, ttl: int, purge_interval: int, purge_batch: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self.purge_batch = purge_batch
+        self._next_purge = 0.0
+        self._purge_lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _maybe_purge(self):
+        now = time.time()
+        if now < self._next_purge or not self._purge_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_purge = now + self.purge_interval
+            self.backend.purge_expired(self.purge_batch)
+        finally:
+            self._purge_lock.release()
+
+    def open_session(self, app, request):
+        self._maybe_purge()
+
+        token = request.cookies.get(self.get_cookie_name(app))
+        if token:
+            entry = self.backend.load(self._key(token))
+            if entry is not None:
+                data, expires_at = entry
+                return ServerSideSession(data, token=token, expires_at=expires_at)
+
+        return ServerSideSession()
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.cleared and session.token:
+            self.backend.delete(self._key(session.token))
+
+        if not session:
+            if session.token and (session.modified or session.cleared):
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        token = session.token
+        if session.cleared or token is None:
+            token = secrets.token_urlsafe(32)
+
+        needs_refresh = session.expires_at - now < self.ttl / 2
+        if not (session.modified or token != session.token or needs_refresh):
+            return
+
+        expires_at = now + self.ttl
+        self.backend.save(self._key(token), session.get("user_id"), dict(session), expires_at)
+
+        response.set_cookie(
+            name,
+            token,
+            expires=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+        response.vary.add("Cookie")
+
+
+##################################
+#        HELPER FUNCTIONS        #
+##################################
+def init_session_store(app, backend=None):
+    """
+    Installs server-side sessions unless SESSION_BACKEND is 'cookie' (Flask's signed
+    cookie sessions). `backend` overrides the configured backend.
+    """
+    name = app.config.get("SESSION_BACKEND", "memory")
+    if backend is None:
+        if name == "cookie":
+            return None
+        if name not in SESSION_BACKENDS:
+            raise RuntimeError(f"Unknown SESSION_BACKEND '{name}'")
+        if name == "memory":
+            backend = MemorySessionBackend(max_entries=app.config.get("SESSION_MAX_ENTRIES", 100_000))
+        else:
+            backend = SESSION_BACKENDS[name]()
+
+    app.session_interface = ServerSideSessionInterface(
+        backend,
+        ttl=app.config.get("SESSION_TTL", 7 * 24 * 3600),
+        purge_interval=app.config.get("SESSION_PURGE_INTERVAL", 60),
+        purge_batch=app.config.get("SESSION_PURGE_BATCH", 1000),
+    )
+    return backend
+
+def revoke_user_sessions(app, user_id) -> int:
+    """
+    Deletes every server-side session belonging to user_id. Returns the number of sessions
+    removed, or None if sessions are cookie-based and can't be revoked.
+    """
+    interface = app.session_interface
+    if not isinstance(interface, ServerSideSessionInterface):
+        return None
+    return interface.backend.delete_user(user_id)
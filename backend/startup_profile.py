@@ -0,0 +1,109 @@
+"""
+Cold-start profiling for the API. Each run starts a fresh interpreter, times the
+imports of the heavy dependencies, then create_app() phase by phase:
+
+    python startup_profile.py                           # one cold start
+    python startup_profile.py --runs 5 --budget-ms 600  # median of 5 runs, exit 1 if over budget
+
+The budget check is meant for CI. create_app() also logs its phases at startup when
+STARTUP_PROFILE=1.
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Imported in this order, each timed on its own (later entries exclude what earlier ones loaded)
+IMPORT_PHASES = (
+    ("import flask", "flask"),
+    ("import flask_cors", "flask_cors"),
+    ("import pymysql", "pymysql"),
+    ("import app modules", "app"),
+)
+
+# Loaded on first use rather than at startup, shown for reference only
+LAZY_IMPORTS = (
+    ("bcrypt (first login/registration)", "bcrypt"),
+)
+
+
+class StartupTimer:
+    """Records how long each named phase of startup took (milliseconds)"""
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._last = clock()
+        self.phases = []
+
+    def mark(self, name: str):
+        """Ends the phase `name`, which started at the previous mark"""
+        now = self._clock()
+        self.phases.append((name, (now - self._last) * 1000))
+        self._last = now
+
+    def report(self) -> str:
+        total = sum(ms for _, ms in self.phases)
+        lines = [f"  {name:<36}{ms:8.1f} ms" for name, ms in self.phases]
+        return "\n".join([*lines, f"  {'total':<36}{total:8.1f} ms"])
+
+
+def _profile_once() -> dict:
+    """Runs in a fresh interpreter: times the imports and create_app(), returns {phase: ms}"""
+    timer = StartupTimer()
+    for name, module in IMPORT_PHASES:
+        importlib.import_module(module)
+        timer.mark(name)
+
+    app = sys.modules["app"].create_app()
+    timer.mark("create_app")
+    phases = dict(timer.phases)
+    phases.update({f"  {name}": ms for name, ms in app.extensions["itms_startup_profile"]})
+
+    for name, module in LAZY_IMPORTS:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            continue
+        phases[f"[lazy] {name}"] = (time.perf_counter() - started) * 1000
+    return phases
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure ITMS API cold-start time")
+    parser.add_argument("--runs", type=int, default=1, help="Cold starts to measure (median is reported)")
+    parser.add_argument("--budget-ms", type=float, default=None,
+                        help="Exit with status 1 if the median startup (imports + create_app) exceeds this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_profile_once()))
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    runs = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child"],
+            cwd=here, check=True, capture_output=True, text=True
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+
+    top_level = [name for name, _ in IMPORT_PHASES] + ["create_app"]
+    for name in runs[0]:
+        ms = statistics.median(run[name] for run in runs)
+        print(f"{name:<44}{ms:8.1f} ms")
+
+    total = statistics.median(sum(run[name] for name in top_level) for run in runs)
+    print(f"{'startup total (median of ' + str(len(runs)) + ')':<44}{total:8.1f} ms")
+
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"Startup took {total:.1f} ms, over the {args.budget_ms:.0f} ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from jobs import job_handler
+from project_deletion import run_project_deletion
+from history_archive import archive_history, rotate_archive_partitions
+from member_removal import reassign_member_issues
+from issue_cache import shared_issue_cache
+from due_scanner import scan_due_issues, schedule_due_scan
+from project_stats import rebuild_project_stats
+
+##################################
+#          JOB HANDLERS          #
+##################################
+# Importing this module registers every job kind with the queue. Handlers run on
+# a connection of their own (ctx.conn) and should report progress periodically,
+# which also serves as the job's heartbeat.
+
+@job_handler("delete_project")
+def delete_project_job(ctx, payload):
+    """Purges a project previously marked as deleting. Payload: {"project_id": <id>}"""
+    project_id = payload["project_id"]
+
+    deletion = run_project_deletion(
+        ctx.conn,
+        project_id,
+        batch_size=ctx.config.get("PROJECT_DELETE_BATCH_SIZE", 500),
+        on_progress=lambda stage, rows_deleted: ctx.progress(stage=stage, rows_deleted=rows_deleted)
+    )
+    return {"project_id": project_id, "rows_deleted": deletion["rows_deleted"] if deletion else 0}
+
+
+@job_handler("rebuild_stats")
+def rebuild_stats_job(ctx, payload):
+    """Recomputes issue counts/statistics, a project at a time. Payload: {"project_id": <id>|null}"""
+    project_id = payload.get("project_id")
+
+    rebuilt = rebuild_project_stats(
+        ctx.conn,
+        project_id,
+        on_progress=lambda done, total: ctx.progress(projects_rebuilt=done, projects_total=total)
+    )
+    return {"project_id": project_id, **rebuilt}
+
+
+@job_handler("archive_history")
+def archive_history_job(ctx, payload):
+    """
+    Moves old issue history into the archive table and rotates its partitions.
+    Payload: {"older_than_days": <days>|null} (null: HISTORY_HOT_DAYS)
+    """
+    older_than_days = payload.get("older_than_days") or ctx.config.get("HISTORY_HOT_DAYS", 180)
+
+    rotated = rotate_archive_partitions(
+        ctx.conn,
+        older_than_days,
+        months_ahead=ctx.config.get("HISTORY_PARTITIONS_AHEAD", 3),
+        retention_days=ctx.config.get("HISTORY_RETENTION_DAYS", 0)
+    )
+    archived = archive_history(
+        ctx.conn,
+        older_than_days,
+        batch_size=ctx.config.get("HISTORY_ARCHIVE_BATCH_SIZE", 1000),
+        on_progress=lambda total: ctx.progress(rows_archived=total)
+    )
+    return {"rows_archived": archived, **rotated}
+
+
+@job_handler("reassign_member_issues")
+def reassign_member_issues_job(ctx, payload):
+    """
+    Unassigns (or reassigns) a removed member's issues in batches.
+    Payload: {"project_id": <id>, "member_id": <id>, "reassign_to": <id>|null, "acting_user_id": <id>}
+    """
+    cache = shared_issue_cache(ctx.config)
+    return reassign_member_issues(
+        ctx.conn,
+        payload["project_id"],
+        payload["member_id"],
+        reassign_to=payload.get("reassign_to"),
+        acting_user_id=payload.get("acting_user_id"),
+        batch_size=ctx.config.get("MEMBER_REASSIGN_BATCH_SIZE", 500),
+        on_progress=lambda total: ctx.progress(issues_updated=total),
+        on_batch=cache.delete_many if cache is not None else None
+    )
+
+
+@job_handler("scan_due_dates")
+def scan_due_dates_job(ctx, payload):
+    """
+    Records overdue and at-risk issues for dashboards, then schedules the next scan
+    DUE_SCAN_INTERVAL seconds on. Payload: {"at_risk_days": <days>|null} (null: DUE_SCAN_AT_RISK_DAYS)
+    """
+    at_risk_days = payload.get("at_risk_days")
+    if at_risk_days is None:
+        at_risk_days = ctx.config.get("DUE_SCAN_AT_RISK_DAYS", 3)
+
+    result = scan_due_issues(
+        ctx.conn,
+        at_risk_days,
+        batch_size=ctx.config.get("DUE_SCAN_BATCH_SIZE", 1000),
+        on_progress=lambda total: ctx.progress(issues_scanned=total)
+    )
+    # Committed by the worker together with the scan's last writes
+    schedule_due_scan(ctx.conn, ctx.config.get("DUE_SCAN_INTERVAL", 0))
+    return result
@@ -0,0 +1,52 @@
+import argparse
+import logging
+import signal
+from config import Config
+from jobs import start_workers
+from due_scanner import ensure_due_scan_scheduled
+import tasks  # noqa: F401 - registers job handlers
+
+
+def load_config():
+    """Config as a plain dict, the same values create_app() would load"""
+    return {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+
+
+def main():
+    """
+    Background job worker entry point. Runs alongside the API, against the same database:
+
+        python worker.py --concurrency 4
+        python worker.py --burst              # drain the queue, then exit
+        python worker.py --kinds delete_project,rebuild_stats
+    """
+    cfg = load_config()
+
+    parser = argparse.ArgumentParser(description="ITMS background job worker")
+    parser.add_argument("--concurrency", type=int, default=cfg.get("JOB_WORKER_CONCURRENCY", 2),
+                        help="Number of jobs processed in parallel")
+    parser.add_argument("--kinds", default="", help="Comma-separated job kinds to process (default: all)")
+    parser.add_argument("--burst", action="store_true", help="Exit once no runnable jobs remain")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    ensure_due_scan_scheduled(cfg)
+
+    kinds = [kind.strip() for kind in args.kinds.split(",") if kind.strip()] or None
+    threads, stop_event = start_workers(cfg, args.concurrency, kinds=kinds, burst=args.burst)
+
+    def shutdown(signum, frame):
+        logging.getLogger("itms.jobs").info("Stopping after current jobs finish...")
+        stop_event.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(timeout=1)
+
+
+if __name__ == "__main__":
+    main()
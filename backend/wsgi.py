@@ -0,0 +1,20 @@
+"""
+Production WSGI entry point:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+(or `uwsgi --module wsgi:app --master --processes 4 --threads 8`). `python app.py` is
+only meant for local development.
+"""
+from app import create_app
+from db import reinit_db_pools
+
+app = create_app()
+
+# uWSGI forks workers from this process too; give each one its own connection pools
+try:
+    from uwsgidecorators import postfork
+except ImportError:
+    pass
+else:
+    postfork(lambda: reinit_db_pools(app))
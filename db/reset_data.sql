@@ -3,12 +3,22 @@ USE itms;
 SET FOREIGN_KEY_CHECKS = 0;
 
 TRUNCATE TABLE issue_history;
+TRUNCATE TABLE issue_history_archive;
+TRUNCATE TABLE project_issue_counts;
+TRUNCATE TABLE project_issue_stats;
+TRUNCATE TABLE label_usage_counts;
+TRUNCATE TABLE issue_due_alerts;
+TRUNCATE TABLE project_due_counts;
 TRUNCATE TABLE comments;
 TRUNCATE TABLE issue_labels;
 TRUNCATE TABLE labels;
 TRUNCATE TABLE issues;
 TRUNCATE TABLE project_memberships;
 TRUNCATE TABLE projects;
+TRUNCATE TABLE project_deletions;
+TRUNCATE TABLE jobs;
 TRUNCATE TABLE users;
+TRUNCATE TABLE rate_limit_buckets;
+TRUNCATE TABLE user_sessions;
 
 SET FOREIGN_KEY_CHECKS = 1;
\ No newline at end of file
@@ -6,6 +6,8 @@ DELIMITER $$
     - Ensures initial status is 'OPEN'
     - Accepts assignee and due date (both optional)
     - DB handles created_at and updated_at
+    - Returns the generated fields as a one-row result set (issue_id, issue_number,
+      created_at) so callers don't have to read the new row back
 */
 DROP PROCEDURE IF EXISTS sp_create_issue$$
 CREATE PROCEDURE sp_create_issue (
@@ -20,6 +22,7 @@ CREATE PROCEDURE sp_create_issue (
 )
 BEGIN
 	DECLARE next_issue_number INT;
+    DECLARE v_now DATETIME DEFAULT CURRENT_TIMESTAMP;
     
     START TRANSACTION;
     
@@ -39,7 +42,10 @@ BEGIN
         priority,
         reporter_id,
         assignee_id,
-        due_date
+        due_date,
+        created_at,
+        updated_at,
+        last_activity_at
 	) VALUES (
 		p_project_id,
         next_issue_number,
@@ -50,10 +56,15 @@ BEGIN
         p_priority,
         p_reporter_id,
         p_assignee_id,
-        p_due_date
+        p_due_date,
+        v_now,
+        v_now,
+        v_now
     );
     
     COMMIT;
+    
+    SELECT LAST_INSERT_ID() AS issue_id, next_issue_number AS issue_number, v_now AS created_at;
 END$$
 
 
@@ -156,4 +167,186 @@ BEGIN
         );
 	END IF;
 END$$
+
+
+/*	TRIGGERS: trg_issues_counts_*
+	- Maintain project_issue_counts (by status) and project_issue_stats (by status,
+	  priority, type and assignee) so listings and dashboards can read issue counts
+	  without a live COUNT(*) over issues
+    - Note that rows changed via ON DELETE CASCADE / SET NULL don't fire triggers. The
+	  counts of a deleted project are cascaded away with it, anything else can be
+      recomputed with sp_rebuild_project_issue_stats
+*/
+DROP TRIGGER IF EXISTS trg_issues_counts_insert$$
+CREATE TRIGGER trg_issues_counts_insert
+	AFTER INSERT ON issues
+    FOR EACH ROW
+BEGIN
+	INSERT INTO project_issue_counts (project_id, status, issue_count)
+    VALUES (NEW.project_id, NEW.status, 1)
+    ON DUPLICATE KEY UPDATE issue_count = issue_count + 1;
+    
+    INSERT INTO project_issue_stats (project_id, status, priority, type, assignee_key, issue_count)
+    VALUES (NEW.project_id, NEW.status, NEW.priority, NEW.type, IFNULL(NEW.assignee_id, 0), 1)
+    ON DUPLICATE KEY UPDATE issue_count = issue_count + 1;
+END$$
+
+DROP TRIGGER IF EXISTS trg_issues_counts_update$$
+CREATE TRIGGER trg_issues_counts_update
+	AFTER UPDATE ON issues
+    FOR EACH ROW
+BEGIN
+	IF NEW.status <> OLD.status OR NEW.project_id <> OLD.project_id THEN
+		UPDATE project_issue_counts SET issue_count = issue_count - 1
+        WHERE project_id = OLD.project_id AND status = OLD.status;
+        
+        INSERT INTO project_issue_counts (project_id, status, issue_count)
+		VALUES (NEW.project_id, NEW.status, 1)
+		ON DUPLICATE KEY UPDATE issue_count = issue_count + 1;
+	END IF;
+    
+    IF NEW.status <> OLD.status OR NEW.project_id <> OLD.project_id
+		OR NEW.priority <> OLD.priority OR NEW.type <> OLD.type
+        OR (NEW.assignee_id <=> OLD.assignee_id) = 0 THEN
+		UPDATE project_issue_stats SET issue_count = issue_count - 1
+        WHERE project_id = OLD.project_id AND status = OLD.status AND priority = OLD.priority
+			AND type = OLD.type AND assignee_key = IFNULL(OLD.assignee_id, 0);
+            
+		INSERT INTO project_issue_stats (project_id, status, priority, type, assignee_key, issue_count)
+		VALUES (NEW.project_id, NEW.status, NEW.priority, NEW.type, IFNULL(NEW.assignee_id, 0), 1)
+		ON DUPLICATE KEY UPDATE issue_count = issue_count + 1;
+	END IF;
+    
+    -- Move the issue's labels to the new status bucket
+    IF NEW.status <> OLD.status THEN
+		UPDATE label_usage_counts lc
+        JOIN issue_labels il ON il.label_id = lc.label_id
+        SET lc.issue_count = lc.issue_count - 1
+        WHERE il.issue_id = NEW.issue_id AND lc.status = OLD.status;
+        
+        INSERT INTO label_usage_counts (label_id, status, issue_count)
+        SELECT label_id, NEW.status, 1 FROM issue_labels WHERE issue_id = NEW.issue_id
+        ON DUPLICATE KEY UPDATE issue_count = issue_count + 1;
+	END IF;
+END$$
+
+DROP TRIGGER IF EXISTS trg_issues_counts_delete$$
+CREATE TRIGGER trg_issues_counts_delete
+	AFTER DELETE ON issues
+    FOR EACH ROW
+BEGIN
+	UPDATE project_issue_counts SET issue_count = issue_count - 1
+	WHERE project_id = OLD.project_id AND status = OLD.status;
+    
+    UPDATE project_issue_stats SET issue_count = issue_count - 1
+	WHERE project_id = OLD.project_id AND status = OLD.status AND priority = OLD.priority
+		AND type = OLD.type AND assignee_key = IFNULL(OLD.assignee_id, 0);
+END$$
+
+
+/*	TRIGGERS: trg_issue_labels_counts_*
+	- Maintain label_usage_counts as labels are attached to / detached from issues
+    - Labels removed by cascade (label or issue deleted) don't fire these; a deleted
+	  label's counts cascade away with it, and project purges delete issue_labels
+      explicitly before the issues
+*/
+DROP TRIGGER IF EXISTS trg_issue_labels_counts_insert$$
+CREATE TRIGGER trg_issue_labels_counts_insert
+	AFTER INSERT ON issue_labels
+    FOR EACH ROW
+BEGIN
+	INSERT INTO label_usage_counts (label_id, status, issue_count)
+    SELECT NEW.label_id, status, 1 FROM issues WHERE issue_id = NEW.issue_id
+    ON DUPLICATE KEY UPDATE issue_count = issue_count + 1;
+END$$
+
+DROP TRIGGER IF EXISTS trg_issue_labels_counts_delete$$
+CREATE TRIGGER trg_issue_labels_counts_delete
+	AFTER DELETE ON issue_labels
+    FOR EACH ROW
+BEGIN
+	UPDATE label_usage_counts lc
+    JOIN issues i ON i.issue_id = OLD.issue_id
+    SET lc.issue_count = lc.issue_count - 1
+    WHERE lc.label_id = OLD.label_id AND lc.status = i.status;
+END$$
+
+
+/* 	PROCEDURE: sp_rebuild_project_issue_stats
+	- Recomputes project_issue_counts, project_issue_stats and label_usage_counts from issues
+    - p_project_id limits the rebuild to one project, NULL rebuilds every project
+    - Runs in one transaction; INSERT ... SELECT locks the scanned issue rows, so
+	  concurrent issue writes wait rather than being lost from the totals
+*/
+DROP PROCEDURE IF EXISTS sp_rebuild_project_issue_stats$$
+CREATE PROCEDURE sp_rebuild_project_issue_stats (
+	IN p_project_id 	BIGINT
+)
+BEGIN
+	START TRANSACTION;
+    
+    DELETE FROM project_issue_counts
+    WHERE p_project_id IS NULL OR project_id = p_project_id;
+    
+    DELETE FROM project_issue_stats
+    WHERE p_project_id IS NULL OR project_id = p_project_id;
+    
+    INSERT INTO project_issue_counts (project_id, status, issue_count)
+    SELECT project_id, status, COUNT(*)
+    FROM issues
+    WHERE p_project_id IS NULL OR project_id = p_project_id
+    GROUP BY project_id, status;
+    
+    INSERT INTO project_issue_stats (project_id, status, priority, type, assignee_key, issue_count)
+    SELECT project_id, status, priority, type, IFNULL(assignee_id, 0), COUNT(*)
+    FROM issues
+    WHERE p_project_id IS NULL OR project_id = p_project_id
+    GROUP BY project_id, status, priority, type, IFNULL(assignee_id, 0);
+    
+    DELETE lc FROM label_usage_counts lc
+    JOIN labels l ON l.label_id = lc.label_id
+    WHERE p_project_id IS NULL OR l.project_id = p_project_id;
+    
+    INSERT INTO label_usage_counts (label_id, status, issue_count)
+    SELECT il.label_id, i.status, COUNT(*)
+    FROM issue_labels il
+    JOIN issues i ON i.issue_id = il.issue_id
+    WHERE p_project_id IS NULL OR i.project_id = p_project_id
+    GROUP BY il.label_id, i.status;
+    
+    COMMIT;
+END$$
+
+
+/*	TRIGGERS: trg_issues_version, trg_comments_version
+	- Bump the row version on every UPDATE, whichever code path issued it, so
+	  compare-and-set edits (UPDATE ... WHERE version = <expected>) detect any
+      concurrent change
+    - Updates run with @issue_bookkeeping set (comment_count/last_activity_at upkeep by
+      the comment routes and `flask repair-issue-activity`) are not edits: no version bump
+    - Issue edits move last_activity_at when they change a field trg_issues_history_update logs
+*/
+DROP TRIGGER IF EXISTS trg_issues_version$$
+CREATE TRIGGER trg_issues_version
+	BEFORE UPDATE ON issues
+    FOR EACH ROW
+BEGIN
+	IF @issue_bookkeeping IS NULL THEN
+		SET NEW.version = OLD.version + 1;
+        
+        IF NEW.status <> OLD.status OR NEW.priority <> OLD.priority
+			OR (NEW.assignee_id <=> OLD.assignee_id) = 0 OR (NEW.due_date <=> OLD.due_date) = 0
+            OR (NEW.description <=> OLD.description) = 0 THEN
+			SET NEW.last_activity_at = CURRENT_TIMESTAMP;
+		END IF;
+	END IF;
+END$$
+
+DROP TRIGGER IF EXISTS trg_comments_version$$
+CREATE TRIGGER trg_comments_version
+	BEFORE UPDATE ON comments
+    FOR EACH ROW
+BEGIN
+	SET NEW.version = OLD.version + 1;
+END$$
 DELIMITER ;
\ No newline at end of file
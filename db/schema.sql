@@ -24,9 +24,11 @@ CREATE TABLE IF NOT EXISTS projects (
     is_public 		TINYINT(1) 		NOT NULL	DEFAULT 1,
     created_by 		BIGINT 			NULL,
     created_at 		DATETIME 		NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
+    deleting_at 	DATETIME 		NULL,		-- set while a background deletion purges the project; hidden from the API
     
     CONSTRAINT pk_projects PRIMARY KEY (project_id),
     CONSTRAINT uq_project_key UNIQUE (project_key),
+    INDEX idx_projects_public_key (is_public, project_key),		-- "public projects" half of project listing
     
     CONSTRAINT fk_projects_creator FOREIGN KEY (created_by) REFERENCES users(user_id) 
 		ON DELETE SET NULL
@@ -39,6 +41,7 @@ CREATE TABLE IF NOT EXISTS project_memberships (
     joined_at 	DATETIME 	NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
     
     CONSTRAINT pk_project_memberships 			PRIMARY KEY (project_id, user_id),
+    INDEX idx_project_memberships_user (user_id, project_id, role),		-- "my memberships" half of project listing
     
     CONSTRAINT fk_project_memberships_project 	FOREIGN KEY (project_id) REFERENCES projects(project_id) 
 		ON DELETE CASCADE,
@@ -60,9 +63,16 @@ CREATE TABLE IF NOT EXISTS issues (
     due_date 		DATE 		NULL,
     created_at 		DATETIME 	NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
     updated_at 		DATETIME 	NOT NULL 	DEFAULT CURRENT_TIMESTAMP	ON UPDATE CURRENT_TIMESTAMP,
+    version 		INT 		NOT NULL 	DEFAULT 1,		-- bumped by trg_issues_version, used for If-Match edits
+    comment_count 	INT 		NOT NULL 	DEFAULT 0,		-- maintained by the comment routes, repaired by `flask repair-issue-activity`
+    last_activity_at DATETIME 	NOT NULL 	DEFAULT CURRENT_TIMESTAMP,	-- latest of creation, history-tracked change, comment
     
     CONSTRAINT pk_issues 					PRIMARY KEY (issue_id),
     CONSTRAINT uq_issues_num_per_project 	UNIQUE(project_id, issue_number),
+    INDEX idx_issues_project_assignee (project_id, assignee_id),		-- batched unassignment on member removal
+    INDEX idx_issues_assignee_work (assignee_id, status, priority DESC, due_date),	-- GET /me/issues: one range scan per status, already in display order
+    INDEX idx_issues_reporter_work (reporter_id, status, priority DESC, due_date),
+    INDEX idx_issues_due (status, due_date),		-- due date scanner (due_scanner.py): open issues by due date
     
     CONSTRAINT fk_issues_project 			FOREIGN KEY (project_id) REFERENCES projects(project_id)
 		ON DELETE CASCADE,
@@ -89,6 +99,7 @@ CREATE TABLE IF NOT EXISTS issue_labels (
     label_id BIGINT NOT NULL,
 	
     CONSTRAINT pk_issue_labels 			PRIMARY KEY (issue_id, label_id),
+    INDEX idx_issue_labels_label (label_id, issue_id),		-- "issues with label X" range scans
     
     CONSTRAINT fk_issue_labels_issue 	FOREIGN KEY (issue_id) REFERENCES issues(issue_id)
 		ON DELETE CASCADE,
@@ -103,8 +114,10 @@ CREATE TABLE IF NOT EXISTS comments (
     author_id 	BIGINT 		NULL,
     created_at 	DATETIME	NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
     updated_at 	DATETIME 	NOT NULL 	DEFAULT CURRENT_TIMESTAMP 	ON UPDATE CURRENT_TIMESTAMP,
+    version 	INT 		NOT NULL 	DEFAULT 1,		-- bumped by trg_comments_version
     
     CONSTRAINT pk_comments PRIMARY KEY (comment_id),
+    INDEX idx_comments_issue (issue_id, created_at),		-- an issue's comments in order, and its latest one
     
     CONSTRAINT fk_comments_issue 		FOREIGN KEY (issue_id) REFERENCES issues(issue_id)
 		ON DELETE CASCADE,
@@ -122,6 +135,8 @@ CREATE TABLE IF NOT EXISTS issue_history (
     changed_at 	DATETIME 	NOT NULL DEFAULT CURRENT_TIMESTAMP,
     
     CONSTRAINT pk_issue_history PRIMARY KEY (change_id),
+    INDEX idx_issue_history_issue (issue_id, changed_at),
+    INDEX idx_issue_history_changed_at (changed_at),
     
     CONSTRAINT fk_issue_history_issue FOREIGN KEY (issue_id) REFERENCES issues(issue_id)
 		ON DELETE CASCADE,
@@ -129,3 +144,168 @@ CREATE TABLE IF NOT EXISTS issue_history (
     CONSTRAINT fk_issue_history_changed_by FOREIGN KEY (changed_by) REFERENCES users(user_id)
 		ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Issue history older than HISTORY_HOT_DAYS, moved here by `flask archive-history`.
+-- Range partitioned by month so expired months can be dropped whole (`flask rotate-history-partitions`);
+-- partitioned InnoDB tables can't have foreign keys, so rows are purged explicitly with their project.
+CREATE TABLE IF NOT EXISTS issue_history_archive (
+	change_id 	BIGINT 		NOT NULL,
+    issue_id 	BIGINT 		NOT NULL,
+    changed_by 	BIGINT 		NULL,
+    field_name 	VARCHAR(64) NOT NULL,
+    old_value 	TEXT 		NULL,
+    new_value 	TEXT 		NULL,
+    changed_at 	DATETIME 	NOT NULL,
+    
+    CONSTRAINT pk_issue_history_archive PRIMARY KEY (change_id, changed_at),
+    INDEX idx_issue_history_archive_issue (issue_id, changed_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+PARTITION BY RANGE COLUMNS (changed_at) (
+	PARTITION p_initial VALUES LESS THAN ('2025-01-01'),
+    PARTITION pmax 		VALUES LESS THAN (MAXVALUE)
+);
+
+-- Issues carrying each label, by issue status, maintained by trg_issue_labels_counts_* and trg_issues_counts_update
+CREATE TABLE IF NOT EXISTS label_usage_counts (
+	label_id 		BIGINT 		NOT NULL,
+    status 			ENUM('OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED') 	NOT NULL,
+    issue_count 	INT 		NOT NULL 	DEFAULT 0,
+    
+    CONSTRAINT pk_label_usage_counts PRIMARY KEY (label_id, status),
+    
+    CONSTRAINT fk_label_usage_counts_label FOREIGN KEY (label_id) REFERENCES labels(label_id)
+		ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Precomputed issue counts per project and status, maintained by the trg_issues_counts_* triggers
+CREATE TABLE IF NOT EXISTS project_issue_counts (
+	project_id 		BIGINT 		NOT NULL,
+    status 			ENUM('OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED') 	NOT NULL,
+    issue_count 	INT 		NOT NULL 	DEFAULT 0,
+    
+    CONSTRAINT pk_project_issue_counts PRIMARY KEY (project_id, status),
+    
+    CONSTRAINT fk_project_issue_counts_project FOREIGN KEY (project_id) REFERENCES projects(project_id)
+		ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Precomputed issue counts per project by status x priority x type x assignee, maintained by
+-- the trg_issues_counts_* triggers and rebuildable with sp_rebuild_project_issue_stats
+CREATE TABLE IF NOT EXISTS project_issue_stats (
+	project_id 		BIGINT 		NOT NULL,
+    status 			ENUM('OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED') 	NOT NULL,
+    priority 		ENUM('LOW', 'MEDIUM', 'HIGH', 'CRITICAL') 			NOT NULL,
+    type 			ENUM('BUG', 'FEATURE', 'TASK', 'OTHER') 			NOT NULL,
+    assignee_key 	BIGINT 		NOT NULL 	DEFAULT 0,		-- assignee_id, or 0 when unassigned
+    issue_count 	INT 		NOT NULL 	DEFAULT 0,
+    
+    CONSTRAINT pk_project_issue_stats PRIMARY KEY (project_id, status, priority, type, assignee_key),
+    
+    CONSTRAINT fk_project_issue_stats_project FOREIGN KEY (project_id) REFERENCES projects(project_id)
+		ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Open issues past their due date (OVERDUE) or due within DUE_SCAN_AT_RISK_DAYS (AT_RISK),
+-- as of the last run of the due date scanner (due_scanner.py)
+CREATE TABLE IF NOT EXISTS issue_due_alerts (
+	issue_id 		BIGINT 		NOT NULL,
+    project_id 		BIGINT 		NOT NULL,
+    state 			ENUM('OVERDUE', 'AT_RISK') 	NOT NULL,
+    due_date 		DATE 		NOT NULL,
+    scanned_at 		DATETIME(6) NOT NULL,		-- start of the scan that last saw the issue; older rows are dropped after each scan
+    
+    CONSTRAINT pk_issue_due_alerts PRIMARY KEY (issue_id),
+    INDEX idx_issue_due_alerts_project (project_id, state, due_date),
+    INDEX idx_issue_due_alerts_scanned (scanned_at),
+    
+    CONSTRAINT fk_issue_due_alerts_issue FOREIGN KEY (issue_id) REFERENCES issues(issue_id)
+		ON DELETE CASCADE,
+	CONSTRAINT fk_issue_due_alerts_project FOREIGN KEY (project_id) REFERENCES projects(project_id)
+		ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Per-project totals of issue_due_alerts, rewritten by each scan. Projects without
+-- overdue or at-risk issues have no row
+CREATE TABLE IF NOT EXISTS project_due_counts (
+	project_id 		BIGINT 		NOT NULL,
+    overdue_count 	INT 		NOT NULL 	DEFAULT 0,
+    at_risk_count 	INT 		NOT NULL 	DEFAULT 0,
+    scanned_at 		DATETIME(6) NOT NULL,
+    
+    CONSTRAINT pk_project_due_counts PRIMARY KEY (project_id),
+    INDEX idx_project_due_counts_scanned (scanned_at),
+    
+    CONSTRAINT fk_project_due_counts_project FOREIGN KEY (project_id) REFERENCES projects(project_id)
+		ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Progress of background project deletions. Deliberately no FK to projects, so the
+-- record outlives the project it describes
+CREATE TABLE IF NOT EXISTS project_deletions (
+	project_id 		BIGINT 			NOT NULL,
+    project_key 	VARCHAR(16) 	NOT NULL,
+    requested_by 	BIGINT 			NULL,
+    requested_at 	DATETIME 		NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
+    status 			ENUM('PENDING', 'RUNNING', 'DONE', 'FAILED') 	NOT NULL 	DEFAULT 'PENDING',
+    stage 			VARCHAR(32) 	NOT NULL,	-- issues, labels, project_memberships, done
+    rows_deleted 	BIGINT 			NOT NULL 	DEFAULT 0,
+    last_error 		TEXT 			NULL,
+    updated_at 		DATETIME 		NOT NULL 	DEFAULT CURRENT_TIMESTAMP	ON UPDATE CURRENT_TIMESTAMP,
+    finished_at 	DATETIME 		NULL,
+    
+    CONSTRAINT pk_project_deletions PRIMARY KEY (project_id),
+    INDEX idx_project_deletions_status (status, requested_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Durable background job queue, claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED
+CREATE TABLE IF NOT EXISTS jobs (
+	job_id 			BIGINT 			NOT NULL 	AUTO_INCREMENT,
+    kind 			VARCHAR(64) 	NOT NULL,
+    payload 		JSON 			NOT NULL,
+    status 			ENUM('QUEUED', 'RUNNING', 'SUCCEEDED', 'FAILED') 	NOT NULL 	DEFAULT 'QUEUED',
+    unique_key 		VARCHAR(128) 	NULL,		-- dedupes queued/running jobs, cleared once finished
+    attempts 		INT 			NOT NULL 	DEFAULT 0,
+    max_attempts 	INT 			NOT NULL 	DEFAULT 5,
+    run_after 		DATETIME 		NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
+    locked_by 		VARCHAR(128) 	NULL,
+    locked_at 		DATETIME 		NULL,		-- refreshed by progress reports (heartbeat)
+    progress 		JSON 			NULL,
+    result 			JSON 			NULL,
+    last_error 		TEXT 			NULL,
+    created_by 		BIGINT 			NULL,
+    created_at 		DATETIME 		NOT NULL 	DEFAULT CURRENT_TIMESTAMP,
+    updated_at 		DATETIME 		NOT NULL 	DEFAULT CURRENT_TIMESTAMP	ON UPDATE CURRENT_TIMESTAMP,
+    finished_at 	DATETIME 		NULL,
+    
+    CONSTRAINT pk_jobs 				PRIMARY KEY (job_id),
+    CONSTRAINT uq_jobs_unique_key 	UNIQUE (unique_key),
+    INDEX idx_jobs_claim (status, run_after),
+    INDEX idx_jobs_created_by (created_by, created_at),
+    
+    CONSTRAINT fk_jobs_created_by FOREIGN KEY (created_by) REFERENCES users(user_id)
+		ON DELETE SET NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Shared token buckets for the "database" rate limit backend (multi-node deployments)
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+	bucket_key 		CHAR(64) 		NOT NULL,	-- sha256 of "<limit_name>:<key>"
+    tokens 			DOUBLE 			NOT NULL,
+    refilled_at 	DOUBLE 			NOT NULL,	-- unix epoch seconds
+    
+    CONSTRAINT pk_rate_limit_buckets PRIMARY KEY (bucket_key),
+    INDEX idx_rate_limit_buckets_refilled (refilled_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Server-side sessions for the "database" session backend (multi-node deployments)
+CREATE TABLE IF NOT EXISTS user_sessions (
+	session_key 	CHAR(64) 		NOT NULL,	-- sha256 of the cookie token
+    user_id 		BIGINT 			NULL,
+    data 			TEXT 			NOT NULL,	-- Flask tagged JSON, includes the cached user summary
+    expires_at 		DOUBLE 			NOT NULL,	-- unix epoch seconds
+    
+    CONSTRAINT pk_user_sessions PRIMARY KEY (session_key),
+    INDEX idx_user_sessions_expires (expires_at),
+    
+    CONSTRAINT fk_user_sessions_user FOREIGN KEY (user_id) REFERENCES users(user_id)
+		ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
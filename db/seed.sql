@@ -87,4 +87,12 @@ VALUES
 (3, 'Ensure that update triggers properly update timestamps', 2, 1),
 (4, 'Keep this secret!', 3, 1),
 (5, 'As a viewer, I can still leave feedback - cool!', 1, 3)
-;
\ No newline at end of file
+;
+
+-- Comments above were inserted directly rather than through the API
+SET @issue_bookkeeping := 1;
+UPDATE issues i
+SET i.comment_count = (SELECT COUNT(*) FROM comments c WHERE c.issue_id = i.issue_id),
+	i.updated_at = i.updated_at
+WHERE i.issue_id IN (SELECT issue_id FROM comments);
+SET @issue_bookkeeping := NULL;